@@ -4,6 +4,7 @@
 from .mdf_v2 import MDF2
 from .mdf_v3 import MDF3
 from .mdf_v4 import MDF4
+from .mdf_v4_writer import MDF4Writer
 from .mdf import MDF, SUPPORTED_VERSIONS
 from .signal import Signal
 from .version import __version__
@@ -14,6 +15,7 @@ __all__ = [
     'MDF2',
     'MDF3',
     'MDF4',
+    'MDF4Writer',
     'Signal',
     'SUPPORTED_VERSIONS',
 ]
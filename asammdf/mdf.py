@@ -9,22 +9,26 @@ from collections import OrderedDict
 from copy import deepcopy
 from warnings import warn
 from functools import reduce
+from multiprocessing import Manager, Pool
 from struct import unpack
 
+try:
+    from queue import Empty
+except ImportError:
+    from Queue import Empty
+
 import numpy as np
 from pandas import DataFrame
 
 from .mdf_v2 import MDF2
 from .mdf_v3 import MDF3
 from .mdf_v4 import MDF4
-from .signal import Signal
 from .utils import (
     CHANNEL_COUNT,
     MERGE_LOW,
     MERGE_MINIMUM,
     MdfException,
     get_text_v3,
-    get_text_v4,
     get_unique_name,
     matlab_compatible,
     validate_memory_argument,
@@ -36,17 +40,294 @@ from .utils import (
 )
 from .v2_v3_blocks import Channel as ChannelV3
 from .v2_v3_blocks import HeaderBlock as HeaderV3
-from .v4_blocks import Channel as ChannelV4
 from .v4_blocks import HeaderBlock as HeaderV4
 from .v4_blocks import ChannelArrayBlock, EventBlock
 from . import v4_constants as v4c
 
 PYVERSION = sys.version_info[0]
 
+# default number of rows that are resampled and formatted at once by the
+# streaming exporters
+EXPORT_CHUNK_SIZE = 2 ** 16
+
 
 __all__ = ['MDF', 'SUPPORTED_VERSIONS']
 
 
+def _decode_concatenated_file(args):
+    """ decode the groups of a file in a worker process of
+    *MDF.concatenate*; the file is opened once and the decoded groups are put
+    one by one in the *queue*, so that at most one decoded group of the file
+    waits for the calling process
+
+    Parameters
+    ----------
+    args : tuple
+        (file name, memory option, included channels for each group, read
+        fragment size for each group, timestamps offset, raw groups indexes,
+        queue)
+
+    """
+    (name, memory, groups_included_channels, read_sizes, offset, raw_groups,
+     queue) = args
+
+    with MDF(name, memory) as mdf:
+        for index in range(len(mdf.groups)):
+            fragments = MDF._iter_concatenated_fragments(
+                mdf,
+                groups_included_channels,
+                read_sizes,
+                offset,
+                raw_groups=raw_groups,
+                groups=(index, ),
+            )
+            queue.put(list(fragments))
+
+
+def _iter_queued_fragments(queue, result, groups_nr):
+    """ get the fragments of the groups decoded by *_decode_concatenated_file*
+
+    Parameters
+    ----------
+    queue : Queue
+        queue of the decoded groups
+    result : AsyncResult
+        result of the worker task; its error is raised if the worker fails
+    groups_nr : int
+        number of groups of the file
+
+    Returns
+    -------
+    fragments : generator
+        (group index, master, raw samples list or raw records bytes) for
+        each fragment
+
+    """
+    for _ in range(groups_nr):
+        while True:
+            try:
+                fragments = queue.get(timeout=0.1)
+                break
+            except Empty:
+                if result.ready():
+                    # raises the worker error
+                    result.get()
+        for fragment in fragments:
+            yield fragment
+        del fragments
+
+
+def _iter_fragments(fragments):
+    """ yield the group data *fragments*; an empty fragment is yielded if
+    the group has no data so that the channels can still be decoded with
+    the right types
+
+    """
+    empty = True
+    for fragment in fragments:
+        empty = False
+        yield fragment
+    if empty:
+        yield b'', 0
+
+
+def _csv_field(value):
+    """ quote a CSV field the same way as *csv.writer* """
+    value = str(value)
+    if any(char in value for char in ',"\r\n'):
+        value = '"{}"'.format(value.replace('"', '""'))
+    return value
+
+
+def _csv_rows(columns):
+    """ format the *columns* as CSV rows. The numeric columns are converted
+    to text in a vectorized way and the rows are built column by column;
+    like *zip* the rows are truncated to the shortest column
+
+    Parameters
+    ----------
+    columns : list
+        list of numpy arrays
+
+    Returns
+    -------
+    rows : list
+        list of CSV rows strings
+
+    """
+    size = min(len(column) for column in columns)
+    rows = None
+    for column in columns:
+        column = column[:size]
+        if column.dtype.kind in 'biuf' and column.ndim == 1:
+            text = column.astype(str)
+        else:
+            text = np.array(
+                [_csv_field(value) for value in column] or [''],
+                dtype=str,
+            )[:size]
+        if rows is None:
+            rows = text
+        else:
+            rows = np.char.add(np.char.add(rows, ','), text)
+
+    return rows.tolist()
+
+
+def _write_csv_rows(csvfile, columns, chunk_size):
+    """ write the *columns* to the *csvfile* in blocks of *chunk_size* rows
+
+    Parameters
+    ----------
+    csvfile : file
+        CSV file opened with *newline=''*
+    columns : list
+        list of numpy arrays
+    chunk_size : int
+        maximum number of rows formatted at once
+
+    """
+    if not columns:
+        return
+    size = min(len(column) for column in columns)
+    for start in range(0, size, chunk_size):
+        rows = _csv_rows(
+            [column[start: start + chunk_size] for column in columns]
+        )
+        csvfile.write('\r\n'.join(rows))
+        csvfile.write('\r\n')
+
+
+def _create_hdf5_dataset(group, name, samples, unit, comment, compression):
+    """ create a resizable and chunked HDF5 dataset with the same type and
+    samples shape as *samples*. String samples are stored with a variable
+    length type because the later fragments can hold longer strings
+
+    Parameters
+    ----------
+    group : h5py.Group
+        parent HDF5 group
+    name : str
+        dataset name
+    samples : np.array
+        samples used to get the dataset type and shape
+    unit : str
+        unit attribute
+    comment : str
+        comment attribute
+    compression : str
+        HDF5 compression filter: *gzip*, *lzf* or *None*
+
+    Returns
+    -------
+    dataset : h5py.Dataset
+        empty dataset
+
+    """
+    from h5py import special_dtype
+
+    if samples.dtype.kind == 'S':
+        dtype = special_dtype(vlen=bytes)
+    elif samples.dtype.kind == 'U':
+        dtype = special_dtype(vlen=str)
+    else:
+        dtype = samples.dtype
+
+    dataset = group.create_dataset(
+        name,
+        shape=(0, ) + samples.shape[1:],
+        maxshape=(None, ) + samples.shape[1:],
+        dtype=dtype,
+        chunks=True,
+        compression=compression,
+    )
+    unit = unit.replace('\0', '')
+    if unit:
+        dataset.attrs['unit'] = unit
+    comment = comment.replace('\0', '')
+    if comment:
+        dataset.attrs['comment'] = comment
+
+    return dataset
+
+
+def _append_hdf5_dataset(dataset, samples):
+    """ append the *samples* at the end of the resizable *dataset* """
+    if len(samples):
+        if samples.dtype.kind in 'SU':
+            samples = samples.astype(object)
+        size = len(dataset)
+        dataset.resize(size + len(samples), axis=0)
+        dataset[size:] = samples
+
+
+def _get_resampled_names(groups_signals, use_display_names):
+    """ get unique export names for the resampled channels; the name of a
+    channel that is already used gets the group index as suffix
+
+    Parameters
+    ----------
+    groups_signals : iterable
+        list of *Signal* objects for each group
+    use_display_names : bool
+        use the display names if available
+
+    Returns
+    -------
+    names : list
+        unique channel names, in the groups order
+
+    """
+    names = []
+    used_names = {'t'}
+
+    for i, signals in enumerate(groups_signals):
+        for sig in signals:
+            if use_display_names:
+                channel_name = sig.display_name or sig.name
+            else:
+                channel_name = sig.name
+
+            if channel_name in used_names:
+                channel_name = '{}_{}'.format(channel_name, i)
+
+                channel_name = get_unique_name(
+                    used_names,
+                    channel_name,
+                )
+            used_names.add(channel_name)
+            names.append(channel_name)
+
+    return names
+
+
+def _arrow_array(samples):
+    """ convert the *samples* to a pyarrow array; the samples of array
+    channels are stored as lists and the structured samples as structs
+
+    """
+    import pyarrow as pa
+
+    if samples.dtype.names:
+        names = samples.dtype.names
+        return pa.StructArray.from_arrays(
+            [_arrow_array(samples[name]) for name in names],
+            list(names),
+        )
+    elif samples.ndim > 1:
+        return pa.array(samples.tolist())
+    else:
+        return pa.array(samples)
+
+
+def _arrow_field_metadata(sig):
+    """ unit and comment of the *Signal* as parquet column metadata """
+    return {
+        'unit': sig.unit.replace('\0', ''),
+        'comment': sig.comment.replace('\0', ''),
+    }
+
+
 class MDF(object):
     """Unified access to MDF v3 and v4 files. Underlying _mdf's attributes and
     methods are linked to the `MDF` object via *setattr*. This is done to expose
@@ -68,18 +349,36 @@ class MDF(object):
     version : string
         mdf file version from ('2.00', '2.10', '2.14', '3.00', '3.10', '3.20',
         '3.30', '4.00', '4.10', '4.11'); default '4.10'
+    use_metadata_cache : bool
+        for mdf version 4 files opened with the *low* or *minimum* memory
+        options, keep the parsed metadata in a sidecar index file
+        (*name* + '.idx') that is used to skip the blocks parsing the next
+        time the unchanged file is opened; default *False*
+    lazy_channels : bool
+        for mdf version 4 files opened with the *low* memory option, load
+        the channels unit, comment, conversion and source on the first
+        access instead of when the file is opened; default *False*
 
     """
 
     _terminate = False
 
-    def __init__(self, name=None, memory='full', version='4.10', callback=None, queue=None):
+    def __init__(
+            self,
+            name=None,
+            memory='full',
+            version='4.10',
+            callback=None,
+            queue=None,
+            use_metadata_cache=False,
+            lazy_channels=False):
         if name:
             if os.path.isfile(name):
                 memory = validate_memory_argument(memory)
                 with open(name, 'rb') as file_stream:
                     magic_header = file_stream.read(3)
-                    if magic_header != b'MDF':
+                    # unfinalized MDF4 files start with "UnFinMF "
+                    if magic_header not in (b'MDF', b'UnF'):
                         raise MdfException('"{}" is not a valid ASAM MDF file'.format(name))
                     file_stream.seek(8)
                     version = file_stream.read(4).decode('ascii').strip(' \0')
@@ -91,7 +390,14 @@ class MDF(object):
                 if version in MDF3_VERSIONS:
                     self._mdf = MDF3(name, memory, callback=callback)
                 elif version in MDF4_VERSIONS:
-                    self._mdf = MDF4(name, memory, callback=callback, queue=queue)
+                    self._mdf = MDF4(
+                        name,
+                        memory,
+                        callback=callback,
+                        queue=queue,
+                        use_metadata_cache=use_metadata_cache,
+                        lazy_channels=lazy_channels,
+                    )
                 elif version in MDF2_VERSIONS:
                     self._mdf = MDF2(name, memory, callback=callback)
                 else:
@@ -347,30 +653,16 @@ class MDF(object):
                         break
                 else:
                     raise MdfException('CAN_DataFrame not found in group ' + str(index))
-                channel = channels[ch_cntr]
                 excluded_channels.add(ch_cntr)
-                if group['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
-                    stream = self._file
-                else:
-                    stream = self._tempfile
-                if self.memory == 'minimum':
-                    channel = ChannelV4(
-                        address=channel,
-                        stream=stream,
-                        load_metadata=False,
-                    )
+                catalog = self._get_channel_catalog(group)
+                channel = catalog[ch_cntr]
                 frame_bytes = range(
                     channel['byte_offset'],
                     channel['byte_offset'] + channel['bit_count'] // 8,
                 )
-                for i, channel in enumerate(channels):
-                    if self.memory == 'minimum':
-                        channel = ChannelV4(
-                            address=channel,
-                            stream=stream,
-                            load_metadata=False,
-                        )
-                    if channel['byte_offset'] in frame_bytes:
+                byte_offsets = catalog.fields['byte_offset'].tolist()
+                for i, byte_offset in enumerate(byte_offsets):
+                    if byte_offset in frame_bytes:
                         excluded_channels.add(i)
 
             for dependencies in group['channel_dependencies']:
@@ -415,7 +707,6 @@ class MDF(object):
         if master_index is not None:
             included_channels.remove(master_index)
 
-        channels = group['channels']
         channel_group = group['channel_group']
 
         if self.version in MDF2_VERSIONS + MDF3_VERSIONS:
@@ -433,29 +724,15 @@ class MDF(object):
                         break
                 else:
                     raise MdfException('CAN_DataFrame not found in group ' + str(index))
-                channel = channels[ch_cntr]
-                if group['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
-                    stream = self._file
-                else:
-                    stream = self._tempfile
-                if self.memory == 'minimum':
-                    channel = ChannelV4(
-                        address=channel,
-                        stream=stream,
-                        load_metadata=False,
-                    )
+                catalog = self._get_channel_catalog(group)
+                channel = catalog[ch_cntr]
                 frame_bytes = range(
                     channel['byte_offset'],
                     channel['byte_offset'] + channel['bit_count'] // 8,
                 )
-                for i, channel in enumerate(channels):
-                    if self.memory == 'minimum':
-                        channel = ChannelV4(
-                            address=channel,
-                            stream=stream,
-                            load_metadata=False,
-                        )
-                    if channel['byte_offset'] in frame_bytes:
+                byte_offsets = catalog.fields['byte_offset'].tolist()
+                for i, byte_offset in enumerate(byte_offsets):
+                    if byte_offset in frame_bytes:
                         included_channels.remove(i)
                 dbc_addr = group['dbc_addr']
                 message_id = group['message_id']
@@ -679,7 +956,8 @@ class MDF(object):
         for i, group in enumerate(self.groups):
             included_channels = self._included_channels(i)
 
-            data = self._load_group_data(group)
+            # only the fragments that overlap the cut interval are loaded
+            data = self._load_group_data_range(i, start, stop)
             parents, dtypes = self._prepare_record(group)
             group['parents'], group['types'] = parents, dtypes
 
@@ -851,6 +1129,190 @@ class MDF(object):
             out._callback = out._mdf._callback = self._callback
         return out
 
+    def _iter_resampled_group(self, index, channels, chunks):
+        """ generator that yields the group's channels interpolated on each
+        of the time base *chunks*. The group data fragments are decoded only
+        when they are needed, and the samples before the current chunk are
+        dropped, so the memory usage is bounded by the chunk and fragment
+        sizes
+
+        Parameters
+        ----------
+        index : int
+            group index
+        channels : list
+            indexes of the channels to resample
+        chunks : iterable
+            consecutive, increasing slices of the common time base
+
+        Yields
+        ------
+        signals : list
+            list of *Signal* objects interpolated on the chunk
+
+        """
+        fragments = _iter_fragments(
+            self._load_group_data(self.groups[index])
+        )
+        signals = None
+        last = None
+
+        for chunk in chunks:
+            stop = chunk[-1] if len(chunk) else None
+            while signals is None or (
+                    stop is not None
+                    and (last is None or last < stop)):
+                fragment = next(fragments, None)
+                if fragment is None:
+                    break
+                new_signals = [
+                    self.get(group=index, index=j, data=fragment)
+                    for j in channels
+                ]
+                master = self.get_master(index, data=fragment)
+                if len(master):
+                    last = master[-1]
+
+                if signals is None:
+                    signals = new_signals
+                else:
+                    for sig, new_sig in zip(signals, new_signals):
+                        sig.samples = np.concatenate(
+                            (sig.samples, new_sig.samples)
+                        )
+                        sig.timestamps = np.concatenate(
+                            (sig.timestamps, new_sig.timestamps)
+                        )
+
+            resampled = [sig.interp(chunk) for sig in signals]
+            if not len(chunk):
+                for sig in resampled:
+                    sig.samples = sig.samples[:0]
+                    sig.timestamps = sig.timestamps[:0]
+            yield resampled
+
+            if stop is not None:
+                for sig in signals:
+                    keep = np.searchsorted(
+                        sig.timestamps,
+                        stop,
+                        side='right',
+                    )
+                    keep = max(keep - 1, 0)
+                    sig.samples = sig.samples[keep:]
+                    sig.timestamps = sig.timestamps[keep:]
+
+    def _iter_resampled_chunks(self, master, chunk_size):
+        """ generator that yields the non-master channels of all the groups
+        interpolated on consecutive chunks of the common time base
+
+        Parameters
+        ----------
+        master : np.array
+            common time base
+        chunk_size : int
+            maximum number of timestamps in a chunk
+
+        Yields
+        ------
+        chunk, groups_signals : np.array, tuple
+            time base chunk and the list of interpolated *Signal* objects
+            for each group
+
+        """
+        chunks = [
+            master[start: start + chunk_size]
+            for start in range(0, len(master), chunk_size)
+        ] or [master]
+
+        groups_chunks = []
+        for i, grp in enumerate(self.groups):
+            master_index = self.masters_db.get(i, -1)
+            channels = [
+                j
+                for j, _ in enumerate(grp['channels'])
+                if j != master_index
+            ]
+            groups_chunks.append(
+                self._iter_resampled_group(i, channels, chunks)
+            )
+
+        for chunk, groups_signals in zip(chunks, zip(*groups_chunks)):
+            yield chunk, groups_signals
+
+    def _iter_group_blocks(self, index, raster, time_from_zero, chunk_size):
+        """ generator that yields the group's channels fragment by fragment,
+        or chunk by chunk of the group's raster if a *raster* is given
+
+        Parameters
+        ----------
+        index : int
+            group index
+        raster : float
+            time raster for resampling; 0 disables the resampling
+        time_from_zero : bool
+            adjust the master channel to start from 0
+        chunk_size : int
+            maximum number of raster timestamps in a chunk
+
+        Yields
+        ------
+        master, signals : Signal, list
+            master channel *Signal* (*None* if the group has no master) and
+            the list of the other channels *Signal* objects
+
+        """
+        grp = self.groups[index]
+        master_index = self.masters_db.get(index, None)
+        channels = [
+            j
+            for j, _ in enumerate(grp['channels'])
+            if j != master_index
+        ]
+        if master_index is not None:
+            channels.insert(0, master_index)
+
+        raster_ = None
+        if raster and master_index is not None:
+            times = self.get_master(index)
+            if len(times):
+                raster_ = np.arange(
+                    times[0],
+                    times[-1],
+                    raster,
+                    dtype=np.float64,
+                )
+            del times
+
+        if raster_ is not None:
+            chunks = [
+                raster_[start: start + chunk_size]
+                for start in range(0, len(raster_), chunk_size)
+            ] or [raster_]
+            blocks = self._iter_resampled_group(index, channels, chunks)
+        else:
+            fragments = _iter_fragments(self._load_group_data(grp))
+            blocks = (
+                [
+                    self.get(group=index, index=j, data=fragment)
+                    for j in channels
+                ]
+                for fragment in fragments
+            )
+
+        origin = None
+        for signals in blocks:
+            if master_index is None:
+                yield None, signals
+            else:
+                master = signals[0]
+                if time_from_zero:
+                    if origin is None and len(master):
+                        origin = master.samples[0]
+                    if origin is not None:
+                        master.samples = master.samples - origin
+                yield master, signals[1:]
+
     def export(self, fmt, filename=None, **kargs):
         """ export *MDF* to other formats. The *MDF* file name is used is
         available, else the *filename* argument must be provided.
@@ -881,6 +1343,12 @@ class MDF(object):
 
             * `pandas` : export all channels as a single pandas DataFrame
 
+            * `parquet` : Apache Parquet file output; this option will
+              generate a new parquet file for each data group
+              (<MDFNAME>_DataGroup_<cntr>.parquet), or a single file if
+              *single_time_base==True*. The channels units and comments are
+              stored as columns metadata
+
         filename : string
             export file name
 
@@ -898,6 +1366,12 @@ class MDF(object):
               options are *skip* or *zeros*; default is *zeros*
             * `format`: only valid for *mat* export; can be '4', '5' or '7.3',
               default is '5'
+            * `chunk_size`: only valid for *csv*, *hdf5* and *parquet*
+              export; maximum number of rows that are resampled and written
+              at once, default is *EXPORT_CHUNK_SIZE*
+            * `compression`: only valid for *hdf5* export; compression filter
+              of the chunked datasets, can be 'gzip', 'lzf' or *None*,
+              default is *None*
 
         Returns
         -------
@@ -927,13 +1401,12 @@ class MDF(object):
         use_display_names = kargs.get('use_display_names', True)
         empty_channels = kargs.get('empty_channels', 'zeros')
         format = kargs.get('format', '5')
+        chunk_size = kargs.get('chunk_size', EXPORT_CHUNK_SIZE)
+        compression = kargs.get('compression', None)
 
         name = filename if filename else self.name
 
         if single_time_base or fmt == 'pandas':
-            mdict = OrderedDict()
-            units = OrderedDict()
-            comments = OrderedDict()
             masters = [
                 self.get_master(i)
                 for i in range(len(self.groups))
@@ -950,6 +1423,11 @@ class MDF(object):
                 if len(master_):
                     master = master_
 
+        if single_time_base and fmt not in ('csv', 'hdf5', 'parquet') or fmt == 'pandas':
+            mdict = OrderedDict()
+            units = OrderedDict()
+            comments = OrderedDict()
+
             if time_from_zero and len(master):
                 mdict['t'] = master - master[0]
             else:
@@ -1028,6 +1506,9 @@ class MDF(object):
                 if not name.endswith('.hdf'):
                     name += '.hdf'
 
+                # the datasets are resizable and chunked, and they are
+                # extended fragment by fragment (or time base chunk by chunk
+                # for the resampled export)
                 if single_time_base:
                     with HDF5(name, 'w') as hdf:
                         # header information
@@ -1037,26 +1518,71 @@ class MDF(object):
                             for item in header_items:
                                 group.attrs[item] = self.header[item]
 
-                        # save each data group in a HDF5 group called
-                        # "DataGroup_<cntr>" with the index starting from 1
-                        # each HDF5 group will have a string attribute "master"
-                        # that will hold the name of the master channel
+                        datasets = None
 
-                        for channel in mdict:
-                            samples = mdict[channel]
-                            unit = units[channel]
-                            comment = comments[channel]
+                        for chunk, groups_signals in self._iter_resampled_chunks(master, chunk_size):
+                            if self._terminate:
+                                return
 
-                            dataset = group.create_dataset(
-                                channel,
-                                data=samples,
-                            )
-                            unit = unit.replace('\0', '')
-                            if unit:
-                                dataset.attrs['unit'] = unit
-                            comment = comment.replace('\0', '')
-                            if comment:
-                                dataset.attrs['comment'] = comment
+                            signals = [
+                                sig
+                                for group_signals in groups_signals
+                                for sig in group_signals
+                            ]
+
+                            if time_from_zero and len(master):
+                                columns = [chunk - master[0], ]
+                            else:
+                                columns = [chunk, ]
+
+                            if datasets is None:
+                                names = _get_resampled_names(
+                                    groups_signals,
+                                    use_display_names,
+                                )
+                                included = [
+                                    bool(len(sig)) or empty_channels == 'zeros'
+                                    for sig in signals
+                                ]
+
+                                datasets = [
+                                    _create_hdf5_dataset(
+                                        group,
+                                        't',
+                                        columns[0],
+                                        's',
+                                        '',
+                                        compression,
+                                    ),
+                                ]
+                                datasets += [
+                                    _create_hdf5_dataset(
+                                        group,
+                                        channel_name,
+                                        sig.samples,
+                                        sig.unit,
+                                        sig.comment,
+                                        compression,
+                                    )
+                                    for channel_name, sig, include in zip(names, signals, included)
+                                    if include
+                                ]
+
+                            for sig, include in zip(signals, included):
+                                if not include:
+                                    continue
+                                if len(sig):
+                                    columns.append(sig.samples)
+                                else:
+                                    columns.append(
+                                        np.zeros(
+                                            (len(chunk), ) + sig.samples.shape[1:],
+                                            dtype=sig.samples.dtype,
+                                        )
+                                    )
+
+                            for dataset, samples in zip(datasets, columns):
+                                _append_hdf5_dataset(dataset, samples)
 
                 else:
                     with HDF5(name, 'w') as hdf:
@@ -1077,29 +1603,46 @@ class MDF(object):
                             group_name = r'/' + 'DataGroup_{}'.format(i + 1)
                             group = hdf.create_group(group_name)
 
-                            master_index = self.masters_db.get(i, -1)
+                            datasets = None
 
-                            data = self._load_group_data(grp)
+                            blocks = self._iter_group_blocks(
+                                i,
+                                0,
+                                False,
+                                chunk_size,
+                            )
+                            for master, signals in blocks:
+                                if self._terminate:
+                                    return
+
+                                if master is not None:
+                                    signals.insert(0, master)
+
+                                if datasets is None:
+                                    if master is not None:
+                                        group.attrs['master'] = master.name
+
+                                    datasets = []
+                                    used_names = set()
+                                    for sig in signals:
+                                        channel_name = get_unique_name(
+                                            used_names,
+                                            sig.name,
+                                        )
+                                        used_names.add(channel_name)
+                                        datasets.append(
+                                            _create_hdf5_dataset(
+                                                group,
+                                                channel_name,
+                                                sig.samples,
+                                                sig.unit,
+                                                sig.comment,
+                                                compression,
+                                            )
+                                        )
 
-                            if PYVERSION == 2:
-                                data = b''.join(str(d[0]) for d in data)
-                            else:
-                                data = b''.join(d[0] for d in data)
-                            data = (data, 0)
-
-                            for j, _ in enumerate(grp['channels']):
-                                sig = self.get(group=i, index=j, data=data)
-                                name = sig.name
-                                if j == master_index:
-                                    group.attrs['master'] = name
-                                dataset = group.create_dataset(name,
-                                                               data=sig.samples)
-                                unit = sig.unit.replace('\0', '')
-                                if unit:
-                                    dataset.attrs['unit'] = unit
-                                comment = sig.comment.replace('\0', '')
-                                if comment:
-                                    dataset.attrs['comment'] = comment
+                                for dataset, sig in zip(datasets, signals):
+                                    _append_hdf5_dataset(dataset, sig.samples)
 
         elif fmt == 'excel':
             try:
@@ -1224,115 +1767,293 @@ class MDF(object):
             if single_time_base:
                 if not name.endswith('.csv'):
                     name += '.csv'
-                # print('Writing csv export to file "{}"'.format(name))
+
                 with open(name, 'w', newline='') as csvfile:
                     writer = csv.writer(csvfile)
+                    included = None
 
-                    names_row = [
-                        '{} [{}]'.format(channel_name, channel_unit)
-                        for (channel_name, channel_unit) in units.items()
-                    ]
-                    writer.writerow(names_row)
+                    for chunk, groups_signals in self._iter_resampled_chunks(master, chunk_size):
+                        if self._terminate:
+                            return
 
-                    vals = [
-                        samples
-                        for samples in mdict.values()
-                    ]
+                        signals = [
+                            sig
+                            for group_signals in groups_signals
+                            for sig in group_signals
+                        ]
 
-                    if self._terminate:
-                        return
+                        if included is None:
+                            names = _get_resampled_names(
+                                groups_signals,
+                                use_display_names,
+                            )
+                            included = [
+                                bool(len(sig)) or empty_channels == 'zeros'
+                                for sig in signals
+                            ]
+                            names_row = ['t [s]', ]
+                            names_row += [
+                                '{} [{}]'.format(channel_name, sig.unit)
+                                for channel_name, sig, include in zip(names, signals, included)
+                                if include
+                            ]
+                            writer.writerow(names_row)
+
+                        if time_from_zero and len(master):
+                            columns = [chunk - master[0], ]
+                        else:
+                            columns = [chunk, ]
 
-                    writer.writerows(zip(*vals))
+                        for sig, include in zip(signals, included):
+                            if not include:
+                                continue
+                            if len(sig):
+                                columns.append(sig.samples)
+                            else:
+                                columns.append(
+                                    np.zeros(len(chunk), dtype=sig.samples.dtype)
+                                )
+
+                        _write_csv_rows(csvfile, columns, chunk_size)
 
             else:
 
                 while name.endswith('.csv'):
                     name = name[:-4]
 
-                count = len(self.groups)
                 for i, grp in enumerate(self.groups):
                     if self._terminate:
                         return
-                    # print('Exporting group {} of {}'.format(i + 1, count))
-                    data = self._load_group_data(grp)
-
-                    if PYVERSION == 2:
-                        data = b''.join(str(d[0]) for d in data)
-                    else:
-                        data = b''.join(d[0] for d in data)
-                    data = (data, 0)
 
                     group_name = 'DataGroup_{}'.format(i + 1)
                     group_csv_name = '{}_{}.csv'.format(name, group_name)
                     with open(group_csv_name, 'w', newline='') as csvfile:
                         writer = csv.writer(csvfile)
+                        included = None
 
-                        master_index = self.masters_db.get(i, None)
-                        if master_index is not None:
-                            master = self.get(group=i, index=master_index, data=data)
+                        blocks = self._iter_group_blocks(
+                            i,
+                            raster,
+                            time_from_zero,
+                            chunk_size,
+                        )
+                        for master, signals in blocks:
+                            if self._terminate:
+                                return
 
-                            if raster and len(master):
-                                raster_ = np.arange(
-                                    master[0],
-                                    master[-1],
-                                    raster,
-                                    dtype=np.float64,
-                                )
-                                master = master.interp(raster_)
+                            if included is None:
+                                included = [
+                                    bool(len(sig)) or empty_channels == 'zeros'
+                                    for sig in signals
+                                ]
+
+                                if master is not None:
+                                    names_row = [master.name, ]
+                                else:
+                                    names_row = []
+                                names_row += [
+                                    '{} [{}]'.format(sig.name, sig.unit)
+                                    for sig, include in zip(signals, included)
+                                    if include
+                                ]
+                                writer.writerow(names_row)
+
+                            if master is not None:
+                                columns = [master.samples, ]
+                                cycles = len(master)
                             else:
-                                raster_ = None
-                        else:
-                            master = None
-                            raster_ = None
+                                columns = []
+                                cycles = max(
+                                    [len(sig) for sig in signals] or [0]
+                                )
 
-                        if time_from_zero:
-                            master.samples -= master.samples[0]
+                            for sig, include in zip(signals, included):
+                                if not include:
+                                    continue
+                                if len(sig):
+                                    columns.append(sig.samples)
+                                else:
+                                    columns.append(
+                                        np.zeros(cycles, dtype=sig.samples.dtype)
+                                    )
+
+                            _write_csv_rows(csvfile, columns, chunk_size)
 
-                        ch_nr = len(grp['channels'])
-                        if master is None:
-                            channels = [
-                                self.get(group=i, index=j, data=data)
-                                for j in range(ch_nr)
+        elif fmt == 'parquet':
+            try:
+                import pyarrow as pa
+                import pyarrow.parquet as pq
+            except ImportError:
+                warn('pyarrow not found; export to parquet is unavailable')
+                return
+
+            # each table is written with one row group for each data
+            # fragment (or time base chunk for the resampled export)
+            if single_time_base:
+                if not name.endswith('.parquet'):
+                    name += '.parquet'
+
+                writer = None
+                try:
+                    for chunk, groups_signals in self._iter_resampled_chunks(master, chunk_size):
+                        if self._terminate:
+                            return
+
+                        signals = [
+                            sig
+                            for group_signals in groups_signals
+                            for sig in group_signals
+                        ]
+
+                        if writer is None:
+                            names = _get_resampled_names(
+                                groups_signals,
+                                use_display_names,
+                            )
+                            included = [
+                                bool(len(sig)) or empty_channels == 'zeros'
+                                for sig in signals
+                            ]
+                            columns = [
+                                (channel_name, sig)
+                                for channel_name, sig, include in zip(names, signals, included)
+                                if include
                             ]
+
+                        if time_from_zero and len(master):
+                            arrays = [pa.array(chunk - master[0]), ]
                         else:
-                            if raster_ is not None:
-                                channels = [
-                                    self.get(group=i, index=j, data=data).interp(raster_)
-                                    for j in range(ch_nr)
-                                    if j != master_index
-                                ]
+                            arrays = [pa.array(chunk), ]
+
+                        for sig, include in zip(signals, included):
+                            if not include:
+                                continue
+                            if len(sig):
+                                samples = sig.samples
                             else:
-                                channels = [
-                                    self.get(group=i, index=j, data=data)
-                                    for j in range(ch_nr)
-                                    if j != master_index
-                                ]
+                                samples = np.zeros(len(chunk), dtype=sig.samples.dtype)
+                            arrays.append(_arrow_array(samples))
+
+                        if writer is None:
+                            fields = [
+                                pa.field(
+                                    't',
+                                    arrays[0].type,
+                                    metadata={'unit': 's', 'comment': ''},
+                                ),
+                            ]
+                            fields += [
+                                pa.field(
+                                    channel_name,
+                                    array.type,
+                                    metadata=_arrow_field_metadata(sig),
+                                )
+                                for (channel_name, sig), array in zip(columns, arrays[1:])
+                            ]
+                            schema = pa.schema(fields)
+                            writer = pq.ParquetWriter(name, schema)
 
-                        if raster_ is not None:
-                            cycles = len(raster_)
-                        else:
-                            cycles = grp['channel_group']['cycles_nr']
+                        writer.write_table(
+                            pa.Table.from_arrays(arrays, schema=schema)
+                        )
+                finally:
+                    if writer is not None:
+                        writer.close()
 
-                        if empty_channels == 'zeros':
-                            for channel in channels:
-                                if not len(channel):
-                                    channel.samples = np.zeros(cycles, dtype=channel.samples.dtype)
+            else:
+                while name.endswith('.parquet'):
+                    name = name[:-8]
 
-                        if master is not None:
-                            names_row = [master.name, ]
-                            vals = [master.samples]
-                        else:
-                            names_row = []
-                            vals = []
-                        names_row += [
-                            '{} [{}]'.format(ch.name, ch.unit)
-                            for ch in channels
-                        ]
-                        writer.writerow(names_row)
+                for i, grp in enumerate(self.groups):
+                    if self._terminate:
+                        return
+
+                    group_name = 'DataGroup_{}'.format(i + 1)
+                    group_parquet_name = '{}_{}.parquet'.format(name, group_name)
+
+                    writer = None
+                    try:
+                        blocks = self._iter_group_blocks(
+                            i,
+                            raster,
+                            time_from_zero,
+                            chunk_size,
+                        )
+                        for master, signals in blocks:
+                            if self._terminate:
+                                return
+
+                            if writer is None:
+                                included = [
+                                    bool(len(sig)) or empty_channels == 'zeros'
+                                    for sig in signals
+                                ]
+                                if master is not None:
+                                    signals_ = [master, ]
+                                else:
+                                    signals_ = []
+                                signals_ += [
+                                    sig
+                                    for sig, include in zip(signals, included)
+                                    if include
+                                ]
+
+                                names = []
+                                used_names = set()
+                                for sig in signals_:
+                                    if use_display_names:
+                                        channel_name = sig.display_name or sig.name
+                                    else:
+                                        channel_name = sig.name
+                                    channel_name = get_unique_name(
+                                        used_names,
+                                        channel_name,
+                                    )
+                                    used_names.add(channel_name)
+                                    names.append(channel_name)
+
+                            if master is not None:
+                                arrays = [_arrow_array(master.samples), ]
+                                cycles = len(master)
+                            else:
+                                arrays = []
+                                cycles = max(
+                                    [len(sig) for sig in signals] or [0]
+                                )
 
-                        vals += [ch.samples for ch in channels]
+                            for sig, include in zip(signals, included):
+                                if not include:
+                                    continue
+                                if len(sig):
+                                    samples = sig.samples
+                                else:
+                                    samples = np.zeros(cycles, dtype=sig.samples.dtype)
+                                arrays.append(_arrow_array(samples))
+
+                            if writer is None:
+                                schema = pa.schema([
+                                    pa.field(
+                                        channel_name,
+                                        array.type,
+                                        metadata=_arrow_field_metadata(sig),
+                                    )
+                                    for channel_name, sig, array in zip(
+                                        names,
+                                        signals_,
+                                        arrays,
+                                    )
+                                ])
+                                writer = pq.ParquetWriter(
+                                    group_parquet_name,
+                                    schema,
+                                )
 
-                        writer.writerows(zip(*vals))
+                            writer.write_table(
+                                pa.Table.from_arrays(arrays, schema=schema)
+                            )
+                    finally:
+                        if writer is not None:
+                            writer.close()
 
         elif fmt == 'mat':
             if format == '7.3':
@@ -1434,7 +2155,8 @@ class MDF(object):
         else:
             message = (
                 'Unsopported export type "{}". '
-                'Please select "csv", "excel", "hdf5", "mat" or "pandas"'
+                'Please select "csv", "excel", "hdf5", "mat", "pandas" or '
+                '"parquet"'
             )
             warn(message.format(fmt))
 
@@ -1688,7 +2410,12 @@ class MDF(object):
             )
 
     @staticmethod
-    def concatenate(files, outversion='4.10', memory='full', callback=None):
+    def concatenate(
+            files,
+            outversion='4.10',
+            memory='full',
+            callback=None,
+            processes=0):
         """ concatenates several files. The files
         must have the same internal structure (same number of groups, and same
         channels in each group)
@@ -1701,6 +2428,10 @@ class MDF(object):
             merged file version
         memory : str
             memory option; default *full*
+        processes : int
+            number of worker processes used to decode the files given by
+            name; the decoded fragments are still written in the files order.
+            0 or 1 decodes all the files in the calling process (default)
 
         Returns
         -------
@@ -1718,6 +2449,11 @@ class MDF(object):
         if callback:
             callback(0, 100)
 
+        file_names = [
+            None if isinstance(file, MDF) else file
+            for file in files
+        ]
+
         files = [
             file if isinstance(file, MDF) else MDF(file, memory)
             for file in files
@@ -1756,6 +2492,9 @@ class MDF(object):
 
         merged.header.start_time = oldest
 
+        groups_included_channels = []
+        read_sizes = []
+
         for i, groups in enumerate(zip(*(file.groups for file in files))):
 
             channels_nr = set(len(group['channels']) for group in groups)
@@ -1767,7 +2506,7 @@ class MDF(object):
                 raise MdfException(message.format(i))
 
             mdf = files[0]
-            included_channels = mdf._included_channels(i)
+            groups_included_channels.append(mdf._included_channels(i))
             channels_nr = len(groups[0]['channels'])
 
             if memory == 'minimum':
@@ -1775,10 +2514,12 @@ class MDF(object):
             else:
                 y_axis = MERGE_LOW
 
-            read_size = np.interp(
-                channels_nr,
-                CHANNEL_COUNT,
-                y_axis,
+            read_sizes.append(
+                int(np.interp(
+                    channels_nr,
+                    CHANNEL_COUNT,
+                    y_axis,
+                ))
             )
 
             group_channels = [group['channels'] for group in groups]
@@ -1812,19 +2553,7 @@ class MDF(object):
                                 )
                         else:
                             grp = file.groups[i]
-                            if grp['data_location'] == 0:
-                                stream = file._file
-                            else:
-                                stream = file._tempfile
-
-                            channel = ChannelV4(
-                                address=grp['channels'][j],
-                                stream=stream,
-                            )
-                            name = get_text_v4(
-                                channel['name_addr'],
-                                stream,
-                            )
+                            name = file._get_channel_catalog(grp).names[j]
                         name = name.split('\\')[0]
                         names.append(name)
                     names = set(names)
@@ -1837,109 +2566,432 @@ class MDF(object):
                     )
                     raise MdfException(message.format(i))
 
-            idx = 0
-            last_timestamp = None
-            for offset, group, mdf in zip(offsets, groups, files):
-                if read_size:
-                    mdf.configure(read_fragment_size=int(read_size))
+        # the last timestamp and the mean sampling interval of each merged
+        # group, used to shift the overlapping fragments
+        last_timestamps = [None] * groups_nr
+        deltas = [None] * groups_nr
 
-                parents, dtypes = mdf._prepare_record(group)
-                group['parents'], group['types'] = parents, dtypes
+        # the first file creates the merged groups
+        mdf, offset = files[0], offsets[0]
+        for i, group in enumerate(mdf.groups):
+            included_channels = groups_included_channels[i]
+            if read_sizes[i]:
+                mdf.configure(read_fragment_size=read_sizes[i])
 
-                data = mdf._load_group_data(group)
+            parents, dtypes = mdf._prepare_record(group)
+            group['parents'], group['types'] = parents, dtypes
 
-                for fragment in data:
-                    if dtypes.itemsize:
-                        group['record'] = np.core.records.fromstring(
-                            fragment[0],
-                            dtype=dtypes,
+            data = mdf._load_group_data(group)
+
+            raw = False
+            for idx, fragment in enumerate(data):
+                if raw:
+                    master = mdf.get_master(i, fragment)
+                    if offset:
+                        master = master + offset
+                    MDF._extend_concatenated(
+                        merged,
+                        i,
+                        master,
+                        fragment[0],
+                        last_timestamps,
+                        deltas,
+                        master_shifted=bool(offset),
+                    )
+                    continue
+
+                if dtypes.itemsize:
+                    group['record'] = np.core.records.fromstring(
+                        fragment[0],
+                        dtype=dtypes,
+                    )
+                else:
+                    group['record'] = None
+                if idx == 0:
+                    signals = []
+                    for j in included_channels:
+                        sig = mdf.get(
+                            group=i,
+                            index=j,
+                            data=fragment,
+                            raw=True,
                         )
-                    else:
-                        group['record'] = None
-                    if idx == 0:
-                        signals = []
-                        for j in included_channels:
-                            sig = mdf.get(
+
+                        if offset:
+                            sig.timestamps = sig.timestamps + offset
+
+                        if version < '4.00' and sig.samples.dtype.kind == 'S':
+                            string_dtypes = [np.dtype('S'), ]
+                            for tmp_mdf in files:
+                                strsig = tmp_mdf.get(
+                                    group=i,
+                                    index=j,
+                                    samples_only=True,
+                                )
+                                string_dtypes.append(strsig.dtype)
+                                del strsig
+
+                            sig.samples = sig.samples.astype(
+                                max(string_dtypes)
+                            )
+
+                            del string_dtypes
+
+                        if not sig.samples.flags.writeable:
+                            sig.samples = sig.samples.copy()
+                        signals.append(sig)
+
+                    if len(signals[0]):
+                        last_timestamps[i] = signals[0].timestamps[-1]
+                        deltas[i] = last_timestamps[i] / len(signals[0])
+
+                    merged.append(signals, common_timebase=True)
+
+                    # the next fragments are copied without decoding if the
+                    # merged group has the same records layout
+                    raw = MDF._raw_concatenate_compatible(
+                        mdf,
+                        merged,
+                        i,
+                        included_channels,
+                    )
+                else:
+                    master = mdf.get_master(i, fragment)
+                    if offset:
+                        master = master + offset
+                    MDF._extend_concatenated(
+                        merged,
+                        i,
+                        master,
+                        [
+                            mdf.get(
                                 group=i,
                                 index=j,
                                 data=fragment,
                                 raw=True,
+                                samples_only=True,
                             )
+                            for j in included_channels
+                        ],
+                        last_timestamps,
+                        deltas,
+                    )
 
-                            if offset:
-                                sig.timestamps = sig.timestamps + offset
+                del group['record']
 
-                            if version < '4.00' and sig.samples.dtype.kind == 'S':
-                                string_dtypes = [np.dtype('S'), ]
-                                for tmp_mdf in files:
-                                    strsig = tmp_mdf.get(
-                                        group=i,
-                                        index=j,
-                                        samples_only=True,
-                                    )
-                                    string_dtypes.append(strsig.dtype)
-                                    del strsig
+            if MDF._terminate:
+                return
 
-                                sig.samples = sig.samples.astype(
-                                    max(string_dtypes)
-                                )
+        if callback:
+            callback(1, len(files))
+
+        # the other files are decoded in the worker processes if they were
+        # given by name. Each file is decoded by a single worker that opens
+        # it once and sends the decoded groups back one by one, and the
+        # groups extend the merged groups in the files order
+        if processes and processes > 1:
+            pool = Pool(processes)
+            manager = Manager()
+        else:
+            pool = manager = None
+
+        def decode(k):
+            raw_groups = set(
+                index
+                for index in range(groups_nr)
+                if MDF._raw_concatenate_compatible(
+                    files[k],
+                    merged,
+                    index,
+                    groups_included_channels[index],
+                )
+            )
+            if (pool is not None
+                    and file_names[k] is not None
+                    and len(raw_groups) < groups_nr):
+                queue = manager.Queue(1)
+                result = pool.apply_async(
+                    _decode_concatenated_file,
+                    ((
+                        file_names[k],
+                        memory,
+                        groups_included_channels,
+                        read_sizes,
+                        offsets[k],
+                        raw_groups,
+                        queue,
+                    ), ),
+                )
+                return _iter_queued_fragments(queue, result, groups_nr)
+            else:
+                return MDF._iter_concatenated_fragments(
+                    files[k],
+                    groups_included_channels,
+                    read_sizes,
+                    offsets[k],
+                    raw_groups=raw_groups,
+                )
 
-                                del string_dtypes
+        try:
+            # all the files are submitted at once; the workers block on their
+            # queues so only *processes* files are decoded ahead
+            decoded = [decode(k) for k in range(1, len(files))]
+
+            for k, fragments in enumerate(decoded, 1):
+                for i, master, samples in fragments:
+                    MDF._extend_concatenated(
+                        merged,
+                        i,
+                        master,
+                        samples,
+                        last_timestamps,
+                        deltas,
+                        master_shifted=bool(offsets[k]),
+                    )
 
-                            if not sig.samples.flags.writeable:
-                                sig.samples = sig.samples.copy()
-                            signals.append(sig)
+                    if MDF._terminate:
+                        return
+                decoded[k - 1] = fragments = None
 
-                        if len(signals[0]):
-                            last_timestamp = signals[0].timestamps[-1]
-                            delta = last_timestamp / len(signals[0])
+                if callback:
+                    callback(k + 1, len(files))
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+                manager.shutdown()
 
-                        merged.append(signals, common_timebase=True)
-                        idx += 1
-                    else:
-                        master = mdf.get_master(i, fragment)
-                        if offset:
-                            master = master + offset
-                        if len(master):
-                            if last_timestamp is None:
-                                last_timestamp = master[-1]
-                                delta = last_timestamp / len(master)
-                            else:
-                                if last_timestamp >= master[0]:
-                                    master += last_timestamp + delta - master[0]
-                                last_timestamp = master[-1]
+        for file in files:
+            merged._transfer_events(file)
 
-                            signals = [master, ]
+        return merged
 
-                            for j in included_channels:
-                                signals.append(
-                                    mdf.get(
-                                        group=i,
-                                        index=j,
-                                        data=fragment,
-                                        raw=True,
-                                        samples_only=True,
-                                    )
-                                )
+    @staticmethod
+    def _iter_concatenated_fragments(
+            mdf,
+            groups_included_channels,
+            read_sizes,
+            offset,
+            raw_groups=(),
+            groups=None):
+        """ decode the raw samples of the fragments of the groups of a file
+        that is concatenated. The fragments of the *raw_groups* are not
+        decoded and their raw records are returned instead of the samples
 
-                            merged.extend(i, signals)
-                        idx += 1
+        Parameters
+        ----------
+        mdf : MDF
+            input file
+        groups_included_channels : list
+            included channels indexes for each group
+        read_sizes : list
+            read fragment size for each group
+        offset : float
+            timestamps offset of the file
+        raw_groups : set
+            indexes of the groups that have the same records layout as the
+            merged groups
+        groups : set
+            indexes of the groups that are decoded; default *None* decodes all
+            the groups
 
-                    del group['record']
+        Returns
+        -------
+        fragments : generator
+            (group index, master, raw samples list or raw records bytes) for
+            each fragment
 
-            if callback:
-                callback(i+1, groups_nr)
+        """
+        for i, group in enumerate(mdf.groups):
+            if groups is not None and i not in groups:
+                continue
+            included_channels = groups_included_channels[i]
+            if read_sizes[i]:
+                mdf.configure(read_fragment_size=read_sizes[i])
+
+            parents, dtypes = mdf._prepare_record(group)
+            group['parents'], group['types'] = parents, dtypes
 
-            if MDF._terminate:
-                return
+            for fragment in mdf._load_group_data(group):
+                if i in raw_groups:
+                    master = mdf.get_master(i, fragment)
+                    if offset:
+                        master = master + offset
+                    yield i, master, fragment[0]
+                    continue
 
-        for file in files:
-            merged._transfer_events(file)
+                if dtypes.itemsize:
+                    group['record'] = np.core.records.fromstring(
+                        fragment[0],
+                        dtype=dtypes,
+                    )
+                else:
+                    group['record'] = None
 
-        return merged
+                master = mdf.get_master(i, fragment)
+                if offset:
+                    master = master + offset
+
+                samples = [
+                    mdf.get(
+                        group=i,
+                        index=j,
+                        data=fragment,
+                        raw=True,
+                        samples_only=True,
+                    )
+                    for j in included_channels
+                ]
+
+                del group['record']
+
+                yield i, master, samples
+
+    @staticmethod
+    def _extend_concatenated(
+            merged,
+            index,
+            master,
+            samples,
+            last_timestamps,
+            deltas,
+            master_shifted=False):
+        """ extend a merged group with a fragment; the fragment timestamps
+        are shifted after the last merged timestamp if they overlap. The raw
+        records of the layout compatible groups are appended as they are,
+        and their master channel is rewritten only if the timestamps are
+        shifted
+
+        Parameters
+        ----------
+        merged : MDF
+            concatenated file
+        index : int
+            group index
+        master : numpy.array
+            fragment timestamps
+        samples : list | bytes
+            fragment raw samples or raw records
+        last_timestamps : list
+            last merged timestamp of each group; updated in place
+        deltas : list
+            mean sampling interval of each group; updated in place
+        master_shifted : bool
+            the master differs from the master stored in the raw records
+
+        """
+        if not len(master):
+            return
+
+        last_timestamp = last_timestamps[index]
+        if last_timestamp is None:
+            deltas[index] = master[-1] / len(master)
+        elif last_timestamp >= master[0]:
+            master = master + (last_timestamp + deltas[index] - master[0])
+            master_shifted = True
+        last_timestamps[index] = master[-1]
+
+        if isinstance(samples, list):
+            merged.extend(index, [master, ] + samples)
+        else:
+            if master_shifted:
+                group = merged.groups[index]
+                parents, dtypes = merged._prepare_record(group)
+                master_field = parents[merged.masters_db[index]][0]
+                records = np.frombuffer(samples, dtype=dtypes).copy()
+                records[master_field] = master
+                samples = records.tostring()
+            elif not isinstance(samples, bytes):
+                samples = bytes(samples)
+            merged._append_raw_records(index, samples, update_limits=True)
 
     @staticmethod
-    def merge(files, outversion='4.10', memory='full', callback=None):
+    def _raw_concatenate_compatible(mdf, merged, index, included_channels):
+        """ check if the raw records of a group can be copied to the merged
+        group without decoding: both files are version 4, the groups have the
+        same channels layout and record size, no channel dependencies, no
+        signal data blocks and the input master channel has no conversion
+
+        Parameters
+        ----------
+        mdf : MDF
+            input file
+        merged : MDF
+            concatenated file
+        index : int
+            group index
+        included_channels : set
+            indexes of the input channels that were appended to the merged
+            group
+
+        Returns
+        -------
+        compatible : bool
+
+        """
+        if mdf.version < '4.00' or merged.version < '4.00':
+            return False
+
+        group = mdf.groups[index]
+        merged_group = merged.groups[index]
+
+        if group['data_group']['record_id_len']:
+            return False
+        for key in ('samples_byte_nr', 'invalidation_bytes_nr'):
+            if group['channel_group'][key] != merged_group['channel_group'][key]:
+                return False
+        if (any(group['channel_dependencies'])
+                or any(merged_group['channel_dependencies'])):
+            return False
+
+        master_index = mdf.masters_db.get(index)
+        merged_master_index = merged.masters_db.get(index)
+        if master_index is None or merged_master_index is None:
+            return False
+
+        indexes = [master_index, ] + list(included_channels)
+        merged_indexes = [merged_master_index, ] + [
+            i
+            for i in range(len(merged_group['channels']))
+            if i != merged_master_index
+        ]
+        if (len(indexes) != len(group['channels'])
+                or len(merged_indexes) != len(indexes)):
+            return False
+
+        fields = mdf._get_channel_catalog(group).fields[indexes]
+        merged_fields = merged._get_channel_catalog(merged_group).fields[merged_indexes]
+
+        if fields['data_block_addr'].any() or merged_fields['data_block_addr'].any():
+            return False
+
+        invalidation_flags = (
+            v4c.FLAG_INVALIDATION_BIT_VALID | v4c.FLAG_ALL_SAMPLES_VALID
+        )
+        if not np.array_equal(
+                fields['flags'] & invalidation_flags,
+                merged_fields['flags'] & invalidation_flags):
+            return False
+        for name in (
+                'byte_offset',
+                'bit_offset',
+                'bit_count',
+                'data_type',
+                'channel_type',
+                'pos_invalidation_bit'):
+            if not np.array_equal(fields[name], merged_fields[name]):
+                return False
+
+        master = mdf.get_channel_metadata(group=index, index=master_index)
+        return master.conversion is None
+
+    @staticmethod
+    def merge(
+            files,
+            outversion='4.10',
+            memory='full',
+            callback=None,
+            processes=0):
         """ concatenates several files. The files
         must have the same internal structure (same number of groups, and same
         channels in each group)
@@ -1952,6 +3004,9 @@ class MDF(object):
             merged file version
         memory : str
             memory option; default *full*
+        processes : int
+            number of worker processes used to decode the files given by
+            name; default 0
 
         Returns
         -------
@@ -1963,7 +3018,13 @@ class MDF(object):
         MdfException : if there are inconsistencies between the files
 
         """
-        return MDF.concatenate(files, outversion, memory, callback)
+        return MDF.concatenate(
+            files,
+            outversion,
+            memory,
+            callback,
+            processes,
+        )
 
     @staticmethod
     def stack(files, outversion='4.10', memory='full', sync=True, callback=None):
@@ -2394,40 +3455,12 @@ class MDF(object):
 
         signal_parts = {}
         for group in gps:
-            grp = self.groups[group]
-            data = self._load_group_data(grp)
-            parents, dtypes = self._prepare_record(grp)
-            grp['parents'], grp['types'] = parents, dtypes
+            group_indexes = sorted(gps[group])
+            group_signals = self.get_many(group, group_indexes)
+            for index, signal in zip(group_indexes, group_signals):
+                signal_parts[(group, index)] = signal
 
-            for fragment in data:
-                if dtypes.itemsize:
-                    grp['record'] = np.core.records.fromstring(
-                        fragment[0],
-                        dtype=dtypes,
-                    )
-                else:
-                    grp['record'] = None
-                for index in gps[group]:
-                    signal = self.get(group=group, index=index, data=fragment)
-                    if (group, index) not in signal_parts:
-                        signal_parts[(group, index)] = [signal, ]
-                    else:
-                        signal_parts[(group, index)].append(signal)
-                del grp['record']
-
-        signals = []
-        for pair in indexes:
-            parts = signal_parts[pair]
-            signal = Signal(
-                np.concatenate([part.samples for part in parts]),
-                np.concatenate([part.timestamps for part in parts]),
-                unit=parts[0].unit,
-                name=parts[0].name,
-                comment=parts[0].comment,
-                raw=parts[0].raw,
-                conversion=parts[0].conversion,
-            )
-            signals.append(signal)
+        signals = [signal_parts[pair] for pair in indexes]
 
         if dataframe:
             times = [s.timestamps for s in signals]
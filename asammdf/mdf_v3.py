@@ -8,11 +8,11 @@ import sys
 import time
 import warnings
 import xml.etree.ElementTree as ET
-from collections import defaultdict
 from copy import deepcopy
 from functools import reduce
 from itertools import product
 from math import ceil
+from mmap import mmap, ACCESS_READ
 from struct import unpack
 from tempfile import TemporaryFile
 
@@ -43,15 +43,24 @@ from .utils import (
     CHANNEL_COUNT,
     CONVERT_LOW,
     CONVERT_MINIMUM,
+    LRUCache,
     MdfException,
     SignalSource,
     as_non_byte_sized_signed_int,
+    extract_bit_field,
     fix_dtype_fields,
     fmt_to_datatype_v3,
     get_fmt_v3,
+    get_data_reader,
     get_min_max,
+    get_record_offsets,
+    get_records,
+    get_time_index,
+    get_time_range,
     get_unique_name,
     get_text_v3,
+    iter_blocks_range,
+    load_group_data_range,
     validate_memory_argument,
     validate_version_argument,
     count_channel_groups,
@@ -81,6 +90,28 @@ if PYVERSION == 2:
 __all__ = ['MDF3', ]
 
 
+def _get_trailing_id_nr(record_id_nr):
+    """ size in bytes of the record id repeated after each record of an
+    unsorted data group; the *record_id_nr* values above 2 are not valid and
+    are read as a single leading record id
+
+    Parameters
+    ----------
+    record_id_nr : int
+        data group *record_id_nr* field
+
+    Returns
+    -------
+    trailing_id_nr : int
+        trailing record id size (0 or 1)
+
+    """
+    if record_id_nr <= 2:
+        return max(record_id_nr - 1, 0)
+    else:
+        return 0
+
+
 def write_cc(conversion, defined_texts, blocks=None, address=None, stream=None):
     if conversion:
         if stream:
@@ -181,18 +212,22 @@ class MDF3(object):
         self.masters_db = {}
         self.version = version
 
-        self._master_channel_cache = {}
+        self._cache = LRUCache()
+        self._master_channel_cache = self._cache.namespace('master')
+        self._record_cache = self._cache.namespace('record')
         self._master_channel_metadata = {}
 
         # used for appending to MDF created with memory=False
         self._tempfile = TemporaryFile()
         self._tempfile.write(b'\0')
         self._file = None
+        self._mmap = None
 
         self._read_fragment_size = 0
         self._write_fragment_size = 8 * 2 ** 20
         self._use_display_names = False
         self._single_bit_uint_as_bool = False
+        self._use_memory_map = False
 
         self._callback = callback
 
@@ -220,6 +255,8 @@ class MDF3(object):
             else:
                 stream = self._tempfile
 
+            read = self._get_data_reader(stream)
+
             # go to the first data block of the current data group
             if group['sorted']:
                 samples_size = channel_group['samples_byte_nr']
@@ -263,16 +300,16 @@ class MDF3(object):
                         current_address = address
                     except StopIteration:
                         break
-                    stream.seek(address)
 
                     while size >= split_size - cur_size:
-                        stream.seek(current_address)
                         if data:
-                            data.append(stream.read(split_size - cur_size))
+                            data.append(
+                                read(current_address, split_size - cur_size)
+                            )
                             yield b''.join(data), offset
                             current_address += split_size - cur_size
                         else:
-                            yield stream.read(split_size), offset
+                            yield read(current_address, split_size), offset
                             current_address += split_size
                         offset += split_size
 
@@ -281,10 +318,8 @@ class MDF3(object):
                         cur_size = 0
 
                     if size:
-                        stream.seek(current_address)
-                        data.append(stream.read(size))
+                        data.append(read(current_address, size))
                         cur_size += size
-                        offset += size
 
                 if data:
                     yield b''.join(data), offset
@@ -293,14 +328,11 @@ class MDF3(object):
 
             else:
                 record_id = group['channel_group']['record_id']
-                if PYVERSION == 2:
-                    record_id = chr(record_id)
                 cg_size = group['record_size']
-                if group['data_group']['record_id_nr'] <= 2:
-                    record_id_nr = group['data_group']['record_id_nr']
-                else:
-                    record_id_nr = 0
-                cg_data = []
+                record_offsets = group['record_offsets']
+                trailing_id_nr = _get_trailing_id_nr(
+                    group['data_group']['record_id_nr']
+                )
 
                 blocks = zip(
                     group['data_block_addr'],
@@ -311,28 +343,153 @@ class MDF3(object):
 
                 for address, size in blocks:
 
-                    stream.seek(address)
-                    data = stream.read(size)
+                    data = read(address, size)
 
-                    i = 0
-                    while i < size:
-                        rec_id = data[i]
-                        # skip record id
-                        i += 1
-                        rec_size = cg_size[rec_id]
-                        if rec_id == record_id:
-                            rec_data = data[i: i + rec_size]
-                            cg_data.append(rec_data)
-                        # consider the second record ID if it exists
-                        if record_id_nr == 2:
-                            i += rec_size + 1
-                        else:
-                            i += rec_size
-                    cg_data = b''.join(cg_data)
+                    # the offsets of the current block are shared by all the
+                    # channel groups of the data group; only one block is
+                    # kept to bound the memory
+                    if address in record_offsets:
+                        offsets = record_offsets[address]
+                    else:
+                        offsets = get_record_offsets(
+                            data,
+                            1,
+                            cg_size,
+                            trailing_id_nr=trailing_id_nr,
+                        )
+                        record_offsets.clear()
+                        record_offsets[address] = offsets
+
+                    cg_data = get_records(
+                        data,
+                        offsets[record_id],
+                        cg_size[record_id],
+                    )
                     size = len(cg_data)
                     yield cg_data, offset
                     offset += size
 
+    def _get_data_reader(self, stream):
+        """ get the function used to read raw bytes from the stream; if the
+        memory map is enabled the original file data is returned as
+        *memoryview* slices of the mapping
+
+        Parameters
+        ----------
+        stream : file handle
+            original file or temporary file
+
+        Returns
+        -------
+        read : callable
+            function that takes the address and the size as arguments
+
+        """
+        if stream is self._file and self._use_memory_map:
+            mapped = self._get_memory_map()
+        else:
+            mapped = None
+
+        return get_data_reader(stream, mapped)
+
+    def _read_group_bytes(self, group, start, stop):
+        """ read a range of the group's records bytes; only the data blocks
+        that overlap the range are read
+
+        Parameters
+        ----------
+        group : dict
+            sorted MDF group dict
+        start : int
+            start byte offset
+        stop : int
+            stop byte offset (not included)
+
+        Returns
+        -------
+        data : bytes
+            records bytes
+
+        """
+        if self.memory == 'full':
+            return group['data_block']['data'][start: stop]
+
+        if group['data_location'] == v23c.LOCATION_ORIGINAL_FILE:
+            stream = self._file
+        else:
+            stream = self._tempfile
+        read = self._get_data_reader(stream)
+
+        blocks = zip(
+            group['data_block_addr'],
+            group['data_block_size'],
+        )
+        data = [
+            read(address + first, last - first)
+            for (address, _), first, last in iter_blocks_range(blocks, start, stop)
+        ]
+
+        if PYVERSION == 2:
+            data = [str(block) for block in data]
+        return b''.join(data)
+
+    def _get_time_index(self, index):
+        """ get the time range index of the group; the index maps each data
+        fragment to its first record and to its first and last master values.
+        The index is computed from the master channel on the first request
+
+        Parameters
+        ----------
+        index : int
+            group index
+
+        Returns
+        -------
+        time_index : dict | None
+            *records*, *first* and *last* arrays and the total *cycles_nr*;
+            *None* if the group is not sorted or if the master channel is not
+            monotonic
+
+        """
+        group = self.groups[index]
+        try:
+            return group['time_index']
+        except KeyError:
+            pass
+
+        record_size = group['channel_group']['samples_byte_nr']
+        time_index = get_time_index(self, index, record_size)
+
+        group['time_index'] = time_index
+
+        return time_index
+
+    def _load_group_data_range(self, index, start=None, stop=None):
+        """ get group's data fragments that overlap the [*start*, *stop*]
+        time interval. If the time range index can be used only the data
+        blocks that overlap the interval are read, otherwise all the group's
+        fragments are returned
+
+        Parameters
+        ----------
+        index : int
+            group index
+        start : float
+            start timestamp; default *None*
+        stop : float
+            stop timestamp; default *None*
+
+        Returns
+        -------
+        fragments : generator
+            (bytes, offset) data fragments
+
+        """
+        group = self.groups[index]
+        record_size = group['channel_group']['samples_byte_nr']
+
+        return load_group_data_range(self, index, record_size, start, stop)
+
     def _prepare_record(self, group):
         """ compute record dtype and parents dict for this group
 
@@ -479,6 +636,51 @@ class MDF3(object):
 
         return parents, dtype(types)
 
+    def _get_record(self, group_index, fragment):
+        """ get the records array of a data fragment. The records are
+        cached for the *full* memory option, or for all the memory options
+        if a cache memory budget is configured
+
+        Parameters
+        ----------
+        group_index : int
+            group index
+        fragment : (bytes, int)
+            (fragment bytes, fragment offset)
+
+        Returns
+        -------
+        record : numpy.recarray
+            read only records array; *None* if the records have no fields
+
+        """
+        group = self.groups[group_index]
+
+        # records set by the caller for the current fragment
+        not_found = object()
+        record = group.get('record', not_found)
+        if record is not not_found:
+            return record
+
+        data_bytes, offset = fragment
+        key = group_index, offset, len(data_bytes)
+        try:
+            return self._record_cache[key]
+        except KeyError:
+            pass
+
+        dtypes = group['types']
+        if dtypes.itemsize:
+            record = fromstring(data_bytes, dtype=dtypes)
+            record.setflags(write=False)
+        else:
+            record = None
+
+        if self.memory == 'full' or self._cache.max_bytes is not None:
+            self._record_cache[key] = record
+
+        return record
+
     def _get_not_byte_aligned_data(self, data, group, ch_nr):
 
         big_endian_types = (
@@ -514,6 +716,23 @@ class MDF3(object):
         else:
             byte_count >>= 3
 
+        data_type = channel['data_type']
+        if data_type in v23c.INT_TYPES:
+            vals = extract_bit_field(
+                data,
+                record_size,
+                byte_offset,
+                bit_offset,
+                bit_count,
+                big_endian=data_type in big_endian_types,
+                signed=data_type in v23c.SIGNED_INT,
+            )
+            if vals is not None:
+                fmt = dtype(get_fmt_v3(data_type, bit_count))
+                if vals.dtype != fmt.newbyteorder('='):
+                    vals = vals.astype(fmt)
+                return vals
+
         types = [
             ('', 'a{}'.format(byte_offset)),
             ('vals', '({},)u1'.format(byte_count)),
@@ -963,11 +1182,12 @@ class MDF3(object):
 
             cg_size = {}
             total_size = 0
+            # record offsets of the last scanned unsorted data block, shared
+            # by all the channel groups of the data group
+            record_offsets = {}
 
             for grp in new_groups:
                 record_id = grp['channel_group']['record_id']
-                if PYVERSION == 2:
-                    record_id = chr(record_id)
                 cycles_nr = grp['channel_group']['cycles_nr']
                 record_size = grp['channel_group']['samples_byte_nr']
 
@@ -977,6 +1197,7 @@ class MDF3(object):
                 total_size += record_size * cycles_nr
 
                 grp['record_size'] = cg_size
+                grp['record_offsets'] = record_offsets
                 grp['size'] = total_size
 
             if memory == 'full':
@@ -994,28 +1215,26 @@ class MDF3(object):
 
                 else:
                     # agregate data for each record ID in the cg_data dict
-                    cg_data = defaultdict(list)
-                    i = 0
-                    size = len(data)
-                    while i < size:
-                        rec_id = data[i]
-                        # skip record id
-                        i += 1
-                        rec_size = cg_size[rec_id]
-                        rec_data = data[i: i + rec_size]
-                        cg_data[rec_id].append(rec_data)
-                        # possibly skip 2nd record id
-                        if record_id_nr == 2:
-                            i += rec_size + 1
-                        else:
-                            i += rec_size
+                    offsets = get_record_offsets(
+                        data,
+                        1,
+                        cg_size,
+                        trailing_id_nr=_get_trailing_id_nr(record_id_nr),
+                    )
+                    cg_data = {
+                        record_id: get_records(
+                            data,
+                            offsets[record_id],
+                            cg_size[record_id],
+                        )
+                        for record_id in cg_size
+                    }
+                    del data, offsets
+
                     for grp in new_groups:
                         grp['data_location'] = v23c.LOCATION_MEMORY
                         record_id = grp['channel_group']['record_id']
-                        if PYVERSION == 2:
-                            record_id = chr(record_id)
-                        data = cg_data[record_id]
-                        data = b''.join(data)
+                        data = cg_data.pop(record_id)
                         grp['channel_group']['record_id'] = 1
                         grp['data_block'] = DataBlock(data=data)
             else:
@@ -1047,7 +1266,9 @@ class MDF3(object):
             read_fragment_size=None,
             write_fragment_size=None,
             use_display_names=None,
-            single_bit_uint_as_bool=None):
+            single_bit_uint_as_bool=None,
+            use_memory_map=None,
+            cache_bytes=None):
         """ configure read and write fragment size for chuncked
         data access
 
@@ -1064,6 +1285,15 @@ class MDF3(object):
         use_display_names : bool
             use display name if available for the Signal's name returned by the
             get method
+        use_memory_map : bool
+            map the original file in memory and serve the data fragments as
+            zero-copy *memoryview* slices of the mapping; only used for *low*
+            and *minimum* memory options
+        cache_bytes : int
+            memory budget in bytes shared by the master channel and records
+            caches; the least recently used items are evicted when the budget
+            is exceeded. 0 removes the budget (default). With a budget the
+            records are also cached for the *low* and *minimum* memory options
 
         """
 
@@ -1079,6 +1309,45 @@ class MDF3(object):
         if single_bit_uint_as_bool is not None:
             self._single_bit_uint_as_bool = bool(single_bit_uint_as_bool)
 
+        if use_memory_map is not None:
+            self._use_memory_map = bool(use_memory_map)
+            if not self._use_memory_map:
+                self._close_memory_map()
+
+        if cache_bytes is not None:
+            cache_bytes = max(int(cache_bytes), 0)
+            self._cache.configure(cache_bytes or None)
+
+    def cache_info(self):
+        """ get the usage counters of the master channel and records caches
+
+        Returns
+        -------
+        info : dict
+            cache *hits*, *misses* and *evictions* counters, number of cached
+            *items*, their total *size* in bytes and the *max_bytes* budget
+
+        """
+        return self._cache.info()
+
+    def _get_memory_map(self):
+        """ get the read-only memory map of the original file; the map is
+        created on the first request """
+        if self._mmap is None:
+            self._mmap = mmap(self._file.fileno(), 0, access=ACCESS_READ)
+        return self._mmap
+
+    def _close_memory_map(self):
+        """ release the memory map of the original file """
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # there are still arrays that use the mapped memory; the map
+                # will be released when they are garbage collected
+                pass
+            self._mmap = None
+
     def add_trigger(self,
                     group,
                     timestamp,
@@ -2571,6 +2840,7 @@ class MDF3(object):
         object is not used anymore to clean-up the temporary file
 
         """
+        self._close_memory_map()
         if self._tempfile is not None:
             self._tempfile.close()
         if self._file is not None:
@@ -2763,6 +3033,10 @@ class MDF3(object):
                 stream.write(samples)
                 gp['channel_group']['cycles_nr'] += cycles_nr
 
+        # the cached master channel samples and records of the extended
+        # group are outdated
+        self._cache.clear()
+
     def get_channel_name(self, group, index):
         """Gets channel name.
 
@@ -3011,7 +3285,9 @@ class MDF3(object):
             raster=None,
             samples_only=False,
             data=None,
-            raw=False):
+            raw=False,
+            start=None,
+            stop=None):
         """Gets channel samples.
         Channel can be specified in two ways:
 
@@ -3049,6 +3325,13 @@ class MDF3(object):
         raw : bool
             return channel samples without appling the conversion rule; default
             `False`
+        start : float
+            only return the samples with timestamps greater or equal to
+            *start*; for sorted groups only the data blocks that overlap the
+            time interval are read; default *None*
+        stop : float
+            only return the samples with timestamps less or equal to *stop*;
+            default *None*
 
 
         Returns
@@ -3133,9 +3416,20 @@ class MDF3(object):
             index,
         )
 
+        if data is None and (start is not None or stop is not None):
+            return get_time_range(
+                self,
+                gp_nr,
+                ch_nr,
+                start,
+                stop,
+                raster=raster,
+                samples_only=samples_only,
+                raw=raw,
+            )
+
         original_data = data
 
-        memory = self.memory
         grp = self.groups[gp_nr]
 
         if grp['data_location'] == v23c.LOCATION_ORIGINAL_FILE:
@@ -3143,41 +3437,13 @@ class MDF3(object):
         else:
             stream = self._tempfile
 
-        channel = grp['channels'][ch_nr]
-        conversion = grp['channel_conversions'][ch_nr]
-
-        if memory != 'minimum':
-            channel = grp['channels'][ch_nr]
-            conversion = grp['channel_conversions'][ch_nr]
-            name = channel.name
-            display_name = channel.display_name
-        else:
-            channel = Channel(
-                address=grp['channels'][ch_nr],
-                stream=stream,
-            )
-            addr = grp['channel_conversions'][ch_nr]
-            if addr:
-                conversion = ChannelConversion(
-                    address=addr,
-                    stream=stream,
-                )
-            else:
-                conversion = None
-            if name is None:
-                if channel.get('long_name_addr', 0):
-                    name = get_text_v3(channel['long_name_addr'], stream)
-                else:
-                    name = (
-                        channel['short_name']
-                        .decode('latin-1')
-                        .strip(' \n\t\0')
-                    )
-            channel.name = name
-            if channel.get('display_name_addr', 0):
-                display_name = get_text_v3(channel['display_name_addr'], stream)
-            else:
-                display_name = ''
+        channel, conversion, display_name = self._get_channel(
+            grp,
+            ch_nr,
+            stream,
+            name,
+        )
+        name = channel.name
 
         bit_count = channel['bit_count'] or 64
 
@@ -3251,10 +3517,10 @@ class MDF3(object):
             for fragment in data:
                 data_bytes, _ = fragment
                 try:
-                    parents, dtypes = grp['parents'], grp['types']
+                    parents = grp['parents']
                 except KeyError:
                     grp['parents'], grp['types'] = self._prepare_record(grp)
-                    parents, dtypes = grp['parents'], grp['types']
+                    parents = grp['parents']
 
                 try:
                     parent, bit_offset = parents[ch_nr]
@@ -3264,18 +3530,7 @@ class MDF3(object):
                 bits = channel['bit_count']
 
                 if parent is not None:
-                    if 'record' not in grp:
-                        if dtypes.itemsize:
-                            record = fromstring(data_bytes, dtype=dtypes)
-                        else:
-                            record = None
-
-                        if memory == 'full':
-                            grp['record'] = record
-                    else:
-                        record = grp['record']
-
-                    record.setflags(write=False)
+                    record = self._get_record(gp_nr, fragment)
 
                     vals = record[parent]
                     data_type = channel['data_type']
@@ -3378,89 +3633,357 @@ class MDF3(object):
         if samples_only:
             res = vals
         else:
-            if conversion:
-                unit = conversion['unit'].decode('latin-1').strip(' \n\r\t\0')
-            else:
-                unit = ''
+            res = Signal(
+                samples=vals,
+                timestamps=timestamps,
+                name=channel.name,
+                conversion=conversion,
+                raw=raw,
+                bit_count=bit_count,
+                **self._get_signal_metadata(
+                    gp_nr,
+                    ch_nr,
+                    channel,
+                    conversion,
+                    display_name,
+                )
+            )
 
-            if memory == 'minimum':
-                comment = ''
-                if channel['comment_addr']:
-                    comment = get_text_v3(channel['comment_addr'], stream)
-            else:
-                comment = channel.comment
-            description = (
-                channel['description']
-                .decode('latin-1')
-                .strip(' \t\n\0')
+        return res
+
+    def _get_channel(self, group, index, stream, name=None):
+        """ get the channel object, the channel conversion and the display
+        name; for the *minimum* memory option the blocks are read from the
+        file
+
+        Parameters
+        ----------
+        group : dict
+            MDF group dict
+        index : int
+            channel index
+        stream : file handle
+            stream of the group blocks
+        name : str
+            channel name for the *minimum* memory option; if *None* the name
+            is read from the file
+
+        Returns
+        -------
+        channel, conversion, display_name : Channel, ChannelConversion, str
+            channel object, channel conversion and display name
+
+        """
+        if self.memory != 'minimum':
+            channel = group['channels'][index]
+            conversion = group['channel_conversions'][index]
+            display_name = channel.display_name
+        else:
+            channel = Channel(
+                address=group['channels'][index],
+                stream=stream,
             )
-            if comment:
-                comment = '{}\n{}'.format(comment, description)
+            addr = group['channel_conversions'][index]
+            if addr:
+                conversion = ChannelConversion(
+                    address=addr,
+                    stream=stream,
+                )
             else:
-                comment = description
-
-            if memory == 'minimum':
-                addr = grp['channel_extensions'][ch_nr]
-                if addr:
-                    source = ChannelExtension(
-                        address=addr,
-                        stream=stream,
-                    )
+                conversion = None
+            if name is None:
+                if channel.get('long_name_addr', 0):
+                    name = get_text_v3(channel['long_name_addr'], stream)
                 else:
-                    source = None
-            else:
-                source = grp['channel_extensions'][ch_nr]
-
-            if source:
-                if source['type'] == v23c.SOURCE_ECU:
-                    source = SignalSource(
-                        source.name,
-                        source.path,
-                        source.comment,
-                        0, # source type other
-                        0, # bus type none
+                    name = (
+                        channel['short_name']
+                        .decode('latin-1')
+                        .strip(' \n\t\0')
                     )
+            channel.name = name
+            if channel.get('display_name_addr', 0):
+                display_name = get_text_v3(channel['display_name_addr'], stream)
+            else:
+                display_name = ''
+
+        return channel, conversion, display_name
+
+    def _get_signal_metadata(self, index, ch_nr, channel, conversion, display_name):
+        """ get the *Signal* keyword arguments that describe the channel
+
+        Parameters
+        ----------
+        index : int
+            group index
+        ch_nr : int
+            channel index
+        channel : Channel
+            channel object
+        conversion : ChannelConversion
+            channel conversion
+        display_name : str
+            channel display name
+
+        Returns
+        -------
+        metadata : dict
+            unit, comment, source, master metadata and display name of the
+            channel
+
+        """
+        grp = self.groups[index]
+        if grp['data_location'] == v23c.LOCATION_ORIGINAL_FILE:
+            stream = self._file
+        else:
+            stream = self._tempfile
+
+        if conversion:
+            unit = conversion['unit'].decode('latin-1').strip(' \n\r\t\0')
+        else:
+            unit = ''
+
+        if self.memory == 'minimum':
+            comment = ''
+            if channel['comment_addr']:
+                comment = get_text_v3(channel['comment_addr'], stream)
+        else:
+            comment = channel.comment
+        description = (
+            channel['description']
+            .decode('latin-1')
+            .strip(' \t\n\0')
+        )
+        if comment:
+            comment = '{}\n{}'.format(comment, description)
+        else:
+            comment = description
+
+        if self.memory == 'minimum':
+            addr = grp['channel_extensions'][ch_nr]
+            if addr:
+                source = ChannelExtension(
+                    address=addr,
+                    stream=stream,
+                )
+            else:
+                source = None
+        else:
+            source = grp['channel_extensions'][ch_nr]
+
+        if source:
+            if source['type'] == v23c.SOURCE_ECU:
+                source = SignalSource(
+                    source.name,
+                    source.path,
+                    source.comment,
+                    0, # source type other
+                    0, # bus type none
+                )
+            else:
+                source = SignalSource(
+                    source.name,
+                    source.path,
+                    source.comment,
+                    2,  # source type bus
+                    2,  # bus type CAN
+                )
+
+        if display_name and not comment.startswith('<CNcomment'):
+            CNcomment = ET.Element('CNcomment')
+
+            tx = ET.Element('TX')
+            tx.text = comment
+            CNcomment.append(tx)
+
+            display = ET.Element('display')
+            display.text = display_name
+            names = ET.Element('names')
+            names.append(display)
+            CNcomment.append(names)
+
+            comment = ET.tostring(CNcomment).decode('utf-8')
+
+        return {
+            'unit': unit,
+            'comment': comment,
+            'source': source,
+            'master_metadata': self._master_channel_metadata.get(index, None),
+            'display_name': display_name,
+        }
+
+    def get_many(self, group, indexes, raw=False):
+        """ get several channels from the same group. The group data is read
+        only once and each data fragment is parsed in a single record array
+        that is shared by all the requested channels. The master channel is
+        also extracted only once for each fragment.
+
+        Parameters
+        ----------
+        group : int
+            0-based group index
+        indexes : iterable
+            0-based channel indexes
+        raw : bool
+            return channel samples without appling the conversion rule;
+            default `False`
+
+        Returns
+        -------
+        signals : list
+            list of *Signal* objects, in the order of the *indexes* argument
+
+        """
+        gp_nr = group
+        grp = self.groups[gp_nr]
+        if grp['data_location'] == v23c.LOCATION_ORIGINAL_FILE:
+            stream = self._file
+        else:
+            stream = self._tempfile
+
+        indexes = list(indexes)
+        unique_indexes = sorted(set(indexes))
+
+        try:
+            parents, dtypes = grp['parents'], grp['types']
+        except KeyError:
+            grp['parents'], grp['types'] = self._prepare_record(grp)
+            parents, dtypes = grp['parents'], grp['types']
+
+        # the channel metadata and the record field processing are
+        # computed only once for each requested channel
+        channels = {}
+        plain_channels = {}
+        for ch_nr in unique_indexes:
+            channel, conversion, display_name = self._get_channel(
+                grp,
+                ch_nr,
+                stream,
+            )
+            channels[ch_nr] = channel, conversion, display_name
+
+            parent, bit_offset = parents.get(ch_nr, (None, None))
+            if parent is None or grp['channel_dependencies'][ch_nr]:
+                continue
+
+            bits = channel['bit_count']
+            field = dtypes[parent]
+            size = field.itemsize
+            kind = field.kind
+            if kind in 'ui' or kind == 'f' and not bit_offset and bits == size * 8:
+                if bits == 1 and self._single_bit_uint_as_bool:
+                    channel_dtype = dtype(bool)
                 else:
-                    source = SignalSource(
-                        source.name,
-                        source.path,
-                        source.comment,
-                        2,  # source type bus
-                        2,  # bus type CAN
+                    channel_dtype = dtype(
+                        get_fmt_v3(channel['data_type'], bits)
                     )
+                plain_channels[ch_nr] = (
+                    parent,
+                    bit_offset,
+                    bits,
+                    size,
+                    kind,
+                    channel['data_type'] in v23c.SIGNED_INT,
+                    channel_dtype,
+                )
 
-            master_metadata = self._master_channel_metadata.get(gp_nr, None)
+        channel_values = {ch_nr: [] for ch_nr in unique_indexes}
+        timestamps = []
 
-            if display_name and not comment.startswith('<CNcomment'):
-                CNcomment = ET.Element('CNcomment')
+        previous_record = grp.pop('record', None)
+        try:
+            for fragment in self._load_group_data(grp):
+                grp.pop('record', None)
+                grp['record'] = record = self._get_record(gp_nr, fragment)
 
-                tx = ET.Element('TX')
-                tx.text = comment
-                CNcomment.append(tx)
+                timestamps.append(self.get_master(gp_nr, fragment))
 
-                display = ET.Element('display')
-                display.text = display_name
-                names = ET.Element('names')
-                names.append(display)
-                CNcomment.append(names)
+                for ch_nr in unique_indexes:
+                    if ch_nr in plain_channels:
+                        (parent, bit_offset, bits,
+                         size, kind, signed, channel_dtype) = plain_channels[ch_nr]
 
-                comment = ET.tostring(CNcomment).decode('utf-8')
+                        vals = record[parent]
+                        if bit_offset:
+                            if kind == 'i':
+                                vals = vals.astype(dtype('<u{}'.format(size)))
+                                vals >>= bit_offset
+                            else:
+                                vals = vals >> bit_offset
+                        if not bits == size * 8:
+                            if signed:
+                                vals = as_non_byte_sized_signed_int(vals, bits)
+                            else:
+                                vals = vals & ((1 << bits) - 1)
+                        if vals.dtype != channel_dtype:
+                            vals = vals.astype(channel_dtype)
+                        elif vals.base is not None:
+                            vals = vals.copy()
+                    else:
+                        vals = self.get(
+                            group=gp_nr,
+                            index=ch_nr,
+                            data=fragment,
+                            samples_only=True,
+                            raw=raw,
+                        )
 
-            res = Signal(
+                    channel_values[ch_nr].append(vals)
+        finally:
+            if previous_record is None:
+                grp.pop('record', None)
+            else:
+                grp['record'] = previous_record
+
+        if not timestamps:
+            return [self.get(group=gp_nr, index=ch_nr, raw=raw) for ch_nr in indexes]
+
+        if len(timestamps) > 1:
+            master = concatenate(timestamps)
+        else:
+            master = timestamps[0]
+
+        signals = {}
+        for ch_nr in unique_indexes:
+            channel, conversion, display_name = channels[ch_nr]
+            values = channel_values[ch_nr]
+            if len(values) > 1:
+                vals = concatenate(values)
+            else:
+                vals = values[0]
+
+            if conversion is None:
+                conversion_type = v23c.CONVERSION_TYPE_NONE
+            else:
+                conversion_type = conversion['conversion_type']
+
+            ch_raw = raw
+            if grp['channel_dependencies'][ch_nr]:
+                pass
+            elif conversion_type in (
+                    v23c.CONVERSION_TYPE_TABX,
+                    v23c.CONVERSION_TYPE_RTABX):
+                ch_raw = True
+            elif ch_nr in plain_channels and not raw \
+                    and conversion_type != v23c.CONVERSION_TYPE_NONE:
+                vals = conversion.convert(vals)
+
+            signals[ch_nr] = Signal(
                 samples=vals,
-                timestamps=timestamps,
-                unit=unit,
+                timestamps=master,
                 name=channel.name,
-                comment=comment,
                 conversion=conversion,
-                raw=raw,
-                master_metadata=master_metadata,
-                display_name=display_name,
-                source=source,
-                bit_count=bit_count,
+                raw=ch_raw,
+                bit_count=channel['bit_count'] or 64,
+                **self._get_signal_metadata(
+                    gp_nr,
+                    ch_nr,
+                    channel,
+                    conversion,
+                    display_name,
+                )
             )
 
-        return res
+        return [signals[ch_nr] for ch_nr in indexes]
 
     def get_master(self, index, data=None, raster=None):
         """ returns master channel samples for given group
@@ -3486,7 +4009,9 @@ class MDF3(object):
         if fragment:
             data_bytes, offset = fragment
             try:
-                timestamps = self._master_channel_cache[(index, offset)]
+                timestamps = self._master_channel_cache[
+                    (index, offset, len(data_bytes))
+                ]
                 if raster and timestamps:
                     timestamps = arange(
                         timestamps[0],
@@ -3579,17 +4104,7 @@ class MDF3(object):
                     data_bytes, offset = fragment
                     parent, _ = parents.get(time_ch_nr, (None, None))
                     if parent is not None:
-                        not_found = object()
-                        record = group.get('record', not_found)
-                        if record is not_found:
-                            if dtypes.itemsize:
-                                record = fromstring(data_bytes, dtype=dtypes)
-                            else:
-                                record = None
-
-                            if memory == 'full':
-                                group['record'] = record
-                        record.setflags(write=False)
+                        record = self._get_record(index, fragment)
                         t = record[parent]
                     else:
                         t = self._get_not_byte_aligned_data(
@@ -3628,7 +4143,7 @@ class MDF3(object):
             self._master_channel_cache[index] = t
         else:
             data_bytes, offset = original_data
-            self._master_channel_cache[(index, offset)] = t
+            self._master_channel_cache[(index, offset, len(data_bytes))] = t
 
         if raster and t.size:
             timestamps = arange(
@@ -4173,7 +4688,7 @@ class MDF3(object):
             self.channels_db = {}
             self.masters_db = {}
 
-            self._master_channel_cache = {}
+            self._cache.clear()
 
             self._tempfile = TemporaryFile()
             self._file = open(self.name, 'rb')
@@ -4559,7 +5074,7 @@ class MDF3(object):
             self.channels_db = {}
             self.masters_db = {}
 
-            self._master_channel_cache = {}
+            self._cache.clear()
 
             self._tempfile = TemporaryFile()
             self._file = open(self.name, 'rb')
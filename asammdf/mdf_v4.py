@@ -8,13 +8,15 @@ import xml.etree.ElementTree as ET
 import os
 import sys
 import warnings
-from collections import defaultdict
 from copy import deepcopy
-from functools import reduce
+from functools import partial, reduce
 from hashlib import md5
 from itertools import chain
 from math import ceil
-from struct import unpack, unpack_from
+from mmap import mmap, ACCESS_READ
+from multiprocessing.pool import ThreadPool
+from pickle import dump, HIGHEST_PROTOCOL, Unpickler, UnpicklingError
+from struct import unpack
 from tempfile import TemporaryFile
 from zlib import decompress
 
@@ -28,10 +30,12 @@ from numpy import (
     flip,
     float64,
     frombuffer,
+    in1d,
     interp,
     ones,
     packbits,
     roll,
+    select,
     transpose,
     uint8,
     uint16,
@@ -40,6 +44,7 @@ from numpy import (
     unpackbits,
     zeros,
     uint32,
+    where,
 )
 from numpy.core.defchararray import encode, decode
 from numpy.core.records import fromarrays, fromstring
@@ -52,17 +57,31 @@ from .utils import (
     CHANNEL_COUNT,
     CONVERT_LOW,
     CONVERT_MINIMUM,
+    LRUCache,
     MdfException,
     SignalSource,
     as_non_byte_sized_signed_int,
+    extract_bit_field,
     fix_dtype_fields,
     fmt_to_datatype_v4,
     get_fmt_v4,
+    get_data_reader,
     get_min_max,
+    get_record_offsets,
+    get_records,
+    get_time_index,
+    get_time_range,
+    get_vlsd_values,
     get_unique_name,
+    get_unique_names,
+    ordered_imap,
+    split_data_fragments,
     get_text_v4,
+    pad_vlsd_values,
     debug_channel,
     extract_cncomment_xml,
+    iter_blocks_range,
+    load_group_data_range,
     validate_memory_argument,
     validate_version_argument,
     count_channel_groups,
@@ -72,6 +91,7 @@ from .v4_blocks import (
     AttachmentBlock,
     Channel,
     ChannelArrayBlock,
+    ChannelCatalog,
     ChannelConversion,
     ChannelGroup,
     DataBlock,
@@ -87,6 +107,7 @@ from .v4_blocks import (
     SourceInformation,
     TextBlock,
 )
+from . import v4_blocks
 from .version import __version__
 
 
@@ -95,6 +116,60 @@ MASTER_CHANNELS = (
     v4c.CHANNEL_TYPE_VIRTUAL_MASTER,
 )
 
+# attributes restored from the metadata cache file
+METADATA_CACHE_ATTRIBUTES = (
+    'identification',
+    'version',
+    'header',
+    'file_history',
+    'attachments',
+    'events',
+    'groups',
+    'channels_db',
+    'masters_db',
+    '_attachments_map',
+    '_cg_map',
+)
+
+# the metadata cache file starts with the magic that holds the format
+# version; the cache key and the metadata state follow as separate pickles
+METADATA_CACHE_MAGIC = b'ASAMMDF-IDX-1'
+
+# numpy globals needed to restore the arrays and dtypes of the metadata state
+METADATA_CACHE_NUMPY_GLOBALS = {
+    'dtype',
+    'ndarray',
+    '_frombuffer',
+    '_reconstruct',
+}
+
+# channel fields that define the record layout of a channel group
+RECORD_LAYOUT_FIELDS = (
+    'byte_offset',
+    'bit_offset',
+    'data_type',
+    'bit_count',
+    'channel_type',
+)
+
+# data types that are not adjusted to 1, 2, 4 or 8 bytes in the record
+NON_SCALAR_TYPES = (
+    v4c.DATA_TYPE_BYTEARRAY,
+    v4c.DATA_TYPE_STRING_UTF_8,
+    v4c.DATA_TYPE_STRING_LATIN_1,
+    v4c.DATA_TYPE_STRING_UTF_16_BE,
+    v4c.DATA_TYPE_STRING_UTF_16_LE,
+    v4c.DATA_TYPE_CANOPEN_TIME,
+    v4c.DATA_TYPE_CANOPEN_DATE,
+)
+
+# memory budget of the parsed blocks cache used by the *minimum* memory option
+MINIMUM_BLOCKS_CACHE_SIZE = 8 * 2**20
+
+# record layouts shared by the identical channel groups of all the opened
+# files
+RECORD_LAYOUT_CACHE = LRUCache(max_bytes=16 * 2**20)
+
 PYVERSION = sys.version_info[0]
 if PYVERSION == 2:
     # pylint: disable=W0622
@@ -222,6 +297,24 @@ def write_cc(conversion, defined_texts, blocks=None, address=None, stream=None):
     return address
 
 
+class _MetadataCacheUnpickler(Unpickler):
+    """ unpickler for the metadata cache file that only resolves the
+    asammdf v4 block classes and the numpy array globals; any other global
+    raises *UnpicklingError* instead of being imported and called """
+
+    def find_class(self, module, name):
+        if module == v4_blocks.__name__:
+            cls = getattr(v4_blocks, name, None)
+            if isinstance(cls, type) and cls.__module__ == module:
+                return cls
+        elif (module.split('.')[0] == 'numpy'
+                and name in METADATA_CACHE_NUMPY_GLOBALS):
+            return Unpickler.find_class(self, module, name)
+
+        message = 'global "{}.{}" is not allowed in the metadata cache'
+        raise UnpicklingError(message.format(module, name))
+
+
 class MDF4(object):
     """If the *name* exist it will be memorised otherwise an empty file will be
     created that can be later saved to disk
@@ -240,6 +333,19 @@ class MDF4(object):
 
     version : string
         mdf file version ('4.00', '4.10', '4.11'); default '4.10'
+    use_metadata_cache : bool
+        store the parsed metadata in a sidecar index file (*name* + '.idx')
+        and use it on the next opening if the file is unchanged (same size,
+        modification time and header); only used for *low* and *minimum*
+        memory options. Only the asammdf block classes and the numpy arrays
+        are restored from the index file and the index is discarded unless
+        it matches the file; default *False*
+    lazy_channels : bool
+        for the *low* memory option only read the channel block and the
+        channel name when the file is opened; the unit, comment, conversion
+        and source are loaded on the first access. The display names are
+        still read from the XML comments. It is ignored for the *full* and
+        *minimum* memory options; default *False*
 
 
     Attributes
@@ -273,7 +379,15 @@ class MDF4(object):
 
     _terminate = False
 
-    def __init__(self, name=None, memory='full', version='4.10', callback=None, queue=None):
+    def __init__(
+            self,
+            name=None,
+            memory='full',
+            version='4.10',
+            callback=None,
+            queue=None,
+            use_metadata_cache=False,
+            lazy_channels=False):
         memory = validate_memory_argument(memory)
         self.groups = []
         self.header = None
@@ -290,9 +404,22 @@ class MDF4(object):
 
         self._attachments_map = {}
         self._ch_map = {}
-        self._master_channel_cache = {}
         self._master_channel_metadata = {}
-        self._invalidation_cache = {}
+
+        # the master channel, invalidation bytes, records and signal data
+        # caches share the same memory budget
+        self._cache = LRUCache()
+        self._master_channel_cache = self._cache.namespace('master')
+        self._invalidation_cache = self._cache.namespace('invalidation')
+        self._valid_masks_cache = self._cache.namespace('valid_masks')
+        self._record_cache = self._cache.namespace('record')
+        self._signal_data_cache = self._cache.namespace('signal_data')
+
+        # parsed CN, CC and SI blocks for the *minimum* memory option
+        self._blocks_cache = LRUCache(max_bytes=MINIMUM_BLOCKS_CACHE_SIZE)
+        self._channels_cache = self._blocks_cache.namespace('channel')
+        self._conversions_cache = self._blocks_cache.namespace('conversion')
+        self._sources_cache = self._blocks_cache.namespace('source')
         self._si_map = {}
         self._cc_map = {}
         self._cg_map = {}
@@ -300,11 +427,22 @@ class MDF4(object):
 
         self._tempfile = TemporaryFile()
         self._file = None
+        self._mmap = None
 
         self._read_fragment_size = 0
         self._write_fragment_size = 8 * 2**20
         self._use_display_names = False
         self._single_bit_uint_as_bool = False
+        self._use_memory_map = False
+        self._use_metadata_cache = use_metadata_cache and memory != 'full'
+        # the time range indexes computed after opening are written to the
+        # metadata cache on close
+        self._metadata_cache_outdated = False
+        self._lazy_channels = lazy_channels and memory == 'low'
+        self._decompression_threads = 0
+        self._decompression_pool = None
+        self._compression_threads = 0
+        self._compression_pool = None
 
         # make sure no appended block has the address 0
         self._tempfile.write(b'\0')
@@ -314,7 +452,13 @@ class MDF4(object):
 
         if name:
             self._file = open(self.name, 'rb')
-            self._read()
+            if use_metadata_cache and memory != 'full':
+                if not self._load_metadata_cache():
+                    self._read()
+                    if not self._terminate:
+                        self._save_metadata_cache()
+            else:
+                self._read()
 
         else:
             version = validate_version_argument(version)
@@ -410,6 +554,9 @@ class MDF4(object):
             cg_nr = 0
 
             cg_size = {}
+            # record offsets of the last scanned unsorted data block, shared
+            # by all the channel groups of the data group
+            record_offsets = {}
 
             while cg_addr:
                 cg_nr += 1
@@ -428,6 +575,7 @@ class MDF4(object):
                 channel_group = grp['channel_group'] = block
 
                 grp['record_size'] = cg_size
+                grp['record_offsets'] = record_offsets
 
                 if channel_group['flags'] & v4c.FLAG_CG_VLSD:
                     # VLDS flag
@@ -578,39 +726,28 @@ class MDF4(object):
                     }
                     grp.update(info)
                 else:
-                    cg_data = defaultdict(list)
-                    if record_id_nr == 1:
-                        fmt = '<B'
-                    elif record_id_nr == 2:
-                        fmt = '<H'
-                    elif record_id_nr == 4:
-                        fmt = '<I'
-                    elif record_id_nr == 8:
-                        fmt = '<Q'
-                    else:
-                        message = "invalid record id size {}"
-                        raise MdfException(message.format(record_id_nr))
-
-                    i = 0
-                    while i < size:
-                        # print(fmt, dg_cntr, len(data), size)
-                        rec_id = unpack(fmt, data[i: i+record_id_nr])[0]
-                        # skip record id
-                        i += record_id_nr
-                        rec_size = cg_size[rec_id]
-                        if rec_size:
-                            rec_data = data[i: i + rec_size]
-                            cg_data[rec_id].append(rec_data)
-                        else:
-                            rec_size = unpack('<I', data[i: i + 4])[0]
-                            rec_data = data[i: i + rec_size + 4]
-                            cg_data[rec_id].append(rec_data)
-                            i += 4
-                        i += rec_size
+                    if len(data) > size:
+                        data = data[:size]
+                    offsets = get_record_offsets(
+                        data,
+                        record_id_nr,
+                        cg_size,
+                    )
+
+                    cg_data = {}
+                    for grp in new_groups:
+                        record_id = grp['channel_group']['record_id']
+                        cg_data[record_id] = get_records(
+                            data,
+                            offsets[record_id],
+                            cg_size[record_id],
+                        )
+                    del data, offsets
+
                     for grp in new_groups:
                         grp['data_location'] = v4c.LOCATION_MEMORY
                         record_id = grp['channel_group']['record_id']
-                        data = b''.join(cg_data[record_id])
+                        data = cg_data.pop(record_id)
                         grp['channel_group']['record_id'] = 1
                         grp['data_block'] = DataBlock(data=data)
 
@@ -904,6 +1041,85 @@ class MDF4(object):
 
         self.progress = cg_count, cg_count
 
+    def _metadata_cache_key(self):
+        """ the metadata cache is valid only for the same file size,
+        modification time, identification and header blocks, asammdf version
+        and memory option """
+        stat = os.stat(self.name)
+        self._file.seek(0)
+        header = self._file.read(
+            v4c.IDENTIFICATION_BLOCK_SIZE + v4c.HEADER_BLOCK_SIZE
+        )
+        return (
+            __version__,
+            self.memory,
+            stat.st_size,
+            stat.st_mtime,
+            md5(header).hexdigest(),
+        )
+
+    def _load_metadata_cache(self):
+        """ restore the metadata from the sidecar index file
+
+        Returns
+        -------
+        loaded : bool
+            *True* if the index file exists and is up to date
+
+        """
+        try:
+            with open(self.name + '.idx', 'rb') as index_file:
+                magic = index_file.read(len(METADATA_CACHE_MAGIC))
+                if magic != METADATA_CACHE_MAGIC:
+                    return False
+
+                # the key is checked before the metadata state is restored
+                key = _MetadataCacheUnpickler(index_file).load()
+                if key != self._metadata_cache_key():
+                    return False
+                state = _MetadataCacheUnpickler(index_file).load()
+        except (IOError, OSError, EOFError, UnpicklingError, ValueError):
+            return False
+
+        for attr in METADATA_CACHE_ATTRIBUTES:
+            setattr(self, attr, state[attr])
+
+        for group in self.groups:
+            for channel in group['channels']:
+                if isinstance(channel, Channel) and channel.lazy:
+                    channel.set_lazy_stream(self._file)
+
+        cg_count = len(self.groups)
+        self.progress = cg_count, cg_count
+        if self._callback:
+            self._callback(cg_count, cg_count)
+
+        return True
+
+    def _save_metadata_cache(self):
+        """ store the metadata in the sidecar index file; groups that have
+        data in the temporary file (for example extracted from raw CAN bus
+        logging) cannot be restored so the index is not written """
+        for group in self.groups:
+            if group['data_location'] != v4c.LOCATION_ORIGINAL_FILE:
+                return
+            if 'parents' not in group:
+                group['parents'], group['types'] = self._prepare_record(group)
+            # the record offsets are rebuilt when the blocks are read
+            group['record_offsets'].clear()
+
+        state = {
+            attr: getattr(self, attr)
+            for attr in METADATA_CACHE_ATTRIBUTES
+        }
+        try:
+            with open(self.name + '.idx', 'wb') as index_file:
+                index_file.write(METADATA_CACHE_MAGIC)
+                dump(self._metadata_cache_key(), index_file, HIGHEST_PROTOCOL)
+                dump(state, index_file, HIGHEST_PROTOCOL)
+        except (IOError, OSError):
+            pass
+
     def _read_channels(
             self,
             ch_addr,
@@ -955,6 +1171,7 @@ class MDF4(object):
                     cc_map=self._cc_map,
                     si_map=self._si_map,
                     at_map=self._attachments_map,
+                    lazy_metadata=self._lazy_channels,
                 )
                 value = channel
                 display_name = channel.display_name
@@ -1356,10 +1573,19 @@ class MDF4(object):
 
         elif group is not None and index is not None:
             if group['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
+                address = group['signal_data'][index]
+                # the signal data is only cached within a memory budget
+                if self._cache.max_bytes is not None:
+                    try:
+                        return self._signal_data_cache[address]
+                    except KeyError:
+                        pass
                 data = self._load_signal_data(
-                    address=group['signal_data'][index],
+                    address=address,
                     stream=self._file,
                 )
+                if self._cache.max_bytes is not None:
+                    self._signal_data_cache[address] = data
             elif group['data_location'] == v4c.LOCATION_MEMORY:
                 data = group['signal_data'][index]
             else:
@@ -1393,6 +1619,8 @@ class MDF4(object):
             else:
                 stream = self._tempfile
 
+            read = self._get_data_reader(stream)
+
             block_type = group['data_block_type']
             param = group['param']
 
@@ -1453,16 +1681,16 @@ class MDF4(object):
                             current_address = address
                         except StopIteration:
                             break
-                        stream.seek(address)
 
                         while size >= split_size - cur_size:
-                            stream.seek(current_address)
                             if data:
-                                data.append(stream.read(split_size - cur_size))
+                                data.append(
+                                    read(current_address, split_size - cur_size)
+                                )
                                 yield b''.join(data), offset
                                 current_address += split_size - cur_size
                             else:
-                                yield stream.read(split_size), offset
+                                yield read(current_address, split_size), offset
                                 current_address += split_size
                             offset += split_size
 
@@ -1471,77 +1699,327 @@ class MDF4(object):
                             cur_size = 0
 
                         if size:
-                            stream.seek(current_address)
-                            data.append(stream.read(size))
+                            data.append(read(current_address, size))
                             cur_size += size
                     if data:
                         yield b''.join(data), offset
                 else:
-                    for (address, size, block_size) in blocks:
-
-                        stream.seek(address)
-                        data = stream.read(block_size)
-
-                        if block_type == v4c.DZ_BLOCK_DEFLATE:
-                            data = decompress(data)
-
-                        elif block_type == v4c.DZ_BLOCK_TRANSPOSED:
-                            data = decompress(data)
-                            cols = param
-                            lines = size // cols
+                    def inflate(item):
+                        address, size, block_size, data = item
+                        data = self._inflate_block(data, block_type, param, size)
+                        return address, size, block_size, data
+
+                    # the compressed blocks are read in this thread and are
+                    # inflated by the decompression pool (if configured)
+                    # ahead of the consumer
+                    compressed_blocks = (
+                        (address, size, block_size, read(address, block_size))
+                        for address, size, block_size in blocks
+                    )
+                    if block_type == v4c.DT_BLOCK:
+                        pool = None
+                    else:
+                        pool = self._get_decompression_pool()
 
-                            nd = fromstring(data[:lines * cols], dtype=uint8)
-                            nd = nd.reshape((cols, lines))
-                            data = nd.T.tostring() + data[lines * cols:]
+                    for address, size, block_size, data in ordered_imap(
+                            inflate,
+                            compressed_blocks,
+                            pool=pool,
+                            window=2 * self._decompression_threads):
 
                         if not group['sorted']:
-                            rec_data = []
-
                             cg_size = group['record_size']
                             record_id = channel_group['record_id']
                             record_id_nr = data_group['record_id_len']
 
-                            if record_id_nr == 1:
-                                fmt = '<B'
-                            elif record_id_nr == 2:
-                                fmt = '<H'
-                            elif record_id_nr == 4:
-                                fmt = '<I'
-                            elif record_id_nr == 8:
-                                fmt = '<Q'
+                            # the offsets of the current block are shared
+                            # by all the channel groups of the data group;
+                            # only one block is kept to bound the memory
+                            record_offsets = group['record_offsets']
+                            if address in record_offsets:
+                                offsets = record_offsets[address]
                             else:
-                                message = "invalid record id size {}"
-                                message = message.format(record_id_nr)
-                                raise MdfException(message)
-
-                            i = 0
-                            size = len(data)
-                            while i < size:
-                                rec_id = unpack(fmt, data[i: i+record_id_nr])[0]
-                                # skip record id
-                                i += record_id_nr
-                                rec_size = cg_size[rec_id]
-                                if rec_size:
-                                    if rec_id == record_id:
-                                        rec_data.append(data[i: i + rec_size])
-                                else:
-                                    rec_size = unpack('<I', data[i: i + 4])[0]
-                                    if rec_id == record_id:
-                                        rec_data.append(data[i: i + 4 + rec_size])
-                                    i += 4
-                                i += rec_size
-                            rec_data = b''.join(rec_data)
+                                offsets = get_record_offsets(
+                                    data,
+                                    record_id_nr,
+                                    cg_size,
+                                )
+                                record_offsets.clear()
+                                record_offsets[address] = offsets
+
+                            rec_data = get_records(
+                                data,
+                                offsets[record_id],
+                                cg_size[record_id],
+                            )
                             size = len(rec_data)
                             yield rec_data, offset
                             offset += size
                         else:
                             yield data, offset
-                            offset += block_size
+                            offset += size
             else:
                 yield b'', offset
 
+    def _get_data_reader(self, stream):
+        """ get the function used to read raw bytes from the stream; if the
+        memory map is enabled the original file data is returned as
+        *memoryview* slices of the mapping
+
+        Parameters
+        ----------
+        stream : file handle
+            original file or temporary file
+
+        Returns
+        -------
+        read : callable
+            function that takes the address and the size as arguments
+
+        """
+        if stream is self._file and self._use_memory_map:
+            mapped = self._get_memory_map()
+        else:
+            mapped = None
+
+        return get_data_reader(stream, mapped)
+
+    def _inflate_block(self, data, block_type, param, size):
+        """ inflate the raw bytes of a data block
+
+        Parameters
+        ----------
+        data : bytes
+            block raw bytes
+        block_type : int
+            data block type
+        param : int
+            transposition columns number for the transposed deflate blocks
+        size : int
+            uncompressed size
+
+        Returns
+        -------
+        data : bytes
+            uncompressed data
+
+        """
+        if block_type == v4c.DZ_BLOCK_DEFLATE:
+            data = decompress(data)
+
+        elif block_type == v4c.DZ_BLOCK_TRANSPOSED:
+            data = decompress(data)
+            cols = param
+            lines = size // cols
+
+            nd = fromstring(data[:lines * cols], dtype=uint8)
+            nd = nd.reshape((cols, lines))
+            data = nd.T.tostring() + data[lines * cols:]
+
+        return data
+
+    def _read_group_bytes(self, group, start, stop):
+        """ read a range of the group's uncompressed records bytes; only the
+        data blocks that overlap the range are read
+
+        Parameters
+        ----------
+        group : dict
+            sorted MDF group dict
+        start : int
+            start byte offset
+        stop : int
+            stop byte offset (not included)
+
+        Returns
+        -------
+        data : bytes
+            records bytes
+
+        """
+        if self.memory == 'full':
+            return group['data_block']['data'][start: stop]
+
+        if group['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
+            stream = self._file
+        else:
+            stream = self._tempfile
+        read = self._get_data_reader(stream)
+
+        block_type = group['data_block_type']
+        param = group['param']
+
+        data = []
+        blocks = zip(
+            group['data_block_addr'],
+            group['data_size'],
+            group['data_block_size'],
+        )
+        for block, first, last in iter_blocks_range(blocks, start, stop):
+            address, size, block_size = block
+            if block_type == v4c.DT_BLOCK:
+                data.append(read(address + first, last - first))
+            else:
+                block_data = read(address, block_size)
+                block_data = self._inflate_block(
+                    block_data,
+                    block_type,
+                    param,
+                    size,
+                )
+                data.append(block_data[first: last])
+
+        if PYVERSION == 2:
+            data = [str(block) for block in data]
+        return b''.join(data)
+
+    def _get_time_index(self, index):
+        """ get the time range index of the group; the index maps each data
+        fragment to its first record and to its first and last master values.
+        The index is computed from the master channel on the first request
+        and it is stored in the metadata cache (if enabled)
+
+        Parameters
+        ----------
+        index : int
+            group index
+
+        Returns
+        -------
+        time_index : dict | None
+            *records*, *first* and *last* arrays and the total *cycles_nr*;
+            *None* if the group is not sorted or if the master channel is not
+            monotonic
+
+        """
+        group = self.groups[index]
+        try:
+            return group['time_index']
+        except KeyError:
+            pass
+
+        channel_group = group['channel_group']
+        record_size = (
+            channel_group['samples_byte_nr']
+            + channel_group['invalidation_bytes_nr']
+        )
+        time_index = get_time_index(self, index, record_size)
+
+        group['time_index'] = time_index
+        if self._use_metadata_cache:
+            self._metadata_cache_outdated = True
+
+        return time_index
+
+    def _load_group_data_range(self, index, start=None, stop=None):
+        """ get group's data fragments that overlap the [*start*, *stop*]
+        time interval. If the time range index can be used only the data
+        blocks that overlap the interval are read, otherwise all the group's
+        fragments are returned
+
+        Parameters
+        ----------
+        index : int
+            group index
+        start : float
+            start timestamp; default *None*
+        stop : float
+            stop timestamp; default *None*
+
+        Returns
+        -------
+        fragments : generator
+            (bytes, offset) data fragments
+
+        """
+        group = self.groups[index]
+        channel_group = group['channel_group']
+        record_size = (
+            channel_group['samples_byte_nr']
+            + channel_group['invalidation_bytes_nr']
+        )
+
+        return load_group_data_range(self, index, record_size, start, stop)
+
+    def _get_channel_catalog(self, group):
+        """ get the compact table of the channels fixed fields of the group;
+        the table is built on the first request and stored in the group. It
+        is rebuilt if channels were added to the group, and it is dropped by
+        *save* since the channel blocks links are rewritten
+
+        Parameters
+        ----------
+        group : dict
+            MDF group dict
+
+        Returns
+        -------
+        catalog : ChannelCatalog
+            channels catalog
+
+        """
+        catalog = group.get('catalog')
+        if catalog is None or len(catalog) != len(group['channels']):
+            if self.memory == 'minimum':
+                if group['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
+                    stream = self._file
+                else:
+                    stream = self._tempfile
+                catalog = ChannelCatalog.from_stream(group['channels'], stream)
+            else:
+                catalog = ChannelCatalog.from_channels(group['channels'])
+            group['catalog'] = catalog
+
+        return catalog
+
+    def _read_channel(self, address, stream, load_metadata=True):
+        """ read a CN block for the *minimum* memory option. The channels and
+        their conversion and source blocks are kept in a bounded cache keyed
+        by address, so that the same block is not parsed again on each call.
+        The returned channel must not be modified
+
+        Parameters
+        ----------
+        address : int
+            CN block address
+        stream : file handle
+            original file or temporary file handle
+        load_metadata : bool
+            load the name, unit, comment, conversion and source; default
+            *True*
+
+        Returns
+        -------
+        channel : Channel
+            channel object
+
+        """
+        in_file = stream is self._file
+        cache = self._channels_cache
+        try:
+            return cache[(in_file, address, True)]
+        except KeyError:
+            if not load_metadata:
+                try:
+                    return cache[(in_file, address, False)]
+                except KeyError:
+                    pass
+
+        channel = Channel(
+            address=address,
+            stream=stream,
+            cc_map=self._conversions_cache,
+            si_map=self._sources_cache,
+            load_metadata=load_metadata,
+        )
+        cache[(in_file, address, load_metadata)] = channel
+        return channel
+
     def _prepare_record(self, group):
-        """ compute record dtype and parents dict fro this group
+        """ compute record dtype and parents dict fro this group. The layout
+        of groups without channel dependencies is memoized by the channels
+        fixed fields and names, so that identical groups reuse the same
+        record dtype
 
         Parameters
         ----------
@@ -1559,54 +2037,85 @@ class MDF4(object):
         except KeyError:
 
             grp = group
-            stream = self._file
-            memory = self.memory
             channel_group = grp['channel_group']
-            if memory == 'minimum':
-                channels = [
-                    Channel(
-                        address=ch_addr,
-                        stream=stream,
-                        cc_map=self._cc_map,
-                        si_map=self._si_map,
-                        load_metadata=False,
-                    )
-                    for ch_addr in grp['channels']
-                ]
-            else:
-                channels = grp['channels']
+            catalog = self._get_channel_catalog(grp)
+            fields = catalog.fields
 
             record_size = channel_group['samples_byte_nr']
             invalidation_bytes_nr = channel_group['invalidation_bytes_nr']
+
+            memoize = (
+                not channel_group['flags'] & v4c.FLAG_CG_BUS_EVENT
+                and not any(grp['channel_dependencies'])
+            )
+            if memoize:
+                layout = b''.join(
+                    fields[name].tobytes()
+                    for name in RECORD_LAYOUT_FIELDS
+                )
+                names = '\n'.join(catalog.names).encode('utf-8')
+                key = (
+                    record_size,
+                    invalidation_bytes_nr,
+                    md5(layout + b'\0' + names).digest(),
+                )
+                try:
+                    parents, dtypes = RECORD_LAYOUT_CACHE[key]
+                except KeyError:
+                    pass
+                else:
+                    return dict(parents), dtypes
+
             next_byte_aligned_position = 0
             types = []
             current_parent = ""
             parent_start_offset = 0
             parents = {}
-            group_channels = set()
 
             neg_index = -1
 
-            sortedchannels = sorted(enumerate(channels), key=lambda i: i[1])
-            for original_index, new_ch in sortedchannels:
+            order = catalog.record_order()
+            byte_offsets = fields['byte_offset'][order]
+            bit_offsets = fields['bit_offset'][order]
+            data_types = fields['data_type'][order]
+            bit_counts = fields['bit_count'][order]
+            channel_types = fields['channel_type'][order]
+
+            # parent sizes adjusted to 1, 2, 4 or 8 bytes, and the byte
+            # size for the string, byte array and CANopen types
+            sizes = bit_offsets.astype('<i8') + bit_counts
+            sizes = where(
+                in1d(data_types, NON_SCALAR_TYPES),
+                sizes >> 3,
+                select([sizes > 32, sizes > 16, sizes > 8], [8, 4, 2], 1),
+            )
 
-                start_offset = new_ch['byte_offset']
-                bit_offset = new_ch['bit_offset']
-                data_type = new_ch['data_type']
-                bit_count = new_ch['bit_count']
-                ch_type = new_ch['channel_type']
-                dependency_list = grp['channel_dependencies'][original_index]
-                if memory == 'minimum':
-                    name = get_text_v4(
-                        address=new_ch['name_addr'],
-                        stream=stream,
-                    )
-                else:
-                    name = new_ch.name
+            # handle multiple occurance of same channel name
+            names = catalog.names
+            unique_names = get_unique_names([names[i] for i in order.tolist()])
+
+            fmts = {}
+
+            sortedchannels = zip(
+                order.tolist(),
+                unique_names,
+                byte_offsets.tolist(),
+                bit_offsets.tolist(),
+                data_types.tolist(),
+                bit_counts.tolist(),
+                channel_types.tolist(),
+                sizes.tolist(),
+            )
+            for (original_index,
+                 name,
+                 start_offset,
+                 bit_offset,
+                 data_type,
+                 bit_count,
+                 ch_type,
+                 size) in sortedchannels:
 
-                # handle multiple occurance of same channel name
-                name = get_unique_name(group_channels, name)
-                group_channels.add(name)
+                dependency_list = grp['channel_dependencies'][original_index]
 
                 if start_offset >= next_byte_aligned_position:
                     if ch_type not in (v4c.CHANNEL_TYPE_VIRTUAL_MASTER,
@@ -1619,31 +2128,14 @@ class MDF4(object):
                             if gap:
                                 types.append(('', 'a{}'.format(gap)))
 
-                            # adjust size to 1, 2, 4 or 8 bytes
-                            size = bit_offset + bit_count
-                            if data_type not in (
-                                    v4c.DATA_TYPE_BYTEARRAY,
-                                    v4c.DATA_TYPE_STRING_UTF_8,
-                                    v4c.DATA_TYPE_STRING_LATIN_1,
-                                    v4c.DATA_TYPE_STRING_UTF_16_BE,
-                                    v4c.DATA_TYPE_STRING_UTF_16_LE,
-                                    v4c.DATA_TYPE_CANOPEN_TIME,
-                                    v4c.DATA_TYPE_CANOPEN_DATE):
-                                if size > 32:
-                                    size = 8
-                                elif size > 16:
-                                    size = 4
-                                elif size > 8:
-                                    size = 2
-                                else:
-                                    size = 1
-                            else:
-                                size = size >> 3
-
                             next_byte_aligned_position = parent_start_offset + size
                             if next_byte_aligned_position <= record_size:
-                                dtype_pair = name, get_fmt_v4(data_type, bit_count, ch_type)
-                                types.append(dtype_pair)
+                                fmt_key = data_type, bit_count, ch_type
+                                try:
+                                    fmt = fmts[fmt_key]
+                                except KeyError:
+                                    fmt = fmts[fmt_key] = get_fmt_v4(*fmt_key)
+                                types.append((name, fmt))
                                 parents[original_index] = name, bit_offset
                             else:
                                 next_byte_aligned_position = parent_start_offset
@@ -1706,13 +2198,16 @@ class MDF4(object):
                 dtype_pair = '', 'a{}'.format(gap)
                 types.append(dtype_pair)
 
-            dtype_pair = 'invalidation_bytes', '<u1', invalidation_bytes_nr
+            dtype_pair = 'invalidation_bytes', '<u1', (invalidation_bytes_nr, )
             types.append(dtype_pair)
             if PYVERSION == 2:
                 types = fix_dtype_fields(types)
 
             dtypes = dtype(types)
 
+            if memoize:
+                RECORD_LAYOUT_CACHE[key] = dict(parents), dtypes
+
         return parents, dtypes
 
     def _append_structure_composition(
@@ -1952,21 +2447,7 @@ class MDF4(object):
         record_size = group['channel_group']['samples_byte_nr']
 
         if ch_nr >= 0:
-            if self.memory == 'minimum':
-                if group['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
-                    channel = Channel(
-                        address=group['channels'][ch_nr],
-                        stream=self._file,
-                        load_metadata=False,
-                    )
-                else:
-                    channel = Channel(
-                        address=group['channels'][ch_nr],
-                        stream=self._tempfile,
-                        load_metadata=False,
-                    )
-            else:
-                channel = group['channels'][ch_nr]
+            channel = self._get_channel_catalog(group)[ch_nr]
         else:
             channel = group['logging_channels'][-ch_nr-1]
 
@@ -1975,7 +2456,11 @@ class MDF4(object):
         bit_count = channel['bit_count']
 
         dependencies = group['channel_dependencies'][ch_nr]
-        if dependencies and isinstance(dependencies[0], ChannelArrayBlock):
+        is_array = (
+            dependencies
+            and isinstance(dependencies[0], ChannelArrayBlock)
+        )
+        if is_array:
             ca_block = dependencies[0]
 
             size = bit_count >> 3
@@ -1997,6 +2482,23 @@ class MDF4(object):
         else:
             byte_count >>= 3
 
+        data_type = channel['data_type']
+        if data_type in v4c.INT_TYPES and not is_array:
+            vals = extract_bit_field(
+                data,
+                record_size,
+                byte_offset,
+                bit_offset,
+                bit_count,
+                big_endian=data_type in big_endian_types,
+                signed=data_type in v4c.SIGNED_INT,
+            )
+            if vals is not None:
+                fmt = dtype(get_fmt_v4(data_type, bit_count))
+                if vals.dtype != fmt.newbyteorder('='):
+                    vals = vals.astype(fmt)
+                return vals
+
         types = [
             ('', 'a{}'.format(byte_offset)),
             ('vals', '({},)u1'.format(byte_count)),
@@ -2167,6 +2669,78 @@ class MDF4(object):
 
         return gp_nr, ch_nr
 
+    def _get_record(self, group_index, fragment):
+        """ get the records array of a data fragment. The records are
+        cached for the *full* memory option, or for all the memory options
+        if a cache memory budget is configured
+
+        Parameters
+        ----------
+        group_index : int
+            group index
+        fragment : (bytes, int)
+            (fragment bytes, fragment offset)
+
+        Returns
+        -------
+        record : numpy.recarray
+            read only records array; *None* if the records have no fields
+
+        """
+        group = self.groups[group_index]
+
+        # records set by the caller for the current fragment
+        not_found = object()
+        record = group.get('record', not_found)
+        if record is not not_found:
+            return record
+
+        data_bytes, offset = fragment
+        key = group_index, offset, len(data_bytes)
+        try:
+            return self._record_cache[key]
+        except KeyError:
+            pass
+
+        dtypes = group['types']
+        if dtypes.itemsize:
+            record = fromstring(data_bytes, dtype=dtypes)
+            record.setflags(write=False)
+        else:
+            record = None
+
+        if self.memory == 'full' or self._cache.max_bytes is not None:
+            self._record_cache[key] = record
+
+        return record
+
+    def _get_invalidation_bytes(self, group_index, fragment):
+        """ get the invalidation bytes column of the fragment's records
+
+        Parameters
+        ----------
+        group_index : int
+            group index
+        fragment : (bytes, int)
+            (fragment bytes, fragment offset)
+
+        Returns
+        -------
+        invalidation : numpy.array
+            2D uint8 array with one line for each record
+
+        """
+        data_bytes, offset = fragment
+        key = group_index, offset, len(data_bytes)
+        try:
+            invalidation = self._invalidation_cache[key]
+        except KeyError:
+            record = self._get_record(group_index, fragment)
+            invalidation = record['invalidation_bytes'].copy()
+            self._invalidation_cache[key] = invalidation
+
+        return invalidation
+
     def get_valid_indexes(self, group_index, channel, fragment):
         """ get invalidation indexes for the channel
 
@@ -2186,41 +2760,90 @@ class MDF4(object):
             returned
 
         """
-        group = self.groups[group_index]
-        dtypes = group['types']
+        invalidation = self._get_invalidation_bytes(group_index, fragment)
+
+        ch_invalidation_pos = channel['pos_invalidation_bit']
+        pos_byte, pos_offset = divmod(ch_invalidation_pos, 8)
+        mask = 1 << pos_offset
+
+        valid_indexes = argwhere(
+            (invalidation[:, pos_byte] & mask) == 0
+        ).flatten()
+
+        return valid_indexes
+
+    def get_valid_masks(self, group_index, fragment):
+        """ get the validity masks of all the group's channels that use the
+        invalidation bit. Each mask is read from the invalidation byte that
+        holds the channel's bit, and the result is cached for each fragment
 
+        Parameters
+        ----------
+        group_index : int
+            group index
+        fragment : (bytes, int)
+            (fragment bytes, fragment offset)
+
+        Returns
+        -------
+        valid_masks : dict
+            channel index to boolean array mapping; the channels without
+            invalidation bit are not included
+
+        """
         data_bytes, offset = fragment
+        key = group_index, offset, len(data_bytes)
         try:
-            invalidation = self._invalidation_cache[(group_index, offset)]
+            return self._valid_masks_cache[key]
         except KeyError:
-            not_found = object()
-            record = group.get('record', not_found)
-            if record is not_found:
-                if dtypes.itemsize:
-                    record = fromstring(data_bytes, dtype=dtypes)
-                else:
-                    record = None
+            pass
 
-            invalidation = record['invalidation_bytes'].copy()
-            self._invalidation_cache[(group_index, offset)] = invalidation
+        group = self.groups[group_index]
 
-        ch_invalidation_pos = channel['pos_invalidation_bit']
-        pos_byte, pos_offset = divmod(ch_invalidation_pos, 8)
-        mask = 1 << pos_offset
+        try:
+            positions = group['invalidation_positions']
+        except KeyError:
+            if group['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
+                stream = self._file
+            else:
+                stream = self._tempfile
 
-        valid_indexes = array(
-            [bytes_[pos_byte] & mask for bytes_ in invalidation]
-        )
-        valid_indexes = argwhere(valid_indexes == 0).flatten()
+            positions = {}
+            for ch_nr, channel in enumerate(group['channels']):
+                if self.memory == 'minimum':
+                    channel = self._read_channel(
+                        channel,
+                        stream,
+                        load_metadata=False,
+                    )
+                if (channel['flags']
+                        & (v4c.FLAG_INVALIDATION_BIT_VALID | v4c.FLAG_ALL_SAMPLES_VALID)
+                        == v4c.FLAG_INVALIDATION_BIT_VALID):
+                    positions[ch_nr] = channel['pos_invalidation_bit']
+            group['invalidation_positions'] = positions
 
-        return valid_indexes
+        valid_masks = {}
+        if positions:
+            invalidation = self._get_invalidation_bytes(group_index, fragment)
+            for ch_nr, pos in positions.items():
+                valid_masks[ch_nr] = (
+                    invalidation[:, pos >> 3] & (1 << (pos & 7))
+                ) == 0
+
+        self._valid_masks_cache[key] = valid_masks
+
+        return valid_masks
 
     def configure(
             self,
             read_fragment_size=None,
             write_fragment_size=None,
             use_display_names=None,
-            single_bit_uint_as_bool=None):
+            single_bit_uint_as_bool=None,
+            use_memory_map=None,
+            decompression_threads=None,
+            compression_threads=None,
+            cache_bytes=None):
         """ configure read and write fragment size for chuncked
         data access
 
@@ -2236,6 +2859,28 @@ class MDF4(object):
             the data groups' records size
         use_display_names : bool
             use display name if available for the Signal's name returned by the get method
+        use_memory_map : bool
+            map the original file in memory and serve the uncompressed data
+            fragments as zero-copy *memoryview* slices of the mapping; only
+            used for *low* and *minimum* memory options
+        decompression_threads : int
+            number of worker threads used to inflate the DZ blocks; the next
+            blocks are read and inflated while the current data fragment is
+            processed. 0 or 1 disables the parallel decompression (default).
+            Only used for *low* and *minimum* memory options, since with the
+            *full* memory option the data is loaded when the file is opened
+        compression_threads : int
+            number of worker threads used by the *save* method to compress
+            the data list chunks; the chunks are still written in order, so
+            the output is identical to the serial compression. 0 or 1
+            disables the parallel compression (default)
+        cache_bytes : int
+            memory budget in bytes shared by the master channel,
+            invalidation bytes, records and signal data caches; the least
+            recently used items are evicted when the budget is exceeded. 0
+            removes the budget (default). With a budget the records and the
+            signal data are also cached for the *low* and *minimum* memory
+            options
 
         """
 
@@ -2251,6 +2896,122 @@ class MDF4(object):
         if single_bit_uint_as_bool is not None:
             self._single_bit_uint_as_bool = bool(single_bit_uint_as_bool)
 
+        if use_memory_map is not None:
+            self._use_memory_map = bool(use_memory_map)
+            if not self._use_memory_map:
+                self._close_memory_map()
+
+        if decompression_threads is not None:
+            decompression_threads = max(int(decompression_threads), 0)
+            if decompression_threads != self._decompression_threads:
+                self._close_decompression_pool()
+                self._decompression_threads = decompression_threads
+
+        if compression_threads is not None:
+            compression_threads = max(int(compression_threads), 0)
+            if compression_threads != self._compression_threads:
+                self._close_compression_pool()
+                self._compression_threads = compression_threads
+
+        if cache_bytes is not None:
+            cache_bytes = max(int(cache_bytes), 0)
+            self._cache.configure(cache_bytes or None)
+
+    def cache_info(self):
+        """ get the usage counters of the master channel, invalidation
+        bytes, records and signal data caches
+
+        Returns
+        -------
+        info : dict
+            cache *hits*, *misses* and *evictions* counters, number of cached
+            *items*, their total *size* in bytes and the *max_bytes* budget
+
+        """
+        return self._cache.info()
+
+    def _get_decompression_pool(self):
+        """ get the thread pool used to inflate the DZ blocks; the pool is
+        created on the first request """
+        if self._decompression_threads <= 1:
+            return None
+        if self._decompression_pool is None:
+            self._decompression_pool = ThreadPool(self._decompression_threads)
+        return self._decompression_pool
+
+    def _close_decompression_pool(self):
+        """ stop the DZ blocks decompression threads """
+        if self._decompression_pool is not None:
+            self._decompression_pool.terminate()
+            self._decompression_pool = None
+
+    def _get_compression_pool(self):
+        """ get the thread pool used to compress the saved data blocks; the
+        pool is created on the first request """
+        if self._compression_threads <= 1:
+            return None
+        if self._compression_pool is None:
+            self._compression_pool = ThreadPool(self._compression_threads)
+        return self._compression_pool
+
+    def _close_compression_pool(self):
+        """ stop the data blocks compression threads """
+        if self._compression_pool is not None:
+            self._compression_pool.terminate()
+            self._compression_pool = None
+
+    def _build_data_block(self, data, compression, param):
+        """ build the block used to save a data chunk
+
+        Parameters
+        ----------
+        data : bytes
+            uncompressed data
+        compression : int
+            *save* method compression option
+        param : int
+            record size used by the transposed deflate compression
+
+        Returns
+        -------
+        block : DataBlock | DataZippedBlock
+            new block
+
+        """
+        if compression and self.version > '4.00':
+            if compression == 1:
+                zip_type = v4c.FLAG_DZ_DEFLATE
+                param = 0
+            else:
+                zip_type = v4c.FLAG_DZ_TRANPOSED_DEFLATE
+            kargs = {
+                'data': data,
+                'zip_type': zip_type,
+                'param': param,
+            }
+            block = DataZippedBlock(**kargs)
+        else:
+            block = DataBlock(data=data)
+        return block
+
+    def _get_memory_map(self):
+        """ get the read-only memory map of the original file; the map is
+        created on the first request """
+        if self._mmap is None:
+            self._mmap = mmap(self._file.fileno(), 0, access=ACCESS_READ)
+        return self._mmap
+
+    def _close_memory_map(self):
+        """ release the memory map of the original file """
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # there are still arrays that use the mapped memory; the map
+                # will be released when they are garbage collected
+                pass
+            self._mmap = None
+
     def append(self, signals, source_info='Python', common_timebase=False):
         """
         Appends a new data group.
@@ -3128,40 +3889,11 @@ class MDF4(object):
 
                 fields.append(signal)
                 if signal.shape[1:]:
-                    types.append(('', signal.dtype, signal.shape[1:]))
-                else:
-                    types.append(('', signal.dtype))
-                min_val, max_val = get_min_max(signal)
-                if self.memory == 'minimum':
-                    address = gp['channels'][i]
-                    channel = Channel(
-                        address=address,
-                        stream=stream,
-                        load_metadata=False,
-                    )
-
-                    update = False
-                    if min_val < channel['min_raw_value']:
-                        channel['min_raw_value'] = min_val
-                        channel['lower_limit'] = min_val
-                        update = True
-                    if max_val > channel['max_raw_value']:
-                        channel['max_raw_value'] = max_val
-                        channel['upper_limit'] = max_val
-                        update = True
-
-                    if update:
-                        stream.seek(address)
-                        stream.write(bytes(channel))
-
+                    types.append(('', signal.dtype, signal.shape[1:]))
                 else:
-                    channel = gp['channels'][i]
-                    if min_val < channel['min_raw_value']:
-                        channel['min_raw_value'] = min_val
-                        channel['lower_limit'] = min_val
-                    if max_val > channel['max_raw_value']:
-                        channel['max_raw_value'] = max_val
-                        channel['upper_limit'] = max_val
+                    types.append(('', signal.dtype))
+                min_val, max_val = get_min_max(signal)
+                self._update_channel_limits(index, i, min_val, max_val)
 
             elif sig_type == v4c.SIGNAL_TYPE_STRING:
                 if self.memory == 'full':
@@ -3253,6 +3985,98 @@ class MDF4(object):
         del fields
         del types
 
+        self._append_raw_records(index, samples)
+
+        del samples
+
+        # the channels limits are outdated
+        self._blocks_cache.clear()
+
+    def _update_channel_limits(self, index, ch_nr, min_val, max_val):
+        """ extend the channel raw value limits with the *min_val* and
+        *max_val* of the new samples
+
+        Parameters
+        ----------
+        index : int
+            group index
+        ch_nr : int
+            channel index
+        min_val : float
+            minimum raw value of the new samples
+        max_val : float
+            maximum raw value of the new samples
+
+        """
+        gp = self.groups[index]
+
+        if self.memory == 'minimum':
+            if gp['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
+                stream = self._file
+            else:
+                stream = self._tempfile
+
+            address = gp['channels'][ch_nr]
+            channel = Channel(
+                address=address,
+                stream=stream,
+                load_metadata=False,
+            )
+
+            update = False
+            if min_val < channel['min_raw_value']:
+                channel['min_raw_value'] = min_val
+                channel['lower_limit'] = min_val
+                update = True
+            if max_val > channel['max_raw_value']:
+                channel['max_raw_value'] = max_val
+                channel['upper_limit'] = max_val
+                update = True
+
+            if update:
+                stream.seek(address)
+                stream.write(bytes(channel))
+
+        else:
+            channel = gp['channels'][ch_nr]
+            if min_val < channel['min_raw_value']:
+                channel['min_raw_value'] = min_val
+                channel['lower_limit'] = min_val
+            if max_val > channel['max_raw_value']:
+                channel['max_raw_value'] = max_val
+                channel['upper_limit'] = max_val
+
+    def _append_raw_records(self, index, samples, update_limits=False):
+        """ append raw records to a group that was created by *append*; the
+        records must have the same layout as the group records
+
+        Parameters
+        ----------
+        index : int
+            group index
+        samples : bytes
+            raw records
+        update_limits : bool
+            extend the scalar channels limits with the values of the new
+            records, like *extend* does; default *False*
+
+        """
+        gp = self.groups[index]
+
+        if update_limits and samples:
+            parents, dtypes = self._prepare_record(gp)
+            records = frombuffer(samples, dtype=dtypes)
+            for i, sig_type in enumerate(gp['signal_types']):
+                if sig_type != v4c.SIGNAL_TYPE_SCALAR:
+                    continue
+                name, bit_offset = parents.get(i, (None, None))
+                if name is None or bit_offset:
+                    continue
+                min_val, max_val = get_min_max(records[name])
+                self._update_channel_limits(index, i, min_val, max_val)
+            del records
+            self._blocks_cache.clear()
+
         if self.memory == 'full':
             samples = gp['data_block']['data'] + samples
             gp['data_block'] = DataBlock(data=samples)
@@ -3266,6 +4090,10 @@ class MDF4(object):
             if 'record' in gp:
                 del gp['record']
         else:
+            if gp['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
+                stream = self._file
+            else:
+                stream = self._tempfile
             stream.seek(0, 2)
             addr = stream.tell()
             gp['data_block'].append(addr)
@@ -3281,7 +4109,9 @@ class MDF4(object):
             gp['data_size'].append(size)
             gp['data_block_size'].append(size)
 
-        del samples
+        # the cached master channel samples, records and signal data of the
+        # extended group are outdated
+        self._cache.clear()
 
     def attach(self,
                data,
@@ -3345,6 +4175,13 @@ class MDF4(object):
         """ if the MDF was created with memory=False and new
         channels have been appended, then this must be called just before the
         object is not used anymore to clean-up the temporary file"""
+        if self._metadata_cache_outdated:
+            self._metadata_cache_outdated = False
+            if self._file is not None and not self._file.closed:
+                self._save_metadata_cache()
+        self._close_memory_map()
+        self._close_decompression_pool()
+        self._close_compression_pool()
         if self._tempfile is not None:
             self._tempfile.close()
         if self._file is not None:
@@ -3478,10 +4315,7 @@ class MDF4(object):
 
         if self.memory == 'minimum':
 
-            channel = Channel(
-                address=channel,
-                stream=stream,
-            )
+            channel = self._read_channel(channel, stream)
 
         conversion = channel.conversion
 
@@ -3545,10 +4379,7 @@ class MDF4(object):
         channel = grp['channels'][ch_nr]
 
         if self.memory == 'minimum':
-            channel = Channel(
-                address=channel,
-                stream=stream,
-            )
+            channel = self._read_channel(channel, stream)
 
         return extract_cncomment_xml(channel.comment)
 
@@ -3584,10 +4415,7 @@ class MDF4(object):
         channel = grp['channels'][ch_nr]
 
         if self.memory == 'minimum':
-            channel = Channel(
-                address=channel,
-                stream=stream,
-            )
+            channel = self._read_channel(channel, stream)
 
         name = channel.name
 
@@ -3615,10 +4443,7 @@ class MDF4(object):
             channel = grp['channels'][ch_nr]
 
             if self.memory == 'minimum':
-                channel = Channel(
-                    address=channel,
-                    stream=stream,
-                )
+                channel = self._read_channel(channel, stream)
         else:
             channel = grp['logging_channels'][-ch_nr -1]
 
@@ -3631,7 +4456,9 @@ class MDF4(object):
             raster=None,
             samples_only=False,
             data=None,
-            raw=False):
+            raw=False,
+            start=None,
+            stop=None):
         """Gets channel samples.
         Channel can be specified in two ways:
 
@@ -3668,6 +4495,13 @@ class MDF4(object):
         raw : bool
             return channel samples without appling the conversion rule; default
             `False`
+        start : float
+            only return the samples with timestamps greater or equal to
+            *start*; for sorted groups only the data blocks that overlap the
+            time interval are read; default *None*
+        stop : float
+            only return the samples with timestamps less or equal to *stop*;
+            default *None*
 
         Returns
         -------
@@ -3753,6 +4587,18 @@ class MDF4(object):
             index,
         )
 
+        if data is None and (start is not None or stop is not None):
+            return get_time_range(
+                self,
+                gp_nr,
+                ch_nr,
+                start,
+                stop,
+                raster=raster,
+                samples_only=samples_only,
+                raw=raw,
+            )
+
         memory = self.memory
         grp = self.groups[gp_nr]
         if grp['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
@@ -3765,17 +4611,11 @@ class MDF4(object):
             # get the channel object
             if memory == 'minimum':
                 if samples_only and raw:
-                    channel = Channel(
-                        address=grp['channels'][ch_nr],
-                        stream=stream,
-                        load_metadata=False,
-                    )
+                    channel = self._get_channel_catalog(grp)[ch_nr]
                 else:
-                    channel = Channel(
-                        address=grp['channels'][ch_nr],
-                        stream=stream,
-                        cc_map=self._cc_map,
-                        si_map=self._si_map,
+                    channel = self._read_channel(
+                        grp['channels'][ch_nr],
+                        stream,
                     )
             else:
                 channel = grp['channels'][ch_nr]
@@ -3789,10 +4629,10 @@ class MDF4(object):
 
             # get data group record
             try:
-                parents, dtypes = grp['parents'], grp['types']
+                parents = grp['parents']
             except KeyError:
                 grp['parents'], grp['types'] = self._prepare_record(grp)
-                parents, dtypes = grp['parents'], grp['types']
+                parents = grp['parents']
 
             # get group data
             if data is None:
@@ -3816,10 +4656,10 @@ class MDF4(object):
         else:
             # get data group record
             try:
-                parents, dtypes = grp['parents'], grp['types']
+                parents = grp['parents']
             except KeyError:
                 grp['parents'], grp['types'] = self._prepare_record(grp)
-                parents, dtypes = grp['parents'], grp['types']
+                parents = grp['parents']
             if data:
                 cycles_nr = len(data[0]) // grp['channel_group']['samples_byte_nr']
             else:
@@ -3855,27 +4695,11 @@ class MDF4(object):
                     for dep in dependency_list):
                 # structure channel composition
 
-                if memory == 'minimum':
-                    names = []
-
-                    for ch_nr, _ in dependency_list:
-                        address = grp['channels'][ch_nr]
-                        channel = Channel(
-                            address=address,
-                            stream=stream,
-                            load_metadata=False,
-                        )
-
-                        name_ = get_text_v4(
-                            address=channel['name_addr'],
-                            stream=stream,
-                        )
-                        names.append(name_)
-                else:
-                    names = [
-                        grp['channels'][ch_nr].name
-                        for ch_nr, _ in dependency_list
-                    ]
+                catalog_names = self._get_channel_catalog(grp).names
+                names = [
+                    catalog_names[ch_nr]
+                    for ch_nr, _ in dependency_list
+                ]
 
                 channel_values = [
                     []
@@ -3969,19 +4793,7 @@ class MDF4(object):
                         parent, bit_offset = None, None
 
                     if parent is not None:
-                        if 'record' not in grp:
-                            if dtypes.itemsize:
-                                record = fromstring(data_bytes, dtype=dtypes)
-                            else:
-                                record = None
-
-                            if self.memory == 'full':
-                                grp['record'] = record
-                        else:
-                            record = grp['record']
-
-                        record.setflags(write=False)
-
+                        record = self._get_record(gp_nr, fragment)
                         vals = record[parent]
                     else:
                         vals = self._get_not_byte_aligned_data(
@@ -4044,12 +4856,7 @@ class MDF4(object):
                                             ['channels']
                                             [ref_ch_nr]
                                         )
-                                        ref_channel = Channel(
-                                            address=address,
-                                            stream=stream,
-                                            cc_map=self._cc_map,
-                                            si_map=self._si_map,
-                                        )
+                                        ref_channel = self._read_channel(address, stream)
                                         axisname = ref_channel.name
                                     else:
                                         axisname = (
@@ -4119,12 +4926,7 @@ class MDF4(object):
                                         ['channels']
                                         [ref_ch_nr]
                                     )
-                                    ref_channel = Channel(
-                                        address=address,
-                                        stream=stream,
-                                        cc_map=self._cc_map,
-                                        si_map=self._si_map,
-                                    )
+                                    ref_channel = self._read_channel(address, stream)
                                     axisname = ref_channel.name
                                 else:
                                     axisname = (
@@ -4303,19 +5105,7 @@ class MDF4(object):
                     bits = channel['bit_count']
 
                     if parent is not None:
-                        if 'record' not in grp:
-                            if dtypes.itemsize:
-                                record = fromstring(data_bytes, dtype=dtypes)
-                            else:
-                                record = None
-
-                            if memory == 'full':
-                                grp['record'] = record
-                        else:
-                            record = grp['record']
-
-                        record.setflags(write=False)
-
+                        record = self._get_record(gp_nr, fragment)
                         vals = record[parent]
 
                         size = vals.dtype.itemsize
@@ -4438,40 +5228,17 @@ class MDF4(object):
 
                 if channel_type == v4c.CHANNEL_TYPE_VLSD:
                     if signal_data:
-                        values = []
-                        for offset in vals:
-                            offset = int(offset)
-                            str_size = unpack_from('<I', signal_data, offset)[0]
-                            values.append(
-                                signal_data[offset + 4: offset + 4 + str_size]
-                            )
+                        vals = pad_vlsd_values(
+                            *get_vlsd_values(signal_data, vals)
+                        )
 
-                        if data_type == v4c.DATA_TYPE_BYTEARRAY:
+                        if data_type != v4c.DATA_TYPE_BYTEARRAY:
 
-                            if PYVERSION >= 3:
-                                values = [
-                                    list(val)
-                                    for val in values
-                                ]
+                            width = vals.shape[1]
+                            if width:
+                                vals = vals.view('S{}'.format(width)).ravel()
                             else:
-                                values = [
-                                    [ord(byte) for byte in val]
-                                    for val in values
-                                ]
-
-                            dim = max(len(arr) for arr in values) if values else 0
-
-                            for lst in values:
-                                lst.extend([0, ] * (dim - len(lst)))
-
-                            vals = array(
-                                values,
-                                dtype=uint8,
-                            )
-
-                        else:
-
-                            vals = array(values)
+                                vals = zeros(len(vals), dtype='S1')
 
                             if data_type == v4c.DATA_TYPE_STRING_UTF_16_BE:
                                 encoding = 'utf-16-be'
@@ -4609,52 +5376,290 @@ class MDF4(object):
             if name is None:
                 name = channel.name
 
-            unit = (
-                conversion and conversion.unit
-                or channel.unit
+            res = Signal(
+                samples=vals,
+                timestamps=timestamps,
+                name=name,
+                conversion=conversion,
+                raw=raw,
+                bit_count=bit_count,
+                **self._get_signal_metadata(gp_nr, channel, conversion)
+            )
+
+        return res
+
+    def _get_signal_metadata(self, index, channel, conversion):
+        """ get the *Signal* keyword arguments that describe the channel
+
+        Parameters
+        ----------
+        index : int
+            group index
+        channel : Channel
+            channel object
+        conversion : ChannelConversion
+            channel conversion
+
+        Returns
+        -------
+        metadata : dict
+            unit, comment, source, attachment, master metadata and display
+            name of the channel
+
+        """
+        unit = (
+            conversion and conversion.unit
+            or channel.unit
+        )
+
+        if unit:
+            unit = unit.strip(' \t\r\n\0')
+
+        source = channel.source
+        cg_source = self.groups[index]['channel_group'].acq_source
+        if source:
+            source = SignalSource(
+                source.name or (cg_source and cg_source.name) or '',
+                source.path,
+                source.comment,
+                source['source_type'],
+                source['bus_type'],
             )
+        else:
+            source = None
+
+        if channel.attachments:
+            attachment = self.extract_attachment(index=channel.attachments[0])
+        else:
+            attachment = ()
+
+        return {
+            'unit': unit,
+            'comment': channel.comment,
+            'source': source,
+            'attachment': attachment,
+            'master_metadata': self._master_channel_metadata.get(index, None),
+            'display_name': channel.display_name,
+        }
+
+    def get_many(self, group, indexes, raw=False):
+        """ get several channels from the same group. The group data is read
+        only once and each data fragment is parsed in a single record array
+        that is shared by all the requested channels. The master and
+        invalidation bytes are also extracted only once for each fragment.
+
+        Parameters
+        ----------
+        group : int
+            0-based group index
+        indexes : iterable
+            0-based channel indexes
+        raw : bool
+            return channel samples without appling the conversion rule;
+            default `False`
+
+        Returns
+        -------
+        signals : list
+            list of *Signal* objects, in the order of the *indexes* argument
+
+        Examples
+        --------
+        >>> from asammdf import MDF, Signal
+        >>> import numpy as np
+        >>> t = np.arange(5)
+        >>> s = np.ones(5)
+        >>> mdf = MDF(version='4.10')
+        >>> mdf.append([Signal(s*i, t, name='Sig{}'.format(i)) for i in range(3)])
+        >>> [sig.name for sig in mdf.get_many(0, [3, 1])]
+        ['Sig2', 'Sig0']
+
+        """
+        gp_nr = group
+        grp = self.groups[gp_nr]
+        memory = self.memory
+        if grp['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
+            stream = self._file
+        else:
+            stream = self._tempfile
 
-            if unit:
-                unit = unit.strip(' \t\r\n\0')
+        indexes = list(indexes)
+        unique_indexes = sorted(set(indexes))
 
-            comment = channel.comment
+        try:
+            parents, dtypes = grp['parents'], grp['types']
+        except KeyError:
+            grp['parents'], grp['types'] = self._prepare_record(grp)
+            parents, dtypes = grp['parents'], grp['types']
+
+        # the channel metadata and the record field processing are
+        # computed only once for each requested channel
+        channels = {}
+        plain_channels = {}
+        invalidation_channels = set()
+        for ch_nr in unique_indexes:
+            if ch_nr < 0:
+                channels[ch_nr] = grp['logging_channels'][-ch_nr - 1]
+                continue
 
-            source = channel.source
-            cg_source = grp['channel_group'].acq_source
-            if source:
-                source = SignalSource(
-                    source.name or (cg_source and cg_source.name) or '',
-                    source.path,
-                    source.comment,
-                    source['source_type'],
-                    source['bus_type'],
+            if memory == 'minimum':
+                channel = self._read_channel(grp['channels'][ch_nr], stream)
+            else:
+                channel = grp['channels'][ch_nr]
+            channels[ch_nr] = channel
+
+            if (channel['flags']
+                    & (v4c.FLAG_INVALIDATION_BIT_VALID | v4c.FLAG_ALL_SAMPLES_VALID)
+                    == v4c.FLAG_INVALIDATION_BIT_VALID):
+                invalidation_channels.add(ch_nr)
+
+            parent, bit_offset = parents.get(ch_nr, (None, None))
+            if (parent is None
+                    or grp['channel_dependencies'][ch_nr]
+                    or channel['channel_type'] not in (v4c.CHANNEL_TYPE_VALUE,
+                                                       v4c.CHANNEL_TYPE_MASTER)
+                    or channel['data_type'] > v4c.DATA_TYPE_REAL_MOTOROLA):
+                continue
+
+            bits = channel['bit_count']
+            field = dtypes[parent]
+            size = field.itemsize
+            kind = field.kind
+            if kind in 'ui' or kind == 'f' and not bit_offset and bits == size * 8:
+                if bits == 1 and self._single_bit_uint_as_bool:
+                    channel_dtype = dtype(bool)
+                else:
+                    channel_dtype = dtype(
+                        get_fmt_v4(
+                            channel['data_type'],
+                            bits,
+                            channel['channel_type'],
+                        )
+                    )
+                plain_channels[ch_nr] = (
+                    parent,
+                    bit_offset,
+                    bits,
+                    size,
+                    kind,
+                    channel['data_type'] in v4c.SIGNED_INT,
+                    channel_dtype,
                 )
+
+        channel_values = {ch_nr: [] for ch_nr in unique_indexes}
+        valid_indexes = {ch_nr: [] for ch_nr in invalidation_channels}
+        timestamps = []
+
+        previous_record = grp.pop('record', None)
+        try:
+            for fragment in self._load_group_data(grp):
+                grp.pop('record', None)
+                grp['record'] = record = self._get_record(gp_nr, fragment)
+
+                timestamps.append(self.get_master(gp_nr, fragment))
+
+                if invalidation_channels:
+                    valid_masks = self.get_valid_masks(gp_nr, fragment)
+
+                for ch_nr in unique_indexes:
+                    if ch_nr in plain_channels:
+                        (parent, bit_offset, bits,
+                         size, kind, signed, channel_dtype) = plain_channels[ch_nr]
+
+                        vals = record[parent]
+                        if bit_offset:
+                            if kind == 'i':
+                                vals = vals.astype(dtype('<u{}'.format(size)))
+                                vals >>= bit_offset
+                            else:
+                                vals = vals >> bit_offset
+                        if not bits == size * 8:
+                            if signed:
+                                vals = as_non_byte_sized_signed_int(vals, bits)
+                            else:
+                                vals = vals & ((1 << bits) - 1)
+                        if vals.dtype != channel_dtype:
+                            vals = vals.astype(channel_dtype)
+                        elif vals.base is not None:
+                            vals = vals.copy()
+
+                        if ch_nr in invalidation_channels:
+                            valid = valid_masks[ch_nr]
+                            valid_indexes[ch_nr].append(valid)
+                            vals = vals[valid]
+
+                    else:
+                        vals = self.get(
+                            group=gp_nr,
+                            index=ch_nr,
+                            data=fragment,
+                            samples_only=True,
+                            raw=raw,
+                        )
+                        if ch_nr in invalidation_channels:
+                            valid_indexes[ch_nr].append(valid_masks[ch_nr])
+
+                    channel_values[ch_nr].append(vals)
+        finally:
+            if previous_record is None:
+                grp.pop('record', None)
             else:
-                source = None
+                grp['record'] = previous_record
+
+        if not timestamps:
+            return [self.get(group=gp_nr, index=ch_nr, raw=raw) for ch_nr in indexes]
 
-            if channel.attachments:
-                attachment = self.extract_attachment(index=channel.attachments[0])
+        if len(timestamps) > 1:
+            master = concatenate(timestamps)
+        else:
+            master = timestamps[0]
+
+        signals = {}
+        for ch_nr in unique_indexes:
+            channel = channels[ch_nr]
+            values = channel_values[ch_nr]
+            if len(values) > 1:
+                vals = concatenate(values)
             else:
-                attachment = ()
+                vals = values[0]
 
-            master_metadata = self._master_channel_metadata.get(gp_nr, None)
+            if ch_nr in invalidation_channels:
+                ch_timestamps = concatenate([
+                    fragment_timestamps[valid]
+                    for fragment_timestamps, valid in zip(timestamps, valid_indexes[ch_nr])
+                ])
+            else:
+                ch_timestamps = master
 
-            res = Signal(
+            conversion = channel.conversion
+            if conversion is None:
+                conversion_type = v4c.CONVERSION_TYPE_NON
+            else:
+                conversion_type = conversion['conversion_type']
+
+            ch_raw = raw
+            if ch_nr >= 0 and grp['channel_dependencies'][ch_nr]:
+                pass
+            elif conversion_type in (
+                    v4c.CONVERSION_TYPE_TTAB,
+                    v4c.CONVERSION_TYPE_TABX,
+                    v4c.CONVERSION_TYPE_RTABX):
+                ch_raw = True
+            elif ch_nr in plain_channels and not raw \
+                    and conversion_type != v4c.CONVERSION_TYPE_NON:
+                vals = conversion.convert(vals)
+
+            signals[ch_nr] = Signal(
                 samples=vals,
-                timestamps=timestamps,
-                unit=unit,
-                name=name,
-                comment=comment,
+                timestamps=ch_timestamps,
+                name=channel.name,
                 conversion=conversion,
-                raw=raw,
-                master_metadata=master_metadata,
-                attachment=attachment,
-                source=source,
-                display_name=channel.display_name,
-                bit_count=bit_count,
+                raw=ch_raw,
+                bit_count=channel['bit_count'],
+                **self._get_signal_metadata(gp_nr, channel, conversion)
             )
 
-        return res
+        return [signals[ch_nr] for ch_nr in indexes]
 
     def get_master(self, index, data=None, raster=None):
         """ returns master channel samples for given group
@@ -4678,7 +5683,9 @@ class MDF4(object):
         if fragment:
             data_bytes, offset = fragment
             try:
-                timestamps = self._master_channel_cache[(index, offset)]
+                timestamps = self._master_channel_cache[
+                    (index, offset, len(data_bytes))
+                ]
                 if raster and timestamps:
                     timestamps = arange(
                         timestamps[0],
@@ -4732,11 +5739,9 @@ class MDF4(object):
 
             time_ch = group['channels'][time_ch_nr]
             if memory == 'minimum':
-                time_ch = Channel(
-                    address=group['channels'][time_ch_nr],
-                    stream=stream,
-                    cc_map=self._cc_map,
-                    si_map=self._si_map,
+                time_ch = self._read_channel(
+                    group['channels'][time_ch_nr],
+                    stream,
                 )
             time_conv = time_ch.conversion
             time_name = time_ch.name
@@ -4777,18 +5782,7 @@ class MDF4(object):
                     except KeyError:
                         parent = None
                     if parent is not None:
-                        not_found = object()
-                        record = group.get('record', not_found)
-                        if record is not_found:
-                            if dtypes.itemsize:
-                                record = fromstring(data_bytes, dtype=dtypes)
-                            else:
-                                record = None
-
-                            if memory == 'full':
-                                group['record'] = record
-
-                        record.setflags(write=False)
+                        record = self._get_record(index, fragment)
                         t = record[parent]
                     else:
                         t = self._get_not_byte_aligned_data(
@@ -4816,7 +5810,7 @@ class MDF4(object):
             self._master_channel_cache[index] = t
         else:
             data_bytes, offset = original_data
-            self._master_channel_cache[(index, offset)] = t
+            self._master_channel_cache[(index, offset, len(data_bytes))] = t
 
         if raster and t.size:
             timestamps = arange(
@@ -4844,23 +5838,14 @@ class MDF4(object):
             .strip(' \n\t\0')
         info['groups'] = len(self.groups)
         for i, gp in enumerate(self.groups):
-            if gp['data_location'] == v4c.LOCATION_ORIGINAL_FILE:
-                stream = self._file
-            elif gp['data_location'] == v4c.LOCATION_TEMPORARY_FILE:
-                stream = self._tempfile
             inf = {}
             info['group {}'.format(i)] = inf
             inf['cycles'] = gp['channel_group']['cycles_nr']
             inf['channels count'] = len(gp['channels'])
-            for j, channel in enumerate(gp['channels']):
-                if self.memory == 'minimum':
-                    channel = Channel(
-                        address=channel,
-                        stream=stream,
-                    )
-                name = channel.name
-
-                ch_type = v4c.CHANNEL_TYPE_TO_DESCRIPTION[channel['channel_type']]
+            catalog = self._get_channel_catalog(gp)
+            channel_types = catalog.fields['channel_type'].tolist()
+            for j, (name, ch_type) in enumerate(zip(catalog.names, channel_types)):
+                ch_type = v4c.CHANNEL_TYPE_TO_DESCRIPTION[ch_type]
                 inf['channel {}'.format(j)] = 'name="{}" type={}'.format(
                     name,
                     ch_type,
@@ -4921,6 +5906,10 @@ class MDF4(object):
 
         self.configure(read_fragment_size=_read_fragment_size)
 
+        # the channel blocks addresses and links were updated
+        for group in self.groups:
+            group.pop('catalog', None)
+
         if self._callback:
             self._callback(100, 100)
 
@@ -5085,72 +6074,39 @@ class MDF4(object):
                     }
                     dl_block = DataList(**kargs)
 
-                    cur_data = b''
-
                     if self.memory == 'low':
-                        for i in range(chunks):
-                            while len(cur_data) < split_size:
-                                try:
-                                    cur_data += next(data)[0]
-                                except StopIteration:
-                                    break
-
-                            data_, cur_data = cur_data[:split_size], cur_data[split_size:]
-                            if compression and self.version > '4.00':
-                                if compression == 1:
-                                    zip_type = v4c.FLAG_DZ_DEFLATE
-                                else:
-                                    zip_type = v4c.FLAG_DZ_TRANPOSED_DEFLATE
-                                if compression == 1:
-                                    param = 0
-                                else:
-                                    param = gp['channel_group']['samples_byte_nr']
-                                kargs = {
-                                    'data': data_,
-                                    'zip_type': zip_type,
-                                    'param': param,
-                                }
-                                block = DataZippedBlock(**kargs)
-                            else:
-                                block = DataBlock(data=data_)
-                            address = tell()
-                            block.address = address
-
-                            write(bytes(block))
-
-                            align = block['block_len'] % 8
-                            if align:
-                                write(b'\0' * (8 - align))
-                            dl_block['data_block_addr{}'.format(i)] = address
+                        chunks_data = split_data_fragments(data, split_size, chunks)
                     else:
                         cur_data = next(data)[0]
-                        for i in range(chunks):
+                        chunks_data = (
+                            cur_data[i*split_size: (i + 1) * split_size]
+                            for i in range(chunks)
+                        )
 
-                            data_ = cur_data[i*split_size: (i + 1) * split_size]
-                            if compression and self.version > '4.00':
-                                if compression == 1:
-                                    zip_type = v4c.FLAG_DZ_DEFLATE
-                                    param = 0
-                                else:
-                                    zip_type = v4c.FLAG_DZ_TRANPOSED_DEFLATE
-                                    param = gp['channel_group']['samples_byte_nr']
-                                kargs = {
-                                    'data': data_,
-                                    'zip_type': zip_type,
-                                    'param': param,
-                                }
-                                block = DataZippedBlock(**kargs)
-                            else:
-                                block = DataBlock(data=data_)
-                            address = tell()
-                            block.address = address
+                    # the chunks are compressed by the compression pool (if
+                    # configured) and are written in the original order
+                    build_block = partial(
+                        self._build_data_block,
+                        compression=compression,
+                        param=gp['channel_group']['samples_byte_nr'],
+                    )
+                    blocks = ordered_imap(
+                        build_block,
+                        chunks_data,
+                        pool=self._get_compression_pool(),
+                        window=2 * self._compression_threads,
+                    )
 
-                            write(bytes(block))
+                    for i, block in enumerate(blocks):
+                        address = tell()
+                        block.address = address
 
-                            align = block['block_len'] % 8
-                            if align:
-                                write(b'\0' * (8 - align))
-                            dl_block['data_block_addr{}'.format(i)] = address
+                        write(bytes(block))
+
+                        align = block['block_len'] % 8
+                        if align:
+                            write(b'\0' * (8 - align))
+                        dl_block['data_block_addr{}'.format(i)] = address
 
                     address = tell()
                     dl_block.address = address
@@ -5483,7 +6439,8 @@ class MDF4(object):
             self.file_comment = None
 
             self._ch_map = {}
-            self._master_channel_cache = {}
+            self._cache.clear()
+            self._blocks_cache.clear()
 
             self._tempfile = TemporaryFile()
             self._file = open(self.name, 'rb')
@@ -5647,32 +6604,23 @@ class MDF4(object):
                     }
                     dl_block = DataList(**kargs)
 
-                    cur_data = b''
+                    chunks_data = split_data_fragments(data, split_size, chunks)
 
-                    for i in range(chunks):
-                        while len(cur_data) < split_size:
-                            try:
-                                cur_data += next(data)[0]
-                            except StopIteration:
-                                break
+                    # the chunks are compressed by the compression pool (if
+                    # configured) and are written in the original order
+                    build_block = partial(
+                        self._build_data_block,
+                        compression=compression,
+                        param=gp['channel_group']['samples_byte_nr'],
+                    )
+                    blocks = ordered_imap(
+                        build_block,
+                        chunks_data,
+                        pool=self._get_compression_pool(),
+                        window=2 * self._compression_threads,
+                    )
 
-                        data_, cur_data = cur_data[:split_size], cur_data[split_size:]
-                        if compression and self.version > '4.00':
-                            if compression == 1:
-                                zip_type = v4c.FLAG_DZ_DEFLATE
-                                param = 0
-                            else:
-                                zip_type = v4c.FLAG_DZ_TRANPOSED_DEFLATE
-                                param = gp['channel_group']['samples_byte_nr']
-
-                            kargs = {
-                                'data': data_,
-                                'zip_type': zip_type,
-                                'param': param,
-                            }
-                            block = DataZippedBlock(**kargs)
-                        else:
-                            block = DataBlock(data=data_)
+                    for i, block in enumerate(blocks):
                         address = tell()
                         block.address = address
 
@@ -6049,7 +6997,8 @@ class MDF4(object):
             self.file_comment = None
 
             self._ch_map = {}
-            self._master_channel_cache = {}
+            self._cache.clear()
+            self._blocks_cache.clear()
 
             self._tempfile = TemporaryFile()
             self._file = open(self.name, 'rb')
@@ -0,0 +1,401 @@
+# -*- coding: utf-8 -*-
+""" ASAM MDF version 4 streaming writer module """
+
+from __future__ import division, print_function
+
+from . import v4_constants as v4c
+from .mdf_v4 import MDF4
+from .utils import MdfException, validate_version_argument
+from .v4_blocks import (
+    DataBlock,
+    DataList,
+    HeaderList,
+)
+
+
+__all__ = ['MDF4Writer', ]
+
+
+# number of data blocks referenced by each DL block
+DATA_LIST_LINKS = 256
+
+# unfinalized flags set while the measurement is recorded: update of the
+# cycle counters for CG blocks and update of the last DL block
+UNFINALIZED_FLAGS = 1 | 1 << 4
+
+
+class MDF4Writer(object):
+    """ append-only MDF4 writer that streams the measurement data to the
+    output file. The channel groups are defined with the *append* method;
+    the first call to *extend* writes the header and the DG, CG and CN
+    blocks and then each *extend* call appends the new records to the file
+    as DT (or DZ) blocks referenced by chained DL blocks. The memory usage
+    does not depend on the measurement length: at most one data block worth
+    of records is buffered for each channel group.
+
+    The file is marked as unfinalized while the measurement is recorded and
+    the cycle counters, the channels limits and the finalization flags are
+    updated by the *close* method.
+
+    Only fixed size channels are supported (no VLSD string channels).
+
+    Parameters
+    ----------
+    name : string
+        output file name
+    version : string
+        mdf file version ('4.00', '4.10', '4.11'); default '4.10'
+    compression : int
+        compression option for the data blocks; only used for versions
+        higher than 4.00:
+
+        * 0 - no compression
+        * 1 - deflate
+        * 2 - transposition + deflate
+    write_fragment_size : int
+        size hint of the data blocks written to the file; default 4MB
+    overwrite : bool
+        overwrite the output file if it already exists; default *False*
+
+    Examples
+    --------
+    >>> with MDF4Writer('live.mf4') as writer:
+    ...     index = writer.append([sig1, sig2])
+    ...     for t, s1, s2 in acquisition():
+    ...         writer.extend(index, [t, s1, s2])
+
+    """
+
+    def __init__(
+            self,
+            name,
+            version='4.10',
+            compression=0,
+            write_fragment_size=4 * 2**20,
+            overwrite=False):
+
+        version = validate_version_argument(version)
+        if version not in ('4.00', '4.10', '4.11'):
+            message = 'MDF4Writer only supports MDF version 4 files, not "{}"'
+            raise MdfException(message.format(version))
+
+        self.name = name
+        self.version = version
+        self.compression = compression if version > '4.00' else 0
+
+        self._write_fragment_size = int(write_fragment_size)
+        self._overwrite = overwrite
+        self._mdf = MDF4(version=version, memory='full')
+        self._file = None
+        self._states = []
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    @property
+    def header(self):
+        """ MDF4 header block """
+        return self._mdf.header
+
+    def append(self, signals, source_info='Python', common_timebase=False):
+        """ define a new channel group. The samples of the *Signal* objects
+        are the first records of the channel group. The channel groups can
+        only be defined before the first call to *extend*
+
+        Parameters
+        ----------
+        signals : list
+            list on *Signal* objects
+        source_info : str
+            source information; default 'Python'
+        common_timebase : bool
+            flag to hint that the signals have the same timebase
+
+        Returns
+        -------
+        index : int
+            new channel group index
+
+        """
+        if self._file is not None:
+            message = (
+                'Channel groups must be appended before the data '
+                'streaming is started'
+            )
+            raise MdfException(message)
+
+        mdf = self._mdf
+        index = len(mdf.groups)
+        mdf.append(signals, source_info, common_timebase)
+
+        for gp in mdf.groups[index:]:
+            for sig_type in gp['signal_types']:
+                if sig_type not in (
+                        v4c.SIGNAL_TYPE_SCALAR,
+                        v4c.SIGNAL_TYPE_CANOPEN,
+                        v4c.SIGNAL_TYPE_STRUCTURE_COMPOSITION,
+                        v4c.SIGNAL_TYPE_ARRAY):
+                    del mdf.groups[index:]
+                    message = 'MDF4Writer only supports fixed size channels'
+                    raise MdfException(message)
+
+        for gp in mdf.groups[index:]:
+            channel_group = gp['channel_group']
+            record_size = channel_group['samples_byte_nr']
+            record_size += channel_group['invalidation_bytes_nr']
+
+            split_size = self._write_fragment_size // record_size
+            split_size = max(split_size, 1) * record_size
+
+            self._states.append({
+                'record_size': record_size,
+                'split_size': split_size,
+                'buffer': [gp['data_block']['data']],
+                'buffer_size': len(gp['data_block']['data']),
+                'cycles_nr': 0,
+                'data_list': None,
+                'data_list_nr': 0,
+            })
+            gp['data_block'] = DataBlock(data=b'')
+            channel_group['cycles_nr'] = 0
+
+        return index
+
+    def extend(self, index, signals):
+        """ append new records to a channel group. The first array is the
+        master channel's samples, and the next arrays must respect the same
+        order in which the signals were appended (see *MDF4.extend*)
+
+        Parameters
+        ----------
+        index : int
+            channel group index
+        signals : list
+            list of numpy.ndarray objects
+
+        """
+        if self._closed:
+            raise MdfException('The MDF4Writer is closed')
+        if self._file is None:
+            self._start()
+
+        gp = self._mdf.groups[index]
+        state = self._states[index]
+
+        self._mdf.extend(index, signals)
+        data = gp['data_block']['data']
+        gp['data_block'] = DataBlock(data=b'')
+
+        state['buffer'].append(data)
+        state['buffer_size'] += len(data)
+
+        if state['buffer_size'] >= state['split_size']:
+            self._flush(index)
+
+    def close(self):
+        """ write the buffered records, update the cycle counters and the
+        channels limits and mark the file as finalized """
+        if self._closed:
+            return
+        if self._file is None:
+            self._start()
+
+        stream = self._file
+        for index, gp in enumerate(self._mdf.groups):
+            self._flush(index, final=True)
+            self._finalize_data_list(index)
+
+            for channel in gp['channels']:
+                stream.seek(channel.address)
+                stream.write(bytes(channel))
+
+        identification = self._mdf.identification
+        identification['file_identification'] = b'MDF     '
+        identification['unfinalized_standard_flags'] = 0
+        stream.seek(0)
+        stream.write(bytes(identification))
+
+        stream.close()
+        self._mdf.close()
+        self._closed = True
+
+    def _start(self):
+        """ write the file metadata and open the file for data streaming """
+        mdf = self._mdf
+
+        # the groups have no data, so only an empty placeholder block is
+        # written for each group before the metadata blocks
+        mdf._write_fragment_size = 0
+        self.name = mdf.save(self.name, overwrite=self._overwrite)
+
+        self._file = stream = open(self.name, 'r+b')
+
+        identification = mdf.identification
+        identification['file_identification'] = b'UnFinMF '
+        identification['unfinalized_standard_flags'] = UNFINALIZED_FLAGS
+        stream.seek(0)
+        stream.write(bytes(identification))
+
+        for index in range(len(mdf.groups)):
+            self._flush(index)
+
+    def _flush(self, index, final=False):
+        """ write the buffered records of a group as data blocks
+
+        Parameters
+        ----------
+        index : int
+            channel group index
+        final : bool
+            also write the last, incomplete, data block
+
+        """
+        state = self._states[index]
+        split_size = state['split_size']
+
+        if state['buffer_size'] < split_size and not (final and state['buffer_size']):
+            if final:
+                self._update_group(index)
+            return
+
+        data = b''.join(state['buffer'])
+        position = 0
+        size = len(data)
+        while size - position >= split_size or final and position < size:
+            self._write_block(index, data[position: position + split_size])
+            position += split_size
+
+        data = data[position:]
+        state['buffer'] = [data]
+        state['buffer_size'] = len(data)
+
+        self._update_group(index)
+
+    def _write_block(self, index, data):
+        """ append a data block to the file and link it in the group's
+        current DL block
+
+        Parameters
+        ----------
+        index : int
+            channel group index
+        data : bytes
+            records bytes
+
+        """
+        stream = self._file
+        gp = self._mdf.groups[index]
+        state = self._states[index]
+
+        block = self._mdf._build_data_block(
+            data,
+            self.compression,
+            state['record_size'],
+        )
+
+        stream.seek(0, 2)
+        address = stream.tell()
+        block.address = address
+        stream.write(bytes(block))
+        align = block['block_len'] % 8
+        if align:
+            stream.write(b'\0' * (8 - align))
+
+        state['cycles_nr'] += len(data) // state['record_size']
+
+        data_list = state['data_list']
+        if data_list is None or state['data_list_nr'] == DATA_LIST_LINKS:
+            new_data_list = DataList(
+                flags=v4c.FLAG_DL_EQUAL_LENGHT,
+                links_nr=DATA_LIST_LINKS + 1,
+                data_block_nr=0,
+                data_block_len=state['split_size'],
+            )
+            new_data_list.address = stream.tell()
+            stream.write(bytes(new_data_list))
+
+            if data_list is None:
+                # the first DL block is referenced by the data group (or by
+                # the HL block if the data blocks are compressed)
+                if self.compression:
+                    header_list = HeaderList(
+                        flags=v4c.FLAG_DL_EQUAL_LENGHT,
+                        zip_type=(
+                            v4c.FLAG_DZ_DEFLATE
+                            if self.compression == 1
+                            else v4c.FLAG_DZ_TRANPOSED_DEFLATE
+                        ),
+                        first_dl_addr=new_data_list.address,
+                    )
+                    first_address = stream.tell()
+                    stream.write(bytes(header_list))
+                else:
+                    first_address = new_data_list.address
+
+                data_group = gp['data_group']
+                data_group['data_block_addr'] = first_address
+                stream.seek(data_group.address)
+                stream.write(bytes(data_group))
+            else:
+                data_list['next_dl_addr'] = new_data_list.address
+                stream.seek(data_list.address)
+                stream.write(bytes(data_list))
+
+            state['data_list'] = data_list = new_data_list
+            state['data_list_nr'] = 0
+
+        data_list['data_block_addr{}'.format(state['data_list_nr'])] = address
+        state['data_list_nr'] += 1
+        data_list['data_block_nr'] = state['data_list_nr']
+        stream.seek(data_list.address)
+        stream.write(bytes(data_list))
+
+    def _finalize_data_list(self, index):
+        """ rewrite the group's last DL block with the number of links of
+        the data blocks it actually references; the DL blocks are written
+        with room for *DATA_LIST_LINKS* data blocks while recording
+
+        Parameters
+        ----------
+        index : int
+            channel group index
+
+        """
+        state = self._states[index]
+        data_list = state['data_list']
+        if data_list is None or state['data_list_nr'] == DATA_LIST_LINKS:
+            return
+
+        stream = self._file
+        data_block_nr = state['data_list_nr']
+
+        last_data_list = DataList(
+            flags=v4c.FLAG_DL_EQUAL_LENGHT,
+            links_nr=data_block_nr + 1,
+            data_block_nr=data_block_nr,
+            data_block_len=data_list['data_block_len'],
+            **{
+                'data_block_addr{}'.format(i): data_list['data_block_addr{}'.format(i)]
+                for i in range(data_block_nr)
+            }
+        )
+        last_data_list.address = data_list.address
+
+        # the unused links at the end of the initial block are cleared
+        stream.seek(data_list.address)
+        stream.write(bytes(last_data_list))
+        stream.write(b'\0' * (data_list['block_len'] - last_data_list['block_len']))
+
+        state['data_list'] = last_data_list
+
+    def _update_group(self, index):
+        """ update the channel group's cycle counter in the file """
+        stream = self._file
+        channel_group = self._mdf.groups[index]['channel_group']
+        channel_group['cycles_nr'] = self._states[index]['cycles_nr']
+        stream.seek(channel_group.address)
+        stream.write(bytes(channel_group))
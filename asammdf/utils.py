@@ -4,18 +4,38 @@ asammdf utility functions and classes
 '''
 
 import string
+import sys
 import warnings
 import xml.etree.ElementTree as ET
 
-from collections import namedtuple
-from struct import unpack
+from collections import OrderedDict, deque, namedtuple
+from struct import unpack, unpack_from
 from warnings import warn
 
 from numpy import (
     amin,
     amax,
+    arange,
+    array,
+    concatenate,
+    cumsum,
+    diff,
+    float64,
+    frombuffer,
+    int64,
+    ndarray,
+    ones,
+    repeat,
+    searchsorted,
+    uint8,
+    uint64,
+    zeros,
+    uint32,
     where,
 )
+from numpy.lib.stride_tricks import as_strided
+from numexpr import evaluate
+from numexpr.necompiler import NumExpr, getExprNames, getType
 
 from . import v2_v3_constants as v3c
 from . import v4_constants as v4c
@@ -24,6 +44,8 @@ __all__ = [
     'CHANNEL_COUNT',
     'CONVERT_LOW',
     'CONVERT_MINIMUM',
+    'ConversionKernel',
+    'LRUCache',
     'MERGE_LOW',
     'MERGE_MINIMUM',
     'MdfException',
@@ -31,7 +53,20 @@ __all__ = [
     'get_fmt_v3',
     'get_fmt_v4',
     'get_min_max',
+    'extract_bit_field',
+    'get_record_offsets',
+    'get_records',
+    'get_vlsd_values',
+    'pad_vlsd_values',
+    'ordered_imap',
+    'split_data_fragments',
+    'get_data_reader',
+    'iter_blocks_range',
+    'get_time_index',
+    'load_group_data_range',
+    'get_time_range',
     'get_unique_name',
+    'get_unique_names',
     'get_text_v4',
     'fix_dtype_fields',
     'fmt_to_datatype_v3',
@@ -96,6 +131,15 @@ MDF2_VERSIONS = ('2.00', '2.10', '2.14')
 MDF3_VERSIONS = ('3.00', '3.10', '3.20', '3.30')
 MDF4_VERSIONS = ('4.00', '4.10', '4.11')
 SUPPORTED_VERSIONS = MDF2_VERSIONS + MDF3_VERSIONS + MDF4_VERSIONS
+
+PYVERSION = sys.version_info[0]
+
+RECORD_ID_FMT = {
+    1: '<B',
+    2: '<H',
+    4: '<I',
+    8: '<Q',
+}
 VALID_MEMORY_ARGUMENT_VALUES = ('full', 'low', 'minimum')
 
 
@@ -108,6 +152,110 @@ SignalSource = namedtuple(
 )
 
 
+class ConversionKernel(
+        namedtuple(
+            'ConversionKernel',
+            [
+                'conversion_type',
+                'tables',
+                'expression',
+                'variable',
+                'constants',
+                'programs',
+            ],
+        )):
+    """ immutable conversion kernel compiled from a conversion block. It
+    holds the prebuilt numpy lookup tables and the numexpr program of the
+    conversion formula, so that the conversion block parameters are only
+    parsed once and not for each converted fragment.
+
+    Parameters
+    ----------
+    conversion_type : int
+        conversion block type
+    tables : tuple
+        conversion type specific prebuilt tables
+    expression : str
+        numexpr formula; default *None*
+    variable : str
+        formula variable name for the raw values; default 'X'
+    constants : dict
+        formula parameters values; default *None*
+
+    """
+
+    __slots__ = ()
+
+    def __new__(
+            cls,
+            conversion_type,
+            tables=(),
+            expression=None,
+            variable='X',
+            constants=None):
+        if expression is not None:
+            constants = constants or {}
+            names = getExprNames(expression, {})[0]
+            constants = {
+                name: array(constants[name])
+                for name in names
+                if name in constants
+            }
+            if variable not in names:
+                variable = None
+        else:
+            constants = {}
+
+        for table in tables:
+            if isinstance(table, ndarray):
+                table.flags.writeable = False
+
+        return super(ConversionKernel, cls).__new__(
+            cls,
+            conversion_type,
+            tuple(tables),
+            expression,
+            variable,
+            constants,
+            {},
+        )
+
+    def evaluate(self, values):
+        """ evaluate the conversion formula
+
+        Parameters
+        ----------
+        values : numpy.array
+            raw values
+
+        Returns
+        -------
+        values : numpy.array
+            formula result
+
+        """
+        # constant formula
+        if self.variable is None:
+            return evaluate(self.expression, local_dict=self.constants)
+
+        names = sorted(self.constants)
+        arguments = [self.constants[name] for name in names]
+        names.append(self.variable)
+        arguments.append(values)
+
+        signature = tuple(getType(arg) for arg in arguments)
+        try:
+            program = self.programs[signature]
+        except KeyError:
+            program = NumExpr(
+                self.expression,
+                signature=list(zip(names, signature)),
+            )
+            self.programs[signature] = program
+
+        return program(*arguments)
+
+
 class MdfException(Exception):
     """MDF Exception class"""
     pass
@@ -599,6 +747,40 @@ def get_unique_name(used_names, name):
     return unique_name
 
 
+def get_unique_names(names):
+    """ make the names unique in order, the same way as successive
+    *get_unique_name* calls, but without rescanning the suffixes of the
+    names that occur many times
+
+    Parameters
+    ----------
+    names : list
+        names to be made unique
+
+    Returns
+    -------
+    unique_names : list
+        new unique names
+
+    """
+    used_names = set()
+    suffixes = {}
+    unique_names = []
+    for name in names:
+        unique_name = name
+        if unique_name in used_names:
+            i = suffixes.get(name, 0)
+            unique_name = "{}_{}".format(name, i)
+            while unique_name in used_names:
+                i += 1
+                unique_name = "{}_{}".format(name, i)
+            suffixes[name] = i + 1
+        used_names.add(unique_name)
+        unique_names.append(unique_name)
+
+    return unique_names
+
+
 def get_min_max(samples):
     """ return min and max values for samples. If the samples are
     string return min>max
@@ -655,6 +837,965 @@ def as_non_byte_sized_signed_int(integer_array, bit_length):
     )
 
 
+def extract_bit_field(
+        data,
+        record_size,
+        byte_offset,
+        bit_offset,
+        bit_count,
+        big_endian=False,
+        signed=False):
+    """ extract a not byte aligned integer field from all the records. The
+    smallest 1, 2, 4 or 8 bytes word that contains the field bytes is read
+    for each record through a strided view of the data, and the field value
+    is then obtained using a shift and a mask in the native integer width.
+
+    Parameters
+    ----------
+    data : bytes
+        records bytes
+    record_size : int
+        record size in bytes
+    byte_offset : int
+        field byte offset inside the record
+    bit_offset : int
+        field bit offset inside the first field byte (0 to 7)
+    bit_count : int
+        field bit count
+    big_endian : bool
+        Motorola (big endian) byte order; default *False*
+    signed : bool
+        apply the two's complement sign extension; default *False*
+
+    Returns
+    -------
+    vals : numpy.array | None
+        native byte order integer array with the smallest 1, 2, 4 or 8 bytes
+        size that fits *bit_count*; *None* if the field spans more than 8
+        bytes
+
+    """
+    byte_count = (bit_offset + bit_count + 7) >> 3
+
+    for size in (1, 2, 4, 8):
+        if size >= byte_count:
+            break
+    else:
+        return None
+
+    cycles_nr = len(data) // record_size
+    fmt = '{}u{}'.format('>' if big_endian else '<', size)
+
+    # the containing word ends with the field's last byte for Motorola and
+    # starts with the field's first byte for Intel byte order. The extra
+    # bytes hold only higher order bits so they are discarded by the mask
+    if big_endian:
+        start = byte_offset + byte_count - size
+        aligned = start >= 0
+    else:
+        start = byte_offset
+        aligned = start + size <= record_size
+
+    if aligned and cycles_nr:
+        vals = ndarray(
+            shape=(cycles_nr, ),
+            dtype=fmt,
+            buffer=data,
+            offset=start,
+            strides=(record_size, ),
+        )
+    else:
+        # the word would go past the record so the field bytes are copied
+        # to a zero padded buffer
+        records = frombuffer(data, dtype=uint8, count=cycles_nr * record_size)
+        records = records.reshape((cycles_nr, record_size))
+        words = zeros((cycles_nr, size), dtype=uint8)
+        if big_endian:
+            words[:, size - byte_count:] = records[:, byte_offset: byte_offset + byte_count]
+        else:
+            words[:, :byte_count] = records[:, byte_offset: byte_offset + byte_count]
+        vals = words.view(fmt).ravel()
+
+    vals = vals.astype('u{}'.format(size))
+    if bit_offset:
+        vals >>= bit_offset
+    if bit_count < size << 3:
+        vals &= (1 << bit_count) - 1
+
+    # the field can need a smaller word than its containing bytes
+    for bit_size in (8, 16, 32, 64):
+        if bit_size >= bit_count:
+            break
+    if bit_size < size << 3:
+        size = bit_size >> 3
+        vals = vals.astype('u{}'.format(size))
+
+    if signed:
+        shift = (size << 3) - bit_count
+        vals = vals.view('i{}'.format(size))
+        if shift:
+            vals <<= shift
+            vals >>= shift
+
+    return vals
+
+
+def get_record_offsets(data, record_id_nr, record_sizes, trailing_id_nr=0):
+    """ scan the records of an unsorted data block in a single pass and
+    return the record offsets for all the record ids
+
+    Parameters
+    ----------
+    data : bytes
+        unsorted data block bytes
+    record_id_nr : int
+        record id size in bytes (1, 2, 4 or 8)
+    record_sizes : dict
+        for each record id key the value is the record size without the
+        record id; a size of 0 marks a VLSD record that starts with its
+        4 bytes length
+    trailing_id_nr : int
+        size in bytes of the record id repeated after the record (mdf
+        version 3 with two record ids); default 0
+
+    Returns
+    -------
+    offsets : dict
+        for each record id key the value is an array of the record offsets
+        in *data*, after the leading record id
+
+    """
+
+    try:
+        fmt = RECORD_ID_FMT[record_id_nr]
+    except KeyError:
+        message = "invalid record id size {}"
+        raise MdfException(message.format(record_id_nr))
+
+    size = len(data)
+    steps = {
+        rec_id: rec_size + record_id_nr + trailing_id_nr if rec_size else 0
+        for rec_id, rec_size in record_sizes.items()
+    }
+    step_values = set(steps.values())
+
+    if len(step_values) == 1 and 0 not in step_values:
+        # all the records have the same size so the record starts
+        # are known without walking the records
+        step = step_values.pop()
+        starts = arange(0, size - step + 1, step, dtype=int64)
+
+    else:
+        vlsd_extra = record_id_nr + trailing_id_nr + 4
+        starts = []
+        append = starts.append
+        pos = 0
+        if record_id_nr == 1 and PYVERSION == 3:
+            while pos < size:
+                append(pos)
+                step = steps[data[pos]]
+                if not step:
+                    step = unpack_from('<I', data, pos + 1)[0] + vlsd_extra
+                pos += step
+        else:
+            while pos < size:
+                append(pos)
+                step = steps[unpack_from(fmt, data, pos)[0]]
+                if not step:
+                    step = (
+                        unpack_from('<I', data, pos + record_id_nr)[0]
+                        + vlsd_extra
+                    )
+                pos += step
+
+        # drop the last record if it is truncated
+        if pos > size:
+            starts.pop()
+        starts = array(starts, dtype=int64)
+
+    buffer = frombuffer(data, dtype=uint8)
+    if record_id_nr == 1:
+        ids = buffer[starts]
+    elif len(starts):
+        ids = as_strided(
+            buffer,
+            shape=(size - record_id_nr + 1, record_id_nr),
+            strides=(1, 1),
+        )
+        ids = ids[starts].view(fmt).ravel()
+    else:
+        ids = starts
+
+    starts += record_id_nr
+    if size < 2**32:
+        starts = starts.astype(uint32)
+
+    offsets = {}
+    if len(record_sizes) == 1:
+        offsets[next(iter(record_sizes))] = starts
+    else:
+        for rec_id in record_sizes:
+            offsets[rec_id] = starts[ids == rec_id]
+
+    return offsets
+
+
+def get_records(data, offsets, record_size):
+    """ gather the records of a single record id from an unsorted data block
+
+    Parameters
+    ----------
+    data : bytes
+        unsorted data block bytes
+    offsets : numpy.array
+        record offsets as returned by *get_record_offsets*
+    record_size : int
+        record size without the record id; 0 for VLSD records
+
+    Returns
+    -------
+    records : bytes
+        concatenated records bytes; the VLSD records keep their 4 bytes
+        length
+
+    """
+
+    if not len(offsets):
+        return b''
+
+    if record_size:
+        buffer = frombuffer(data, dtype=uint8)
+        records = as_strided(
+            buffer,
+            shape=(len(buffer) - record_size + 1, record_size),
+            strides=(1, 1),
+        )
+        return records[offsets].tostring()
+
+    else:
+        records = []
+        for offset in offsets.tolist():
+            size = unpack_from('<I', data, offset)[0] + 4
+            records.append(data[offset: offset + size])
+        return b''.join(records)
+
+
+def get_vlsd_values(data, offsets):
+    """ decode the length prefixed VLSD samples found at the given offsets.
+    The samples are returned Arrow style as a flat values array and the
+    samples boundaries inside it, without any padding
+
+    Parameters
+    ----------
+    data : bytes
+        signal data bytes; each sample is stored as a 4 bytes little endian
+        length followed by the sample bytes
+    offsets : numpy.array
+        samples offsets inside *data* (the VLSD channel raw values)
+
+    Returns
+    -------
+    value_offsets, values : (numpy.array, numpy.array)
+        int64 array of len(offsets) + 1 boundaries; sample *i* is
+        values[value_offsets[i]: value_offsets[i + 1]] from the uint8
+        *values* array
+
+    """
+    buffer = frombuffer(data, dtype=uint8)
+    offsets = array(offsets, dtype=int64)
+    count = len(offsets)
+
+    value_offsets = zeros(count + 1, dtype=int64)
+    if not count:
+        return value_offsets, zeros(0, dtype=uint8)
+
+    # gather the 4 bytes length of all samples at once
+    lengths = buffer[offsets.reshape((count, 1)) + arange(4)]
+    lengths = lengths.view('<u4').ravel().astype(int64)
+    cumsum(lengths, out=value_offsets[1:])
+
+    # for each value byte the source position is the sample start plus the
+    # position inside the sample
+    total = int(value_offsets[-1])
+    positions = arange(total, dtype=int64)
+    positions += repeat(offsets + 4 - value_offsets[:-1], lengths)
+
+    return value_offsets, buffer[positions]
+
+
+def pad_vlsd_values(value_offsets, values):
+    """ scatter the Arrow style VLSD samples returned by *get_vlsd_values*
+    to a zero padded matrix with one row for each sample
+
+    Parameters
+    ----------
+    value_offsets : numpy.array
+        samples boundaries inside *values*
+    values : numpy.array
+        uint8 array of the concatenated samples bytes
+
+    Returns
+    -------
+    matrix : numpy.array
+        uint8 array with shape (samples count, maximum sample length)
+
+    """
+    lengths = value_offsets[1:] - value_offsets[:-1]
+    count = len(lengths)
+    width = int(lengths.max()) if count else 0
+
+    matrix = zeros((count, width), dtype=uint8)
+    if len(values):
+        positions = arange(len(values), dtype=int64)
+        positions += repeat(arange(count, dtype=int64) * width - value_offsets[:-1], lengths)
+        matrix.ravel()[positions] = values
+
+    return matrix
+
+
+def get_cached_size(value):
+    """ approximate memory size of a cached value in bytes
+
+    Parameters
+    ----------
+    value : object
+        numpy array, bytes, parsed block or a tuple or list of them
+
+    Returns
+    -------
+    size : int
+        size in bytes
+
+    """
+    if isinstance(value, ndarray):
+        return value.nbytes
+    elif isinstance(value, (tuple, list)):
+        return sum(get_cached_size(item) for item in value)
+    elif isinstance(value, dict):
+        return get_block_size(value)
+    else:
+        return sys.getsizeof(value)
+
+
+def get_block_size(block, seen=None):
+    """ approximate memory size of a parsed block in bytes. The fields
+    values and the public attributes are included, so the texts and the
+    nested blocks (for example the conversion of a channel or the
+    referenced blocks of a conversion) are counted too
+
+    Parameters
+    ----------
+    block : dict
+        parsed block
+    seen : set
+        ids of the objects that were already counted; default *None*
+
+    Returns
+    -------
+    size : int
+        size in bytes
+
+    """
+    if seen is None:
+        seen = set()
+    if id(block) in seen:
+        return 0
+    seen.add(id(block))
+
+    if isinstance(block, ndarray):
+        return block.nbytes
+    elif isinstance(block, dict):
+        size = sys.getsizeof(block)
+        size += sum(get_block_size(item, seen) for item in block.values())
+        attributes = getattr(block, '__dict__', {})
+        size += sum(
+            get_block_size(item, seen)
+            for attr, item in attributes.items()
+            if not attr.startswith('_')
+        )
+        return size
+    elif isinstance(block, (tuple, list)):
+        return sys.getsizeof(block) + sum(
+            get_block_size(item, seen)
+            for item in block
+        )
+    else:
+        return sys.getsizeof(block)
+
+
+class LRUCache(object):
+    """ least recently used cache with a memory budget. The least recently
+    used items are evicted when the total size of the cached values exceeds
+    the budget. The *namespace* method returns dict like views that share
+    the same budget, so that the master channel, invalidation, records and
+    signal data caches are bounded together.
+
+    Parameters
+    ----------
+    max_bytes : int
+        memory budget in bytes; *None* for an unbounded cache (default)
+
+    Attributes
+    ----------
+    hits : int
+        number of successful lookups
+    misses : int
+        number of failed lookups
+    evictions : int
+        number of items evicted to stay within the budget
+
+    """
+
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+        self._items = OrderedDict()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def __getitem__(self, key):
+        try:
+            value, size = self._items.pop(key)
+        except KeyError:
+            self.misses += 1
+            raise
+        self._items[key] = value, size
+        self.hits += 1
+        return value
+
+    def __setitem__(self, key, value):
+        self.pop(key, None)
+
+        size = get_cached_size(value)
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.evictions += 1
+            return
+
+        self._items[key] = value, size
+        self.size += size
+        self._evict()
+
+    def __delitem__(self, key):
+        value, size = self._items.pop(key)
+        self.size -= size
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def pop(self, key, default=None):
+        try:
+            value, size = self._items.pop(key)
+        except KeyError:
+            return default
+        self.size -= size
+        return value
+
+    def clear(self, namespace=None):
+        """ remove the cached items
+
+        Parameters
+        ----------
+        namespace : str
+            only remove the items of this namespace; default *None* removes
+            all the items
+
+        """
+        if namespace is None:
+            self._items.clear()
+            self.size = 0
+        else:
+            for key in list(self._items):
+                if key[0] == namespace:
+                    del self[key]
+
+    def configure(self, max_bytes):
+        """ set the memory budget and evict the items that exceed it
+
+        Parameters
+        ----------
+        max_bytes : int
+            memory budget in bytes; *None* for an unbounded cache
+
+        """
+        self.max_bytes = max_bytes
+        self._evict()
+
+    def namespace(self, name):
+        """ get a dict like view of the cache; its keys are stored as
+        (*name*, key) tuples in the shared cache
+
+        Parameters
+        ----------
+        name : str
+            namespace name
+
+        Returns
+        -------
+        view : LRUCacheNamespace
+            namespace view
+
+        """
+        return LRUCacheNamespace(self, name)
+
+    def info(self):
+        """ get the cache usage counters
+
+        Returns
+        -------
+        info : dict
+            hits, misses, evictions, number of items, size and max_bytes
+
+        """
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'items': len(self._items),
+            'size': self.size,
+            'max_bytes': self.max_bytes,
+        }
+
+    def _evict(self):
+        if self.max_bytes is None:
+            return
+        items = self._items
+        while self.size > self.max_bytes and items:
+            _, (_, size) = items.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
+
+
+class LRUCacheNamespace(object):
+    """ dict like view of a *LRUCache* namespace
+
+    Parameters
+    ----------
+    cache : LRUCache
+        shared cache
+    name : str
+        namespace name
+
+    """
+
+    def __init__(self, cache, name):
+        self.cache = cache
+        self.name = name
+
+    def __contains__(self, key):
+        return (self.name, key) in self.cache
+
+    def __getitem__(self, key):
+        return self.cache[(self.name, key)]
+
+    def __setitem__(self, key, value):
+        self.cache[(self.name, key)] = value
+
+    def __delitem__(self, key):
+        del self.cache[(self.name, key)]
+
+    def get(self, key, default=None):
+        return self.cache.get((self.name, key), default)
+
+    def pop(self, key, default=None):
+        return self.cache.pop((self.name, key), default)
+
+    def clear(self):
+        self.cache.clear(self.name)
+
+
+def ordered_imap(func, iterable, pool=None, window=1):
+    """ lazy, order preserving map that runs *func* in a thread pool. The
+    items of *iterable* are consumed in the calling thread, so it is safe to
+    use an iterable that reads from a file, and at most *window* items are
+    processed ahead of the consumer
+
+    Parameters
+    ----------
+    func : callable
+        function applied to each item
+    iterable : iterable
+        input items
+    pool : multiprocessing.pool.ThreadPool
+        worker pool; if *None* the items are processed in the calling thread
+    window : int
+        maximum number of items submitted to the pool ahead of the consumer
+
+    Returns
+    -------
+    results : generator
+        *func* results in the same order as the input items
+
+    """
+    if pool is None or window <= 1:
+        for item in iterable:
+            yield func(item)
+    else:
+        pending = deque()
+        for item in iterable:
+            pending.append(pool.apply_async(func, (item, )))
+            if len(pending) >= window:
+                yield pending.popleft().get()
+        while pending:
+            yield pending.popleft().get()
+
+
+def split_data_fragments(fragments, split_size, chunks):
+    """ regroup the data fragments in chunks of *split_size* bytes
+
+    Parameters
+    ----------
+    fragments : iterator
+        data fragments iterator that yields (bytes, offset) tuples
+    split_size : int
+        chunk size
+    chunks : int
+        number of chunks
+
+    Returns
+    -------
+    chunks : generator
+        bytes chunks; the last chunk can be smaller than *split_size*
+
+    """
+    cur_data = b''
+    for i in range(chunks):
+        while len(cur_data) < split_size:
+            try:
+                cur_data += next(fragments)[0]
+            except StopIteration:
+                break
+
+        data, cur_data = cur_data[:split_size], cur_data[split_size:]
+        yield data
+
+
+def get_data_reader(stream, mapped=None):
+    """ get the function used to read raw bytes from the stream; if the
+    memory map of the stream is given the data is returned as *memoryview*
+    slices of the mapping
+
+    Parameters
+    ----------
+    stream : file handle
+        original file or temporary file
+    mapped : mmap.mmap
+        memory map of the stream; default *None*
+
+    Returns
+    -------
+    read : callable
+        function that takes the address and the size as arguments
+
+    """
+    if mapped is not None:
+        if PYVERSION == 2:
+            view = mapped
+        else:
+            view = memoryview(mapped)
+
+        def read(address, size):
+            return view[address: address + size]
+    else:
+        def read(address, size):
+            stream.seek(address)
+            return stream.read(size)
+
+    return read
+
+
+def iter_blocks_range(blocks, start, stop):
+    """ select the data blocks that overlap a range of the group's records
+    bytes
+
+    Parameters
+    ----------
+    blocks : iterable
+        data blocks tuples; the second item of each tuple is the block
+        uncompressed size
+    start : int
+        start byte offset
+    stop : int
+        stop byte offset (not included)
+
+    Returns
+    -------
+    blocks : generator
+        (block, first, last) tuples, where *first* and *last* delimit the
+        overlapping bytes relative to the block start
+
+    """
+    block_start = 0
+    for block in blocks:
+        block_stop = block_start + block[1]
+        if block_start >= stop:
+            break
+        if block_stop > start:
+            first = max(start, block_start) - block_start
+            last = min(stop, block_stop) - block_start
+            yield block, first, last
+        block_start = block_stop
+
+
+def get_time_index(mdf, index, record_size):
+    """ compute the time range index of a sorted group; the index maps each
+    data fragment to its first record and to its first and last master
+    values
+
+    Parameters
+    ----------
+    mdf : MDF3 | MDF4
+        MDF object
+    index : int
+        group index
+    record_size : int
+        record size in bytes
+
+    Returns
+    -------
+    time_index : dict | None
+        *records*, *first* and *last* arrays and the total *cycles_nr*;
+        *None* if the group is not sorted or if the master channel is not
+        monotonic
+
+    """
+    group = mdf.groups[index]
+    if not group['sorted']:
+        return None
+
+    records, first, last = [], [], []
+    cycles_nr = 0
+    for fragment in mdf._load_group_data(group):
+        data_bytes, offset = fragment
+        # the master of the fragment is only kept if it was already cached
+        key = index, offset, len(data_bytes)
+        cached = key in mdf._master_channel_cache
+        t = mdf.get_master(index, fragment)
+        if not cached:
+            mdf._master_channel_cache.pop(key, None)
+        if not len(t):
+            continue
+        if (last and t[0] < last[-1]) or (len(t) > 1 and (diff(t) < 0).any()):
+            return None
+        records.append(offset // record_size)
+        first.append(t[0])
+        last.append(t[-1])
+        cycles_nr = offset // record_size + len(t)
+
+    return {
+        'records': array(records, dtype=uint64),
+        'first': array(first, dtype=float64),
+        'last': array(last, dtype=float64),
+        'cycles_nr': cycles_nr,
+    }
+
+
+def _get_fragments_range(time_index, start, stop):
+    """ get the fragments of the time range index that overlap the
+    [*start*, *stop*] time interval; if no fragment overlaps the interval
+    the closest one is selected so that the channel samples are still
+    decoded with the right types """
+    fragments_nr = len(time_index['records'])
+
+    if start is None:
+        first_fragment = 0
+    else:
+        first_fragment = searchsorted(time_index['last'], start, side='left')
+    if stop is None:
+        last_fragment = fragments_nr
+    else:
+        last_fragment = searchsorted(time_index['first'], stop, side='right')
+
+    if first_fragment >= last_fragment:
+        first_fragment = min(first_fragment, fragments_nr - 1)
+        last_fragment = first_fragment + 1
+
+    return first_fragment, last_fragment
+
+
+def load_group_data_range(mdf, index, record_size, start=None, stop=None):
+    """ get group's data fragments that overlap the [*start*, *stop*] time
+    interval. If the time range index can be used only the data blocks that
+    overlap the interval are read, otherwise all the group's fragments are
+    returned
+
+    Parameters
+    ----------
+    mdf : MDF3 | MDF4
+        MDF object
+    index : int
+        group index
+    record_size : int
+        record size in bytes
+    start : float
+        start timestamp; default *None*
+    stop : float
+        stop timestamp; default *None*
+
+    Returns
+    -------
+    fragments : generator
+        (bytes, offset) data fragments
+
+    """
+    group = mdf.groups[index]
+
+    if start is None and stop is None or not group['sorted']:
+        time_index = None
+    elif mdf.memory == 'full':
+        t = mdf.get_master(index)
+        if len(t) > 1 and (diff(t) < 0).any():
+            time_index = None
+        else:
+            time_index = {
+                'records': arange(len(t), dtype=uint64),
+                'first': t,
+                'last': t,
+                'cycles_nr': len(t),
+            }
+    else:
+        time_index = mdf._get_time_index(index)
+
+    if time_index is None or not len(time_index['records']):
+        for fragment in mdf._load_group_data(group):
+            yield fragment
+        return
+
+    records = time_index['records']
+    fragments_nr = len(records)
+    first_fragment, last_fragment = _get_fragments_range(
+        time_index,
+        start,
+        stop,
+    )
+
+    if mdf.memory == 'full':
+        fragments = [(first_fragment, last_fragment)]
+    else:
+        fragments = [
+            (i, i + 1)
+            for i in range(first_fragment, last_fragment)
+        ]
+    for first, last in fragments:
+        first_record = int(records[first])
+        if last < fragments_nr:
+            last_record = int(records[last])
+        else:
+            last_record = time_index['cycles_nr']
+        offset = first_record * record_size
+        data = mdf._read_group_bytes(
+            group,
+            offset,
+            last_record * record_size,
+        )
+        yield data, offset
+
+
+def _trim_time_range(signal, start, stop):
+    """ drop the signal samples outside the [*start*, *stop*] time
+    interval in place """
+    timestamps = signal.timestamps
+    if len(timestamps) > 1 and (diff(timestamps) < 0).any():
+        # all the fragments are used if the master is not monotonic
+        mask = ones(len(timestamps), dtype=bool)
+        if start is not None:
+            mask &= timestamps >= start
+        if stop is not None:
+            mask &= timestamps <= stop
+        if not mask.all():
+            signal.samples = signal.samples[mask]
+            signal.timestamps = timestamps[mask]
+    else:
+        if start is None:
+            first = 0
+        else:
+            first = searchsorted(timestamps, start, side='left')
+        if stop is None:
+            last = len(timestamps)
+        else:
+            last = searchsorted(timestamps, stop, side='right')
+        if first or last < len(timestamps):
+            signal.samples = signal.samples[first: last]
+            signal.timestamps = timestamps[first: last]
+
+
+def get_time_range(
+        mdf,
+        group,
+        index,
+        start,
+        stop,
+        raster=None,
+        samples_only=False,
+        raw=False):
+    """ get the channel samples within the [*start*, *stop*] time interval
+    by decoding only the data fragments selected by the group's time range
+    index
+
+    Parameters
+    ----------
+    mdf : MDF3 | MDF4
+        MDF object
+    group : int
+        0-based group index
+    index : int
+        0-based channel index
+    start : float
+        start timestamp
+    stop : float
+        stop timestamp
+    raster : float
+        time raster in seconds
+    samples_only : bool
+        if *True* return only the channel samples as numpy array
+    raw : bool
+        return channel samples without appling the conversion rule
+
+    Returns
+    -------
+    res : (numpy.array | Signal)
+        channel samples or *Signal*
+
+    """
+    signals = [
+        mdf.get(
+            group=group,
+            index=index,
+            data=fragment,
+            raw=raw,
+        )
+        for fragment in mdf._load_group_data_range(group, start, stop)
+    ]
+
+    signal = signals[0]
+    if len(signals) > 1:
+        signal.samples = concatenate([sig.samples for sig in signals])
+        signal.timestamps = concatenate([sig.timestamps for sig in signals])
+
+    _trim_time_range(signal, start, stop)
+
+    if raster and len(signal):
+        signal = signal.interp(
+            arange(
+                signal.timestamps[0],
+                signal.timestamps[-1],
+                raster,
+            )
+        )
+
+    if samples_only:
+        return signal.samples
+    else:
+        return signal
+
+
 def debug_channel(mdf, group, channel, conversion, dependency):
     """ use this to print debug infromation in case of errors
 
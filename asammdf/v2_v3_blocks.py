@@ -11,10 +11,9 @@ from struct import pack, unpack, unpack_from
 from textwrap import wrap
 
 import numpy as np
-from numexpr import evaluate
 
 from . import v2_v3_constants as v23c
-from .utils import MdfException, get_text_v3
+from .utils import ConversionKernel, MdfException, get_text_v3
 
 PYVERSION = sys.version_info[0]
 PYVERSION_MAJOR = sys.version_info[0] * 10 + sys.version_info[1]
@@ -426,6 +425,11 @@ class ChannelConversion(dict):
 
     '''
 
+    # conversion kernel built by the first *convert* call; it is reset when
+    # a block field is changed, but changes to *referenced_blocks* made after
+    # the first conversion must also set *_kernel* back to None
+    _kernel = None
+
     def __init__(self, **kargs):
         super(ChannelConversion, self).__init__()
 
@@ -849,59 +853,54 @@ address: {}
 
         return '\n'.join(metadata)
 
-    def convert(self, values):
-        conversion_type = self['conversion_type']
+    def __setitem__(self, item, value):
+        # the compiled kernel holds values derived from the block fields, so
+        # it is dropped and rebuilt by the next *convert* call
+        self.__dict__.pop('_kernel', None)
+        super(ChannelConversion, self).__setitem__(item, value)
 
-        if conversion_type == v23c.CONVERSION_TYPE_NONE:
-            pass
+    def __getstate__(self):
+        # the compiled kernel is rebuilt on demand after unpickling
+        state = self.__dict__.copy()
+        state.pop('_kernel', None)
+        return state
 
-        elif conversion_type == v23c.CONVERSION_TYPE_LINEAR:
-            a = self['a']
-            b = self['b']
-            if (a, b) != (1, 0):
-                values = values * a
-                if b:
-                    values += b
+    def compile(self):
+        """ build the conversion kernel with the prebuilt lookup tables and
+        the precompiled formula of this conversion block. The kernel is
+        built on the first *convert* call and shared by all the channels
+        that use this conversion block
 
-        elif conversion_type in (
+        Returns
+        -------
+        kernel : ConversionKernel
+            conversion kernel
+
+        """
+        conversion_type = self['conversion_type']
+
+        if conversion_type in (
                 v23c.CONVERSION_TYPE_TABI,
                 v23c.CONVERSION_TYPE_TAB):
             nr = self['ref_param_nr']
 
-            raw_vals = [
-                self['raw_{}'.format(i)]
-                for i in range(nr)
-            ]
-            raw_vals = np.array(raw_vals)
-            phys = [
-                self['phys_{}'.format(i)]
-                for i in range(nr)
-            ]
-            phys = np.array(phys)
-
-            if conversion_type == v23c.CONVERSION_TYPE_TABI:
-                values = np.interp(values, raw_vals, phys)
-            else:
-                idx = np.searchsorted(raw_vals, values)
-                idx = np.clip(idx, 0, len(raw_vals) - 1)
-                values = phys[idx]
+            raw_vals = np.array(
+                [self['raw_{}'.format(i)] for i in range(nr)]
+            )
+            phys = np.array(
+                [self['phys_{}'.format(i)] for i in range(nr)]
+            )
+            return ConversionKernel(conversion_type, (raw_vals, phys))
 
         elif conversion_type == v23c.CONVERSION_TYPE_TABX:
             nr = self['ref_param_nr']
-            raw_vals = [
-                self['param_val_{}'.format(i)]
-                for i in range(nr)
-            ]
-            raw_vals = np.array(raw_vals)
-            phys = [
-                self['text_{}'.format(i)]
-                for i in range(nr)
-            ]
-            phys = np.array(phys)
-
-            indexes = np.searchsorted(raw_vals, values)
-
-            values = phys[indexes]
+            raw_vals = np.array(
+                [self['param_val_{}'.format(i)] for i in range(nr)]
+            )
+            phys = np.array(
+                [self['text_{}'.format(i)] for i in range(nr)]
+            )
+            return ConversionKernel(conversion_type, (raw_vals, phys))
 
         elif conversion_type == v23c.CONVERSION_TYPE_RTABX:
             nr = self['ref_param_nr'] - 1
@@ -923,6 +922,8 @@ address: {}
             else:
                 default = b''
 
+            # a default text with the {X} placeholder holds a formula that
+            # is evaluated for the values outside the ranges
             if b'{X}' in default:
                 default = (
                     default
@@ -931,9 +932,9 @@ address: {}
                     .split('"')
                     [1]
                 )
-                partial_conversion = True
+                expression = default
             else:
-                partial_conversion = False
+                expression = None
 
             lower = np.array(
                 [self['lower_{}'.format(i)] for i in range(nr)]
@@ -942,6 +943,102 @@ address: {}
                 [self['upper_{}'.format(i)] for i in range(nr)]
             )
 
+            return ConversionKernel(
+                conversion_type,
+                (lower, upper, phys, default),
+                expression=expression,
+            )
+
+        elif conversion_type in (
+                v23c.CONVERSION_TYPE_EXPO,
+                v23c.CONVERSION_TYPE_LOGH):
+            params = tuple(self['P{}'.format(i)] for i in range(1, 8))
+            return ConversionKernel(conversion_type, (params, ))
+
+        elif conversion_type in (
+                v23c.CONVERSION_TYPE_RAT,
+                v23c.CONVERSION_TYPE_POLY):
+            params = {
+                'P{}'.format(i): self['P{}'.format(i)]
+                for i in range(1, 7)
+            }
+            P1, P2, P3, P4, P5, P6 = (
+                params['P{}'.format(i)]
+                for i in range(1, 7)
+            )
+
+            if conversion_type == v23c.CONVERSION_TYPE_RAT:
+                if (P1, P2, P3, P4, P5, P6) != (0, 1, 0, 0, 0, 1):
+                    expression = v23c.RAT_CONV_TEXT
+                else:
+                    expression = None
+            else:
+                if (P2, P3, P5, P6) == (0, 0, 0, 0):
+                    if P1 != P4:
+                        expression = v23c.POLY_CONV_SHORT_TEXT
+                    else:
+                        expression = None
+                else:
+                    expression = v23c.POLY_CONV_LONG_TEXT
+
+            return ConversionKernel(
+                conversion_type,
+                expression=expression,
+                constants=params,
+            )
+
+        elif conversion_type == v23c.CONVERSION_TYPE_FORMULA:
+            formula = self['formula'].decode('latin-1').strip(' \r\n\t\0')
+            if 'X1' not in formula:
+                formula = formula.replace('X', 'X1')
+            return ConversionKernel(
+                conversion_type,
+                expression=formula,
+                variable='X1',
+            )
+
+        return ConversionKernel(conversion_type)
+
+    def convert(self, values):
+        kernel = self._kernel
+        if kernel is None:
+            kernel = self._kernel = self.compile()
+
+        conversion_type = kernel.conversion_type
+
+        if conversion_type == v23c.CONVERSION_TYPE_NONE:
+            pass
+
+        elif conversion_type == v23c.CONVERSION_TYPE_LINEAR:
+            a = self['a']
+            b = self['b']
+            if (a, b) != (1, 0):
+                values = values * a
+                if b:
+                    values += b
+
+        elif conversion_type in (
+                v23c.CONVERSION_TYPE_TABI,
+                v23c.CONVERSION_TYPE_TAB):
+            raw_vals, phys = kernel.tables
+
+            if conversion_type == v23c.CONVERSION_TYPE_TABI:
+                values = np.interp(values, raw_vals, phys)
+            else:
+                idx = np.searchsorted(raw_vals, values)
+                idx = np.clip(idx, 0, len(raw_vals) - 1)
+                values = phys[idx]
+
+        elif conversion_type == v23c.CONVERSION_TYPE_TABX:
+            raw_vals, phys = kernel.tables
+
+            indexes = np.searchsorted(raw_vals, values)
+
+            values = phys[indexes]
+
+        elif conversion_type == v23c.CONVERSION_TYPE_RTABX:
+            lower, upper, phys, default = kernel.tables
+
             if values.dtype.kind == 'f':
                 idx1 = np.searchsorted(lower, values, side='right') - 1
                 idx2 = np.searchsorted(upper, values, side='right')
@@ -951,10 +1048,9 @@ address: {}
 
             idx = np.argwhere(idx1 != idx2).flatten()
 
-            if partial_conversion and len(idx):
-                X = values[idx]
+            if kernel.expression is not None and len(idx):
                 new_values = np.zeros(len(values), dtype=np.float64)
-                new_values[idx] = evaluate(default)
+                new_values[idx] = kernel.evaluate(values[idx])
 
                 idx = np.argwhere(idx1 == idx2).flatten()
                 new_values[idx] = np.nan
@@ -983,13 +1079,7 @@ address: {}
                 func = np.log
             else:
                 func = np.exp
-            P1 = self['P1']
-            P2 = self['P2']
-            P3 = self['P3']
-            P4 = self['P4']
-            P5 = self['P5']
-            P6 = self['P6']
-            P7 = self['P7']
+            P1, P2, P3, P4, P5, P6, P7 = kernel.tables[0]
             if P4 == 0:
                 values = func(((values - P7) * P6 - P3) / P1) / P2
             elif P1 == 0:
@@ -999,46 +1089,12 @@ address: {}
                 message = message.format(conversion_type)
                 raise ValueError(message)
 
-        elif conversion_type == v23c.CONVERSION_TYPE_RAT:
-            # pylint: disable=unused-variable,C0103
-
-            P1 = self['P1']
-            P2 = self['P2']
-            P3 = self['P3']
-            P4 = self['P4']
-            P5 = self['P5']
-            P6 = self['P6']
-            if (P1, P2, P3, P4, P5, P6) != (0, 1, 0, 0, 0, 1):
-                X = values
-                values = evaluate(v23c.RAT_CONV_TEXT)
-
-        elif conversion_type == v23c.CONVERSION_TYPE_POLY:
-            # pylint: disable=unused-variable,C0103
-
-            P1 = self['P1']
-            P2 = self['P2']
-            P3 = self['P3']
-            P4 = self['P4']
-            P5 = self['P5']
-            P6 = self['P6']
-
-            X = values
-
-            coefs = (P2, P3, P5, P6)
-            if coefs == (0, 0, 0, 0):
-                if P1 != P4:
-                    values = evaluate(v23c.POLY_CONV_SHORT_TEXT)
-            else:
-                values = evaluate(v23c.POLY_CONV_LONG_TEXT)
-
-        elif conversion_type == v23c.CONVERSION_TYPE_FORMULA:
-            # pylint: disable=unused-variable,C0103
-
-            formula = self['formula'].decode('latin-1').strip(' \r\n\t\0')
-            if 'X1' not in formula:
-                formula = formula.replace('X', 'X1')
-            X1 = values
-            values = evaluate(formula)
+        elif conversion_type in (
+                v23c.CONVERSION_TYPE_RAT,
+                v23c.CONVERSION_TYPE_POLY,
+                v23c.CONVERSION_TYPE_FORMULA):
+            if kernel.expression is not None:
+                values = kernel.evaluate(values)
 
         return values
 
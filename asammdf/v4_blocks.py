@@ -15,10 +15,9 @@ from textwrap import wrap
 from zlib import compress, decompress
 
 import numpy as np
-from numexpr import evaluate
 
 from . import v4_constants as v4c
-from .utils import MdfException, get_text_v4
+from .utils import ConversionKernel, MdfException, get_text_v4
 
 
 PYVERSION = sys.version_info[0]
@@ -33,6 +32,8 @@ __all__ = [
     'AttachmentBlock',
     'Channel',
     'ChannelArrayBlock',
+    'ChannelCatalog',
+    'ChannelCatalogEntry',
     'ChannelGroup',
     'ChannelConversion',
     'DataBlock',
@@ -49,6 +50,73 @@ __all__ = [
     'TextBlock',
 ]
 
+# the CN blocks fixed fields stored in the ChannelCatalog
+CHANNEL_CATALOG_DTYPE = np.dtype([
+    ('address', '<u8'),
+    ('next_ch_addr', '<u8'),
+    ('component_addr', '<u8'),
+    ('name_addr', '<u8'),
+    ('source_addr', '<u8'),
+    ('conversion_addr', '<u8'),
+    ('data_block_addr', '<u8'),
+    ('unit_addr', '<u8'),
+    ('comment_addr', '<u8'),
+    ('channel_type', '<u1'),
+    ('sync_type', '<u1'),
+    ('data_type', '<u1'),
+    ('bit_offset', '<u1'),
+    ('byte_offset', '<u4'),
+    ('bit_count', '<u4'),
+    ('flags', '<u4'),
+    ('pos_invalidation_bit', '<u4'),
+])
+
+# the Channel attributes that are loaded on the first access for the channels
+# created with *lazy_metadata*
+LAZY_METADATA_ATTRIBUTES = {
+    'unit',
+    'comment',
+    'conversion',
+    'source',
+}
+
+
+def _get_range_indexes(lower, upper, values):
+    """ get the index of the range that contains each value. The float
+    values are inside a range if lower <= value < upper. The integer values
+    keep the lookup of the original RTAB and RTABX code: the value matches
+    the range i if both lower[i] and upper[i] are the last limits that are
+    not greater than the value
+
+    Parameters
+    ----------
+    lower : numpy.array
+        sorted ranges lower limits
+    upper : numpy.array
+        sorted ranges upper limits
+    values : numpy.array
+        raw values
+
+    Returns
+    -------
+    indexes : numpy.array
+        range index for each value; len(lower) for the values outside all
+        the ranges
+
+    """
+    idx1 = np.searchsorted(lower, values, side='right') - 1
+    if values.dtype.kind == 'f':
+        idx2 = np.searchsorted(upper, values, side='right')
+    else:
+        idx2 = np.searchsorted(upper, values, side='right') - 1
+
+    indexes = np.where(idx1 == idx2, idx1, len(lower))
+    # the original code indexed the ranges values with -1 for the integer
+    # values below all the limits
+    indexes[indexes < 0] += len(lower)
+
+    return indexes
+
 
 class AttachmentBlock(dict):
     """ ATBLOCK class
@@ -358,56 +426,33 @@ class Channel(dict):
 
             if kargs.get('load_metadata', True):
 
-                self.name = get_text_v4(self['name_addr'], stream)
-                self.unit = get_text_v4(self['unit_addr'], stream)
-                if not self.unit:
-                    self['unit_addr'] = 0
-
-                comment = get_text_v4(
-                    address=self['comment_addr'],
-                    stream=stream,
-                ).replace(' xmlns="http://www.asam.net/mdf/v4"', '')
-
-                if kargs.get('parse_xml_comment', True) and comment.startswith('<CNcomment'):
-                    try:
-                        display_name = ET.fromstring(comment).find('.//names/display')
-                        if display_name is not None:
-                            self.display_name = display_name.text
-                    except UnicodeEncodeError:
-                        pass
-
-                self.comment = comment
-
                 si_map = kargs.get('si_map', {})
                 cc_map = kargs.get('cc_map', {})
+                parse_xml_comment = kargs.get('parse_xml_comment', True)
 
-                if self['conversion_addr']:
-                    stream.seek(self['conversion_addr'] + 8)
-                    size = unpack('<Q', stream.read(8))[0]
-                    stream.seek(self['conversion_addr'])
-                    raw_bytes = stream.read(size)
-                    if raw_bytes in cc_map:
-                        conv = cc_map[raw_bytes]
-                    else:
-                        conv = ChannelConversion(
-                            raw_bytes=raw_bytes,
-                            stream=stream,
-                        )
-                        cc_map[raw_bytes] = conv
-                    self.conversion = conv
-
-                if self['source_addr']:
-                    stream.seek(self['source_addr'])
-                    raw_bytes = stream.read(v4c.SI_BLOCK_SIZE)
-                    if raw_bytes in si_map:
-                        source = si_map[raw_bytes]
-                    else:
-                        source = SourceInformation(
-                            raw_bytes=raw_bytes,
-                            stream=stream,
-                        )
-                        si_map[raw_bytes] = source
-                    self.source = source
+                if kargs.get('lazy_metadata', False):
+                    self.name = get_text_v4(self['name_addr'], stream)
+                    self.display_name = self._read_display_name(
+                        stream,
+                        parse_xml_comment,
+                    )
+                    # unit, comment, conversion and source are loaded on the
+                    # first access
+                    for attr in LAZY_METADATA_ATTRIBUTES:
+                        self.__dict__.pop(attr, None)
+                    self._lazy_metadata = (
+                        stream,
+                        cc_map,
+                        si_map,
+                        parse_xml_comment,
+                    )
+                else:
+                    self._load_metadata(
+                        stream,
+                        cc_map,
+                        si_map,
+                        parse_xml_comment,
+                    )
 
         else:
             self.address = 0
@@ -454,6 +499,143 @@ class Channel(dict):
             self['data_block_addr'] = 0
             self['channel_type'] = v4c.CHANNEL_TYPE_VALUE
 
+    def _load_metadata(self, stream, cc_map, si_map, parse_xml_comment=True):
+        """ read the name, unit, comment, conversion and source blocks """
+        self.name = get_text_v4(self['name_addr'], stream)
+        self.unit = get_text_v4(self['unit_addr'], stream)
+        if not self.unit:
+            self['unit_addr'] = 0
+
+        comment = get_text_v4(
+            address=self['comment_addr'],
+            stream=stream,
+        ).replace(' xmlns="http://www.asam.net/mdf/v4"', '')
+
+        if parse_xml_comment and comment.startswith('<CNcomment'):
+            try:
+                display_name = ET.fromstring(comment).find('.//names/display')
+                if display_name is not None:
+                    self.display_name = display_name.text
+            except UnicodeEncodeError:
+                pass
+
+        self.comment = comment
+
+        if self['conversion_addr']:
+            stream.seek(self['conversion_addr'] + 8)
+            size = unpack('<Q', stream.read(8))[0]
+            stream.seek(self['conversion_addr'])
+            raw_bytes = stream.read(size)
+            if raw_bytes in cc_map:
+                conv = cc_map[raw_bytes]
+            else:
+                conv = ChannelConversion(
+                    raw_bytes=raw_bytes,
+                    stream=stream,
+                )
+                cc_map[raw_bytes] = conv
+            self.conversion = conv
+
+        if self['source_addr']:
+            stream.seek(self['source_addr'])
+            raw_bytes = stream.read(v4c.SI_BLOCK_SIZE)
+            if raw_bytes in si_map:
+                source = si_map[raw_bytes]
+            else:
+                source = SourceInformation(
+                    raw_bytes=raw_bytes,
+                    stream=stream,
+                )
+                si_map[raw_bytes] = source
+            self.source = source
+
+    def _read_display_name(self, stream, parse_xml_comment=True):
+        """ get the display name from the comment without loading the other
+        metadata; plain text comments are not read at all since they cannot
+        contain a display name """
+        address = self['comment_addr']
+        if not address or not parse_xml_comment:
+            return ''
+
+        stream.seek(address)
+        if stream.read(4) != b'##MD':
+            return ''
+
+        comment = get_text_v4(
+            address=address,
+            stream=stream,
+        ).replace(' xmlns="http://www.asam.net/mdf/v4"', '')
+
+        display_name = ''
+        if comment.startswith('<CNcomment') and '<display' in comment:
+            try:
+                display = ET.fromstring(comment).find('.//names/display')
+                if display is not None:
+                    display_name = display.text
+            except UnicodeEncodeError:
+                pass
+
+        return display_name
+
+    def _load_lazy_metadata(self):
+        """ load the metadata of a channel created with *lazy_metadata*; the
+        attributes that were already set by the user are kept """
+        stream, cc_map, si_map, parse_xml_comment = \
+            self.__dict__.pop('_lazy_metadata')
+
+        current = {
+            attr: self.__dict__[attr]
+            for attr in LAZY_METADATA_ATTRIBUTES | {'name', 'display_name'}
+            if attr in self.__dict__
+        }
+
+        # the conversion and source are only set by *_load_metadata* if the
+        # channel references the CC and SI blocks
+        self.conversion = self.source = None
+
+        if stream is None or stream.closed:
+            self.unit = self.comment = ''
+        else:
+            position = stream.tell()
+            self._load_metadata(stream, cc_map, si_map, parse_xml_comment)
+            stream.seek(position)
+
+        self.__dict__.update(current)
+
+    def __getattr__(self, item):
+        if item in LAZY_METADATA_ATTRIBUTES and '_lazy_metadata' in self.__dict__:
+            self._load_lazy_metadata()
+            return getattr(self, item)
+        raise AttributeError(item)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        # the file stream cannot be pickled; it must be set again using
+        # *set_lazy_stream* after unpickling
+        lazy_metadata = state.get('_lazy_metadata')
+        if lazy_metadata is not None:
+            state['_lazy_metadata'] = (None, ) + lazy_metadata[1:]
+        return state
+
+    @property
+    def lazy(self):
+        """ *True* if the unit, comment, conversion and source are not
+        loaded yet """
+        return '_lazy_metadata' in self.__dict__
+
+    def set_lazy_stream(self, stream):
+        """ set the file stream used to load the lazy metadata
+
+        Parameters
+        ----------
+        stream : file handle
+            the file that contains the channel block
+
+        """
+        lazy_metadata = self.__dict__.get('_lazy_metadata')
+        if lazy_metadata is not None:
+            self._lazy_metadata = (stream, ) + lazy_metadata[1:]
+
     def to_blocks(self, address, blocks, defined_texts, cc_map, si_map):
         key = 'name_addr'
         text = self.name
@@ -719,6 +901,188 @@ comment: {}
         return result
 
 
+class ChannelCatalog(object):
+    """ compact columnar table of the CN blocks fixed fields. The fields of
+    all the channels of a channel group are kept in a single numpy
+    structured array (*fields*) and the channel names in a list, so that
+    the record layout and the channel lookup do not need a *Channel* object
+    for each channel
+
+    Parameters
+    ----------
+    size : int
+        number of channels
+
+    Attributes
+    ----------
+    fields : numpy.ndarray
+        structured array with the *CHANNEL_CATALOG_DTYPE* fields
+    names : list
+        channel names
+
+    """
+
+    __slots__ = ('fields', 'names')
+
+    def __init__(self, size=0):
+        self.fields = np.zeros(size, dtype=CHANNEL_CATALOG_DTYPE)
+        self.names = [''] * size
+
+    @classmethod
+    def from_channels(cls, channels):
+        """ build the catalog from *Channel* objects
+
+        Parameters
+        ----------
+        channels : list
+            list of *Channel* objects
+
+        Returns
+        -------
+        catalog : ChannelCatalog
+
+        """
+        catalog = cls(len(channels))
+        fields = catalog.fields
+        for name in CHANNEL_CATALOG_DTYPE.names:
+            if name == 'address':
+                fields[name] = [channel.address for channel in channels]
+            else:
+                fields[name] = [channel[name] for channel in channels]
+        catalog.names = [channel.name for channel in channels]
+        return catalog
+
+    @classmethod
+    def from_stream(cls, addresses, stream):
+        """ build the catalog by reading only the CN blocks and the channel
+        names from the file
+
+        Parameters
+        ----------
+        addresses : list
+            CN blocks addresses
+        stream : file handle
+            mdf file handle
+
+        Returns
+        -------
+        catalog : ChannelCatalog
+
+        """
+        catalog = cls(len(addresses))
+        rows = []
+        names = catalog.names
+        for i, address in enumerate(addresses):
+            stream.seek(address)
+            (id_,
+             _,
+             block_len,
+             links_nr) = unpack(v4c.FMT_COMMON, stream.read(v4c.COMMON_SIZE))
+            if id_ != b'##CN':
+                message = 'Expected "##CN" block but found "{}"'
+                raise MdfException(message.format(id_))
+            block = stream.read(block_len - v4c.COMMON_SIZE)
+            links = unpack_from('<8Q', block)
+            params = unpack_from(v4c.FMT_CHANNEL_PARAMS, block, links_nr * 8)
+
+            channel_type = params[0]
+            data_block_addr = links[5]
+            # ignore MLSD signal data
+            if channel_type == v4c.CHANNEL_TYPE_MLSD:
+                channel_type = v4c.CHANNEL_TYPE_VALUE
+                data_block_addr = 0
+
+            rows.append(
+                (address, )
+                + links[:5]
+                + (data_block_addr, )
+                + links[6:]
+                + (channel_type, )
+                + params[1:8]
+            )
+            names[i] = get_text_v4(links[2], stream)
+
+        catalog.fields[:] = rows
+        return catalog
+
+    def __len__(self):
+        return len(self.names)
+
+    def __getitem__(self, index):
+        return ChannelCatalogEntry(self, index)
+
+    def record_order(self):
+        """ get the channel indexes sorted like the *Channel* objects: by byte
+        offset and, for the same byte offset, by descending bit range
+
+        Returns
+        -------
+        order : numpy.ndarray
+            channel indexes
+
+        """
+        fields = self.fields
+        bit_range = (
+            fields['bit_offset'].astype('<i8')
+            + fields['bit_count']
+        )
+        return np.lexsort((-bit_range, fields['byte_offset']))
+
+
+class ChannelCatalogEntry(object):
+    """ read only view of a *ChannelCatalog* row; the fixed fields are
+    accessed like the *Channel* keys. The metadata that is not stored in the
+    catalog has the same defaults as a *Channel* created without metadata
+
+    Parameters
+    ----------
+    catalog : ChannelCatalog
+        channels catalog
+    index : int
+        channel index
+
+    """
+
+    __slots__ = ('catalog', 'index')
+
+    unit = comment = display_name = ''
+    conversion = source = None
+    attachments = ()
+
+    def __init__(self, catalog, index):
+        self.catalog = catalog
+        self.index = index
+
+    def __getitem__(self, key):
+        try:
+            return self.catalog.fields[key][self.index].item()
+        except (KeyError, ValueError):
+            raise KeyError(key)
+
+    def __contains__(self, key):
+        return key in CHANNEL_CATALOG_DTYPE.names
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    @property
+    def name(self):
+        return self.catalog.names[self.index]
+
+    @property
+    def address(self):
+        return self['address']
+
+    def __repr__(self):
+        return '<ChannelCatalogEntry (name: {}, address: {})>'.format(
+            self.name,
+            hex(self.address),
+        )
+
+
 class ChannelArrayBlock(dict):
     """CABLOCK class"""
 
@@ -1160,6 +1524,11 @@ class ChannelGroup(dict):
 class ChannelConversion(dict):
     """CCBLOCK class"""
 
+    # conversion kernel built by the first *convert* call; it is reset when
+    # a block field is changed, but changes to *referenced_blocks* made after
+    # the first conversion must also set *_kernel* back to None
+    _kernel = None
+
     def __init__(self, **kargs):
         super(ChannelConversion, self).__init__()
 
@@ -1930,30 +2299,49 @@ class ChannelConversion(dict):
 
         return address
 
-    def convert(self, values):
+    def __setitem__(self, item, value):
+        # the compiled kernel holds values derived from the block fields, so
+        # it is dropped and rebuilt by the next *convert* call
+        self.__dict__.pop('_kernel', None)
+        super(ChannelConversion, self).__setitem__(item, value)
+
+    def __getstate__(self):
+        # the compiled kernel is rebuilt on demand after unpickling
+        state = self.__dict__.copy()
+        state.pop('_kernel', None)
+        return state
+
+    def compile(self):
+        """ build the conversion kernel with the prebuilt lookup tables and
+        the precompiled formula of this conversion block. The kernel is
+        built on the first *convert* call and shared by all the channels
+        that use this conversion block
+
+        Returns
+        -------
+        kernel : ConversionKernel
+            conversion kernel
+
+        """
         conversion_type = self['conversion_type']
-        if conversion_type == v4c.CONVERSION_TYPE_NON:
-            pass
-        elif conversion_type == v4c.CONVERSION_TYPE_LIN:
-            a = self['a']
-            b = self['b']
-            if (a, b) != (1, 0):
-                values = values * a
-                if b:
-                    values += b
-        elif conversion_type == v4c.CONVERSION_TYPE_RAT:
-            P1 = self['P1']
-            P2 = self['P2']
-            P3 = self['P3']
-            P4 = self['P4']
-            P5 = self['P5']
-            P6 = self['P6']
-            if (P1, P2, P3, P4, P5, P6) != (0, 1, 0, 0, 0, 1):
-                X = values
-                values = evaluate(v4c.CONV_RAT_TEXT)
+
+        if conversion_type == v4c.CONVERSION_TYPE_RAT:
+            params = {
+                'P{}'.format(i): self['P{}'.format(i)]
+                for i in range(1, 7)
+            }
+            if tuple(params['P{}'.format(i)] for i in range(1, 7)) != (0, 1, 0, 0, 0, 1):
+                return ConversionKernel(
+                    conversion_type,
+                    expression=v4c.CONV_RAT_TEXT,
+                    constants=params,
+                )
+
         elif conversion_type == v4c.CONVERSION_TYPE_ALG:
-                X = values
-                values = evaluate(self.formula)
+            return ConversionKernel(
+                conversion_type,
+                expression=self.formula,
+            )
 
         elif conversion_type in (
                 v4c.CONVERSION_TYPE_TABI,
@@ -1965,13 +2353,7 @@ class ChannelConversion(dict):
             phys = np.array(
                 [self['phys_{}'.format(i)] for i in range(nr)]
             )
-
-            if conversion_type == v4c.CONVERSION_TYPE_TABI:
-                values = np.interp(values, raw_vals, phys)
-            else:
-                idx = np.searchsorted(raw_vals, values)
-                idx = np.clip(idx, 0, len(raw_vals) - 1)
-                values = phys[idx]
+            return ConversionKernel(conversion_type, (raw_vals, phys))
 
         elif conversion_type == v4c.CONVERSION_TYPE_RTAB:
             nr = (self['val_param_nr'] - 1) // 3
@@ -1984,27 +2366,9 @@ class ChannelConversion(dict):
             phys = np.array(
                 [self['phys_{}'.format(i)] for i in range(nr)]
             )
-            default = self['default']
-
-            if values.dtype.kind == 'f':
-                idx1 = np.searchsorted(lower, values, side='right') - 1
-                idx2 = np.searchsorted(upper, values, side='right')
-            else:
-                idx1 = np.searchsorted(lower, values, side='right') - 1
-                idx2 = np.searchsorted(upper, values, side='right') - 1
-
-            idx_ne = np.argwhere(idx1 != idx2).flatten()
-            idx_eq = np.argwhere(idx1 == idx2).flatten()
-
-            new_values = np.zeros(
-                len(values),
-                dtype=phys.dtype,
-            )
-
-            new_values[idx_ne] = default
-            new_values[idx_eq] = phys[idx1[idx_eq]]
-
-            values = new_values
+            # the default value is stored after the ranges values
+            phys = np.append(phys, self['default'])
+            return ConversionKernel(conversion_type, (lower, upper, phys))
 
         elif conversion_type == v4c.CONVERSION_TYPE_TABX:
             nr = self['val_param_nr']
@@ -2027,10 +2391,8 @@ class ChannelConversion(dict):
 
             phys = np.insert(phys, 0, default)
             raw_vals = np.insert(raw_vals, 0, raw_vals[0] - 1)
-            indexes = np.searchsorted(raw_vals, values)
-            np.place(indexes, indexes >= len(raw_vals), 0)
 
-            values = phys[indexes]
+            return ConversionKernel(conversion_type, (raw_vals, phys))
 
         elif conversion_type == v4c.CONVERSION_TYPE_RTABX:
             nr = self['val_param_nr'] // 2
@@ -2060,53 +2422,17 @@ class ChannelConversion(dict):
                 [self['upper_{}'.format(i)] for i in range(nr)]
             )
 
+            # the default text or conversion is stored after the ranges
+            # items. The texts only tables are prebuilt as numpy arrays;
+            # otherwise the referenced conversion blocks are kept as they are
             all_values = phys + [default, ]
-
-            if values.dtype.kind == 'f':
-                idx1 = np.searchsorted(lower, values, side='right') - 1
-                idx2 = np.searchsorted(upper, values, side='right')
-            else:
-                idx1 = np.searchsorted(lower, values, side='right') - 1
-                idx2 = np.searchsorted(upper, values, side='right') - 1
-
-            idx_ne = np.argwhere(idx1 != idx2).flatten()
-            idx_eq = np.argwhere(idx1 == idx2).flatten()
-
             if all(isinstance(val, bytes) for val in all_values):
-                phys = np.array(phys)
                 all_values = np.array(all_values)
 
-                new_values = np.zeros(
-                    len(values),
-                    dtype=all_values.dtype,
-                )
-
-                new_values[idx_ne] = default
-                new_values[idx_eq] = phys[idx1[idx_eq]]
-
-                values = new_values
-            else:
-                new_values = []
-                for i, val in enumerate(values):
-                    if i in idx_ne:
-                        item = default
-                    else:
-                        item = phys[idx1[i]]
-
-                    if isinstance(item, bytes):
-                        new_values.append(item)
-                    else:
-                        new_values.append(item.convert(values[i:i+1])[0])
-
-                if all(isinstance(v, bytes) for v in new_values):
-                    values = np.array(new_values)
-                else:
-                    values = np.array(
-                        [
-                            np.nan if isinstance(v, bytes) else v
-                            for v in new_values
-                        ]
-                    )
+            return ConversionKernel(
+                conversion_type,
+                (lower, upper, all_values),
+            )
 
         elif conversion_type == v4c.CONVERSION_TYPE_TTAB:
             nr = self['val_param_nr'] - 1
@@ -2116,17 +2442,16 @@ class ChannelConversion(dict):
                 for i in range(nr)
             ]
             phys = [self['val_{}'.format(i)] for i in range(nr)]
-            default = self['val_default']
 
-            new_values = []
-            for val in values:
-                try:
-                    val = phys[raw_values.index(val)]
-                except ValueError:
-                    val = default
-                new_values.append(val)
+            # the first table entry is used for duplicated texts
+            table = {}
+            for raw_value, phys_value in zip(raw_values, phys):
+                table.setdefault(raw_value, phys_value)
 
-            values = np.array(new_values)
+            return ConversionKernel(
+                conversion_type,
+                (table, self['val_default']),
+            )
 
         elif conversion_type == v4c.CONVERSION_TYPE_TRANS:
             nr = (self['ref_param_nr'] - 1) // 2
@@ -2147,15 +2472,142 @@ class ChannelConversion(dict):
                 .strip(b'\0')
             )
 
-            new_values = []
-            for val in values:
-                try:
-                    val = out_[in_.index(val.strip(b'\0'))]
-                except ValueError:
-                    val = default
-                new_values.append(val)
+            table = {}
+            for input_, output in zip(in_, out_):
+                table.setdefault(input_, output)
+
+            return ConversionKernel(conversion_type, (table, default))
+
+        return ConversionKernel(conversion_type)
+
+    def convert(self, values):
+        kernel = self._kernel
+        if kernel is None:
+            kernel = self._kernel = self.compile()
+
+        conversion_type = kernel.conversion_type
+        if conversion_type == v4c.CONVERSION_TYPE_NON:
+            pass
+        elif conversion_type == v4c.CONVERSION_TYPE_LIN:
+            a = self['a']
+            b = self['b']
+            if (a, b) != (1, 0):
+                values = values * a
+                if b:
+                    values += b
+        elif conversion_type in (
+                v4c.CONVERSION_TYPE_RAT,
+                v4c.CONVERSION_TYPE_ALG):
+            if kernel.expression is not None:
+                values = kernel.evaluate(values)
+
+        elif conversion_type in (
+                v4c.CONVERSION_TYPE_TABI,
+                v4c.CONVERSION_TYPE_TAB):
+            raw_vals, phys = kernel.tables
+
+            if conversion_type == v4c.CONVERSION_TYPE_TABI:
+                values = np.interp(values, raw_vals, phys)
+            else:
+                idx = np.searchsorted(raw_vals, values)
+                idx = np.clip(idx, 0, len(raw_vals) - 1)
+                values = phys[idx]
+
+        elif conversion_type == v4c.CONVERSION_TYPE_RTAB:
+            lower, upper, phys = kernel.tables
 
-            values = np.array(new_values)
+            values = phys[_get_range_indexes(lower, upper, values)]
+
+        elif conversion_type == v4c.CONVERSION_TYPE_TABX:
+            raw_vals, phys = kernel.tables
+
+            indexes = np.searchsorted(raw_vals, values)
+            np.place(indexes, indexes >= len(raw_vals), 0)
+
+            values = phys[indexes]
+
+        elif conversion_type == v4c.CONVERSION_TYPE_RTABX:
+            lower, upper, all_values = kernel.tables
+
+            ranges = _get_range_indexes(lower, upper, values)
+
+            if isinstance(all_values, np.ndarray):
+                values = all_values[ranges]
+            else:
+                # group the samples by range and apply each referenced
+                # conversion once to all the samples of its range
+                uniques, indexes = np.unique(ranges, return_inverse=True)
+                order = np.argsort(indexes, kind='mergesort')
+                bounds = np.searchsorted(
+                    indexes[order],
+                    np.arange(len(uniques) + 1),
+                )
+
+                groups = []
+                for i, range_index in enumerate(uniques):
+                    samples = order[bounds[i]: bounds[i + 1]]
+                    item = all_values[range_index]
+                    if isinstance(item, bytes):
+                        groups.append((samples, item, True))
+                    else:
+                        item = item.convert(values[samples])
+                        groups.append((samples, item, item.dtype.kind == 'S'))
+
+                if not groups:
+                    # the empty output keeps the float dtype
+                    new_values = np.array([], dtype=np.float64)
+                elif all(is_text for _, _, is_text in groups):
+                    size = max(
+                        [1, ] + [
+                            np.array(item).itemsize
+                            for _, item, _ in groups
+                        ]
+                    )
+                    new_values = np.zeros(
+                        len(values),
+                        dtype='S{}'.format(size),
+                    )
+                    for samples, item, _ in groups:
+                        new_values[samples] = item
+                else:
+                    # the texts are replaced by NaN if any range has a
+                    # numeric conversion
+                    dtypes = [
+                        np.float64 if is_text else item.dtype
+                        for _, item, is_text in groups
+                    ]
+                    new_values = np.empty(
+                        len(values),
+                        dtype=np.result_type(*dtypes),
+                    )
+                    for samples, item, is_text in groups:
+                        if is_text:
+                            new_values[samples] = np.nan
+                        else:
+                            new_values[samples] = item
+
+                values = new_values
+
+        elif conversion_type == v4c.CONVERSION_TYPE_TTAB:
+            table, default = kernel.tables
+
+            # only the unique texts are looked up in the table
+            uniques, indexes = np.unique(values, return_inverse=True)
+            uniques = np.array([
+                table.get(val, default)
+                for val in uniques.tolist()
+            ])
+            values = uniques[indexes]
+
+        elif conversion_type == v4c.CONVERSION_TYPE_TRANS:
+            table, default = kernel.tables
+
+            uniques, indexes = np.unique(values, return_inverse=True)
+            uniques = np.array([
+                table.get(val.strip(b'\0'), default)
+                for val in uniques.tolist()
+            ])
+            values = uniques[indexes]
 
         return values
 
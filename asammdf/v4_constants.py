@@ -27,6 +27,12 @@ SIGNAL_TYPE_ARRAY = 4
 SIGNAL_TYPE_BYTEARRAY = 5
 
 SIGNED_INT = {DATA_TYPE_SIGNED_INTEL, DATA_TYPE_SIGNED_MOTOROLA}
+INT_TYPES = {
+    DATA_TYPE_UNSIGNED_INTEL,
+    DATA_TYPE_UNSIGNED_MOTOROLA,
+    DATA_TYPE_SIGNED_INTEL,
+    DATA_TYPE_SIGNED_MOTOROLA,
+}
 STANDARD_INT_SIZES = {8, 16, 32, 64}
 
 CHANNEL_TYPE_VALUE = 0
@@ -0,0 +1,186 @@
+"""
+benchmark the extraction of not byte aligned integer channels: the previous
+unpackbits/roll/packbits implementation vs the strided word kernel
+"""
+from __future__ import print_function, division
+import argparse
+import sys
+
+import numpy as np
+from numpy.core.records import fromarrays, fromstring
+
+from asammdf.utils import as_non_byte_sized_signed_int, extract_bit_field
+
+
+PYVERSION = sys.version_info[0]
+
+if PYVERSION > 2:
+    from time import perf_counter
+else:
+    from time import clock as perf_counter
+
+
+def unpackbits_extract(
+        data,
+        record_size,
+        byte_offset,
+        bit_offset,
+        bit_count,
+        big_endian=False,
+        signed=False):
+    """ previous bit field extraction based on unpackbits, roll and packbits
+    """
+    byte_count = (bit_offset + bit_count + 7) >> 3
+
+    types = [
+        ('', 'a{}'.format(byte_offset)),
+        ('vals', '({},)u1'.format(byte_count)),
+        ('', 'a{}'.format(record_size - byte_count - byte_offset)),
+    ]
+    vals = fromstring(data, dtype=np.dtype(types))['vals']
+
+    if not big_endian:
+        vals = np.flip(vals, 1)
+
+    vals = np.unpackbits(vals)
+    vals = np.roll(vals, bit_offset)
+    vals = vals.reshape((len(vals) // 8, 8))
+    vals = np.packbits(vals)
+    vals = vals.reshape((len(vals) // byte_count, byte_count))
+
+    mask = 2 ** bit_count - 1
+    masks = []
+    while mask:
+        masks.append(mask & 0xFF)
+        mask >>= 8
+    masks.extend([0] * (byte_count - len(masks)))
+    for i, mask in enumerate(reversed(masks)):
+        vals[:, i] &= mask
+
+    if not big_endian:
+        vals = np.flip(vals, 1)
+
+    for size in (1, 2, 4, 8):
+        if size << 3 >= bit_count:
+            break
+
+    if size > byte_count:
+        extra = np.zeros((len(vals), size - byte_count), dtype=np.uint8)
+        types = [
+            ('vals', vals.dtype, vals.shape[1:]),
+            ('', extra.dtype, extra.shape[1:]),
+        ]
+        vals = fromarrays([vals, extra], dtype=np.dtype(types))
+
+    vals = vals.tostring()
+
+    fmt = '{}{}{}'.format(
+        '>' if big_endian else '<',
+        'i' if signed else 'u',
+        size,
+    )
+    if size <= byte_count:
+        if big_endian:
+            types = [('', 'a{}'.format(byte_count - size)), ('vals', fmt)]
+        else:
+            types = [('vals', fmt), ('', 'a{}'.format(byte_count - size))]
+    else:
+        types = [('vals', fmt), ]
+
+    vals = fromstring(vals, dtype=np.dtype(types))['vals']
+
+    if signed:
+        return as_non_byte_sized_signed_int(vals, bit_count)
+    else:
+        return vals
+
+
+def timeit(func, repeat, *args, **kwargs):
+    """ best execution time in ms """
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = func(*args, **kwargs)
+        elapsed = perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best * 1000, result
+
+
+def main(cycles, record_size, repeat):
+    data = np.random.randint(
+        0,
+        256,
+        size=cycles * record_size,
+    ).astype(np.uint8).tostring()
+
+    header = '{:<10} {:<10} {:<8} {:>14} {:>14} {:>8}'.format(
+        'bit count',
+        'byte order',
+        'signed',
+        'unpackbits ms',
+        'kernel ms',
+        'speedup',
+    )
+    print('{} records of {} bytes'.format(cycles, record_size))
+    print()
+    print(header)
+    print('=' * len(header))
+
+    for bit_count in (12, 20, 33):
+        for big_endian in (False, True):
+            for signed in (False, True):
+                args = data, record_size, 3, 5, bit_count, big_endian, signed
+
+                old_time, old = timeit(unpackbits_extract, repeat, *args)
+                new_time, new = timeit(extract_bit_field, repeat, *args)
+
+                # the previous implementation padded the Motorola values at
+                # the wrong end when the integer size was larger than the
+                # field bytes (for example 33 bits stored in 5 bytes)
+                if not big_endian or new.itemsize <= (5 + bit_count + 7) >> 3:
+                    assert np.array_equal(old, new)
+
+                print('{:<10} {:<10} {:<8} {:>14.2f} {:>14.2f} {:>7.1f}x'.format(
+                    bit_count,
+                    'Motorola' if big_endian else 'Intel',
+                    str(signed),
+                    old_time,
+                    new_time,
+                    old_time / new_time,
+                ))
+
+
+def _cmd_line_parser():
+    '''
+    return a command line parser. It is used when generating the documentation
+    '''
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        '--cycles',
+        help='number of records',
+        type=int,
+        default=1000000,
+    )
+    parser.add_argument(
+        '--record-size',
+        help='record size in bytes',
+        type=int,
+        default=16,
+    )
+    parser.add_argument(
+        '--repeat',
+        help='number of runs for each measurement',
+        type=int,
+        default=5,
+    )
+
+    return parser
+
+
+if __name__ == '__main__':
+    cmd_parser = _cmd_line_parser()
+    args = cmd_parser.parse_args(sys.argv[1:])
+
+    main(args.cycles, args.record_size, args.repeat)
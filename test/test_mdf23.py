@@ -1,11 +1,15 @@
 #!/usr/bin/env python
 from __future__ import print_function
 import unittest
+from struct import pack
 
 import numpy as np
 
 from utils import MEMORY
 from asammdf import MDF, MDF2, MDF3, Signal
+from asammdf import v2_v3_constants as v3c
+from asammdf.utils import get_record_offsets, get_records
+from asammdf.v2_v3_blocks import ChannelConversion
 
 CHANNEL_LEN = 10000
 
@@ -163,6 +167,117 @@ class TestMDF23(unittest.TestCase):
             self.assertTrue(np.array_equal(ret_sig_float.samples,
                                            sig_float.samples))
 
+    def test_get_time_range(self):
+
+        timestamps = np.arange(CHANNEL_LEN) * 0.01
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            timestamps,
+            name='Integer Channel',
+            unit='unit1',
+        )
+
+        with MDF(version='3.30') as mdf:
+            mdf.append([sig_int])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        start, stop = 12.345, 23.456
+        mask = (timestamps >= start) & (timestamps <= stop)
+
+        for memory in MEMORY:
+            with MDF(outfile, memory=memory) as mdf:
+                mdf.configure(read_fragment_size=4096)
+                ret_sig_int = mdf.get(sig_int.name, start=start, stop=stop)
+
+            self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                           sig_int.samples[mask]))
+            self.assertTrue(np.array_equal(ret_sig_int.timestamps,
+                                           timestamps[mask]))
+
+    def test_conversion_kernel(self):
+        raw = np.arange(-5, 120)
+
+        conversion = ChannelConversion(
+            conversion_type=v3c.CONVERSION_TYPE_POLY,
+            P1=1., P2=2., P3=3., P4=4., P5=5., P6=6.,
+        )
+        expected = (2 - (4 * (raw - 11))) / (3 * (raw - 11) - 1)
+        for _ in range(2):
+            self.assertTrue(np.allclose(conversion.convert(raw), expected))
+        self.assertEqual(len(conversion._kernel.programs), 1)
+
+        conversion = ChannelConversion(
+            conversion_type=v3c.CONVERSION_TYPE_FORMULA,
+            formula=b'X * 2 + 1\0',
+        )
+        self.assertTrue(np.array_equal(conversion.convert(raw), raw * 2 + 1))
+
+        # changing a field drops the compiled kernel
+        conversion = ChannelConversion(
+            conversion_type=v3c.CONVERSION_TYPE_TABI,
+            ref_param_nr=2,
+            raw_0=0., phys_0=0.,
+            raw_1=10., phys_1=100.,
+        )
+        self.assertTrue(np.array_equal(conversion.convert(np.array([5.])), [50.]))
+        conversion['phys_1'] = 1000.
+        self.assertIsNone(conversion._kernel)
+        self.assertTrue(np.array_equal(conversion.convert(np.array([5.])), [500.]))
+
+    def test_get_many(self):
+
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Integer Channel',
+            unit='unit1',
+        )
+
+        sig_float = Signal(
+            np.random.random(CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Float Channel',
+            unit='unit2',
+        )
+
+        for memory in MEMORY:
+            with MDF(version='3.30', memory=memory) as mdf:
+                mdf.append([sig_int, sig_float])
+                outfile = mdf.save('tmp', overwrite=True)
+
+            with MDF(outfile, memory=memory) as mdf:
+                signals = mdf.get_many(0, [2, 1])
+                expected = [mdf.get(group=0, index=2), mdf.get(group=0, index=1)]
+
+            for signal, target in zip(signals, expected):
+                self.assertEqual(signal.name, target.name)
+                self.assertEqual(signal.unit, target.unit)
+                self.assertTrue(np.array_equal(signal.samples, target.samples))
+                self.assertTrue(np.array_equal(signal.timestamps,
+                                               target.timestamps))
+            self.assertTrue(np.array_equal(signals[0].samples,
+                                           sig_float.samples))
+
+    def test_unsorted_records(self):
+
+        record_sizes = {1: 3, 2: 5, 7: 2}
+        records = {1: [], 2: [], 7: []}
+        data = []
+        for i in range(100):
+            rec_id = (1, 2, 7)[i % 3]
+            record = pack('<B', i % 256) * record_sizes[rec_id]
+            records[rec_id].append(record)
+            # the record id is repeated after the record
+            data.append(pack('<B', rec_id) + record + pack('<B', rec_id))
+        data = b''.join(data)
+
+        offsets = get_record_offsets(data, 1, record_sizes, trailing_id_nr=1)
+        for rec_id, size in record_sizes.items():
+            self.assertEqual(
+                get_records(data, offsets[rec_id], size),
+                b''.join(records[rec_id]),
+            )
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,15 +1,52 @@
 #!/usr/bin/env python
 from __future__ import print_function
+import os
+import pickle
+import sys
 import unittest
+from struct import pack, unpack
 
 import numpy as np
 
 from utils import MEMORY
-from asammdf import MDF, MDF4, Signal
+from asammdf import MDF, MDF4, MDF4Writer, Signal
+from asammdf import v4_constants as v4c
+from asammdf.utils import (
+    LRUCache,
+    extract_bit_field,
+    get_cached_size,
+    get_record_offsets,
+    get_records,
+    get_unique_name,
+    get_unique_names,
+    get_vlsd_values,
+    pad_vlsd_values,
+)
+from asammdf.v4_blocks import ChannelConversion, DataBlock, DataList, TextBlock
+
+try:
+    import h5py
+except ImportError:
+    h5py = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
 
 CHANNEL_LEN = 100000
 
 
+class _MkdirOnLoad(object):
+    """ pickled object that creates a folder when it is unpickled """
+
+    def __init__(self, path):
+        self.path = path
+
+    def __reduce__(self):
+        return os.mkdir, (self.path,)
+
+
 class TestMDF4(unittest.TestCase):
 
     def test_measurement(self):
@@ -86,6 +123,1120 @@ class TestMDF4(unittest.TestCase):
             self.assertTrue(np.array_equal(ret_sig_float.samples,
                                            sig_float.samples))
 
+    def test_read_mdf4_memory_map(self):
+
+        seed = np.random.randint(0, 2**31)
+
+        np.random.seed(seed)
+        print('Read 4.10 memory map using seed =', seed)
+
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Integer Channel',
+            unit='unit1',
+        )
+
+        sig_float = Signal(
+            np.random.random(CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Float Channel',
+            unit='unit2',
+        )
+
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_int, sig_float], common_timebase=True)
+            outfile = mdf.save('tmp', overwrite=True)
+
+        for memory in ('low', 'minimum'):
+            with MDF(outfile, memory=memory) as mdf:
+                mdf.configure(use_memory_map=True, read_fragment_size=4096)
+                ret_sig_int = mdf.get(sig_int.name)
+                ret_sig_float = mdf.get(sig_float.name)
+
+            self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                           sig_int.samples))
+            self.assertTrue(np.array_equal(ret_sig_float.samples,
+                                           sig_float.samples))
+
+    def test_metadata_cache(self):
+
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Integer Channel',
+            unit='unit1',
+        )
+
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_int])
+            outfile = mdf.save('tmp', overwrite=True)
+        index_file = outfile + '.idx'
+
+        try:
+            for memory in ('low', 'minimum'):
+                for _ in range(2):
+                    with MDF(outfile, memory=memory, use_metadata_cache=True) as mdf:
+                        ret_sig_int = mdf.get(sig_int.name)
+                    self.assertTrue(os.path.isfile(index_file))
+                    self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                                   sig_int.samples))
+                    self.assertEqual(ret_sig_int.unit, sig_int.unit)
+
+            # the index files without the magic and the globals other than
+            # the block classes and the numpy arrays are not loaded
+            marker = outfile + '.marker'
+            payload = _MkdirOnLoad(marker)
+            for content in (
+                    pickle.dumps(payload),
+                    b'ASAMMDF-IDX-1' + pickle.dumps(payload)):
+                with open(index_file, 'wb') as index:
+                    index.write(content)
+                with MDF(outfile, memory='low', use_metadata_cache=True) as mdf:
+                    ret_sig_int = mdf.get(sig_int.name)
+                self.assertFalse(os.path.exists(marker))
+                self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                               sig_int.samples))
+        finally:
+            if os.path.isfile(index_file):
+                os.remove(index_file)
+
+    def test_lazy_channels(self):
+
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Integer Channel',
+            unit='unit1',
+            comment='comment1',
+        )
+
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_int])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        with MDF(outfile, memory='low') as mdf:
+            source = mdf.groups[0]['channels'][0].source
+
+        for memory in ('full', 'low'):
+            with MDF(outfile, memory=memory, lazy_channels=True) as mdf:
+                channel = mdf.groups[0]['channels'][1]
+                self.assertEqual(channel.lazy, memory == 'low')
+                self.assertEqual(channel.name, sig_int.name)
+
+                # the time channel has no conversion block and its source
+                # block is the same as in the non lazy mode
+                time_channel = mdf.groups[0]['channels'][0]
+                self.assertEqual(time_channel.lazy, memory == 'low')
+                self.assertIsNone(time_channel.conversion)
+                self.assertFalse(time_channel.lazy)
+                self.assertEqual(time_channel.source.name, source.name)
+                self.assertEqual(time_channel.source.path, source.path)
+                self.assertEqual(time_channel.source, source)
+                self.assertTrue(np.array_equal(mdf.get_master(0),
+                                               sig_int.timestamps))
+
+                ret_sig_int = mdf.get(sig_int.name)
+                self.assertFalse(channel.lazy)
+                self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                               sig_int.samples))
+                self.assertEqual(ret_sig_int.unit, sig_int.unit)
+                self.assertEqual(ret_sig_int.comment, sig_int.comment)
+
+    def test_channel_catalog(self):
+
+        signals = [
+            Signal(
+                np.arange(CHANNEL_LEN).astype(dtype),
+                np.arange(CHANNEL_LEN, dtype=np.float64),
+                name='Channel_{}'.format(i),
+            )
+            for i, dtype in enumerate((np.uint8, np.int16, np.float32, np.float64))
+        ]
+
+        with MDF(version='4.10') as mdf:
+            mdf.append(signals)
+            outfile = mdf.save('tmp', overwrite=True)
+
+        for memory in MEMORY:
+            with MDF(outfile, memory=memory) as mdf:
+                group = mdf.groups[0]
+                catalog = mdf._get_channel_catalog(group)
+                self.assertEqual(len(catalog), len(signals) + 1)
+                self.assertEqual(
+                    catalog.names[1:],
+                    [signal.name for signal in signals],
+                )
+                self.assertEqual(catalog[2]['bit_count'], 16)
+                self.assertIn('channel 4', mdf.info()['group 0'])
+
+                for signal in signals:
+                    ret = mdf.get(signal.name, samples_only=True, raw=True)
+                    self.assertTrue(np.array_equal(ret, signal.samples))
+
+                # saving rewrites the channel blocks links
+                saved_file = mdf.save('tmp_catalog', overwrite=True)
+                self.assertNotIn('catalog', mdf.groups[0])
+            os.remove(saved_file)
+
+    def test_concatenate_processes(self):
+
+        outfiles = []
+        for i in range(3):
+            sig_int = Signal(
+                np.arange(CHANNEL_LEN, dtype=np.int32) + i,
+                np.arange(CHANNEL_LEN, dtype=np.float64),
+                name='Integer Channel',
+            )
+            with MDF(version='4.10') as mdf:
+                mdf.append([sig_int])
+                outfiles.append(mdf.save('tmp{}'.format(i), overwrite=True))
+
+        for processes in (0, 2):
+            with MDF.concatenate(outfiles, processes=processes) as merged:
+                ret_sig_int = merged.get('Integer Channel')
+
+            self.assertEqual(len(ret_sig_int), 3 * CHANNEL_LEN)
+            self.assertTrue(np.array_equal(
+                ret_sig_int.samples[CHANNEL_LEN: 2 * CHANNEL_LEN],
+                np.arange(CHANNEL_LEN, dtype=np.int32) + 1,
+            ))
+            self.assertTrue((np.diff(ret_sig_int.timestamps) > 0).all())
+
+        for outfile in outfiles:
+            os.remove(outfile)
+
+        # the groups decoded by the workers are the same as the groups
+        # decoded in the calling process; the version 3 groups cannot be
+        # copied as raw records so they are all decoded by the workers
+        for version in ('3.30', '4.10'):
+            outfiles = []
+            for i in range(3):
+                with MDF(version=version) as mdf:
+                    for j, dtype in enumerate((np.int32, np.uint8, np.float64)):
+                        mdf.append([
+                            Signal(
+                                (np.arange(CHANNEL_LEN) * (j + 1) + i).astype(dtype),
+                                np.arange(CHANNEL_LEN, dtype=np.float64) * (j + 1),
+                                name='Channel_{}'.format(j),
+                            ),
+                        ])
+                    outfiles.append(
+                        mdf.save('tmp{}'.format(i), overwrite=True)
+                    )
+
+            results = []
+            for processes in (0, 2):
+                with MDF.concatenate(outfiles, processes=processes) as merged:
+                    results.append([
+                        merged.get('Channel_{}'.format(j))
+                        for j in range(3)
+                    ])
+
+            for expected, signal in zip(*results):
+                self.assertEqual(len(signal), 3 * CHANNEL_LEN)
+                self.assertTrue(np.array_equal(signal.samples,
+                                               expected.samples))
+                self.assertTrue(np.array_equal(signal.timestamps,
+                                               expected.timestamps))
+
+            for outfile in outfiles:
+                os.remove(outfile)
+
+    def test_concatenate_raw_records(self):
+
+        sig_int = Signal(
+            np.arange(CHANNEL_LEN, dtype=np.int32),
+            np.arange(CHANNEL_LEN, dtype=np.float64),
+            name='Integer Channel',
+        )
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_int])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        for memory in MEMORY:
+            with MDF.concatenate([outfile, outfile], memory=memory) as merged:
+                with MDF(outfile, memory=memory) as mdf:
+                    self.assertTrue(
+                        MDF._raw_concatenate_compatible(
+                            mdf,
+                            merged,
+                            0,
+                            mdf._included_channels(0),
+                        )
+                    )
+                ret_sig_int = merged.get('Integer Channel')
+                merged_file = merged.save('tmp_merged', overwrite=True)
+
+            self.assertTrue(np.array_equal(
+                ret_sig_int.samples,
+                np.concatenate([sig_int.samples, sig_int.samples]),
+            ))
+
+            # the raw copied records must update the channels limits
+            with MDF(merged_file) as mdf:
+                time_channel, int_channel = mdf.groups[0]['channels']
+                self.assertEqual(
+                    time_channel['max_raw_value'],
+                    ret_sig_int.timestamps[-1],
+                )
+                self.assertEqual(
+                    int_channel['max_raw_value'],
+                    sig_int.samples.max(),
+                )
+            os.remove(merged_file)
+            last_timestamp = sig_int.timestamps[-1]
+            delta = last_timestamp / CHANNEL_LEN
+            self.assertTrue(np.allclose(
+                ret_sig_int.timestamps[CHANNEL_LEN:],
+                sig_int.timestamps + last_timestamp + delta,
+            ))
+
+    def test_export_csv(self):
+
+        sig_int = Signal(
+            np.arange(CHANNEL_LEN, dtype=np.int32),
+            np.arange(CHANNEL_LEN, dtype=np.float64),
+            name='Integer Channel',
+            unit='unit1',
+        )
+        sig_float = Signal(
+            np.arange(CHANNEL_LEN // 2, dtype=np.float64) * 0.5,
+            np.arange(CHANNEL_LEN // 2, dtype=np.float64) * 2 + 0.5,
+            name='Float Channel',
+            unit='unit2',
+        )
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_int])
+            mdf.append([sig_float])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        master = np.union1d(sig_int.timestamps, sig_float.timestamps)
+
+        for memory in MEMORY:
+            with MDF(outfile, memory=memory) as mdf:
+                mdf.export(
+                    'csv',
+                    filename='tmp_export.csv',
+                    single_time_base=True,
+                    time_from_zero=False,
+                    chunk_size=1000,
+                )
+                mdf.export(
+                    'csv',
+                    filename='tmp_export',
+                    time_from_zero=False,
+                    chunk_size=1000,
+                )
+
+            with open('tmp_export.csv') as csvfile:
+                self.assertEqual(
+                    csvfile.readline().strip(),
+                    't [s],Integer Channel [unit1],Float Channel [unit2]',
+                )
+            values = np.loadtxt('tmp_export.csv', delimiter=',', skiprows=1)
+            self.assertTrue(np.array_equal(values[:, 0], master))
+            self.assertTrue(np.array_equal(
+                values[:, 1],
+                sig_int.interp(master).samples,
+            ))
+            self.assertTrue(np.allclose(
+                values[:, 2],
+                sig_float.interp(master).samples,
+            ))
+
+            values = np.loadtxt(
+                'tmp_export_DataGroup_2.csv',
+                delimiter=',',
+                skiprows=1,
+            )
+            self.assertTrue(np.array_equal(values[:, 0], sig_float.timestamps))
+            self.assertTrue(np.array_equal(values[:, 1], sig_float.samples))
+
+        for name in ('tmp_export.csv', 'tmp_export_DataGroup_1.csv',
+                     'tmp_export_DataGroup_2.csv'):
+            os.remove(name)
+
+    @unittest.skipIf(h5py is None, 'h5py is not installed')
+    def test_export_hdf5(self):
+
+        sig_int = Signal(
+            np.arange(CHANNEL_LEN, dtype=np.int32),
+            np.arange(CHANNEL_LEN, dtype=np.float64),
+            name='Integer Channel',
+            unit='unit1',
+            comment='comment1',
+        )
+        sig_float = Signal(
+            np.arange(CHANNEL_LEN // 2, dtype=np.float64) * 0.5,
+            np.arange(CHANNEL_LEN // 2, dtype=np.float64) * 2 + 0.5,
+            name='Float Channel',
+            unit='unit2',
+        )
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_int])
+            mdf.append([sig_float])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        master = np.union1d(sig_int.timestamps, sig_float.timestamps)
+
+        for memory in MEMORY:
+            with MDF(outfile, memory=memory) as mdf:
+                mdf.configure(read_fragment_size=4096)
+                mdf.export(
+                    'hdf5',
+                    filename='tmp_resampled',
+                    single_time_base=True,
+                    time_from_zero=False,
+                    chunk_size=1000,
+                    compression='gzip',
+                )
+                mdf.export('hdf5', filename='tmp_groups', compression='lzf')
+
+            with h5py.File('tmp_resampled.hdf', 'r') as hdf:
+                group = hdf['tmp_resampled.hdf']
+                dataset = group['Integer Channel']
+                self.assertEqual(dataset.compression, 'gzip')
+                self.assertIsNotNone(dataset.chunks)
+                self.assertEqual(dataset.attrs['unit'], 'unit1')
+                self.assertEqual(dataset.attrs['comment'], 'comment1')
+                self.assertTrue(np.array_equal(group['t'][()], master))
+                self.assertTrue(np.array_equal(
+                    dataset[()],
+                    sig_int.interp(master).samples,
+                ))
+                self.assertTrue(np.array_equal(
+                    group['Float Channel'][()],
+                    sig_float.interp(master).samples,
+                ))
+
+            with h5py.File('tmp_groups.hdf', 'r') as hdf:
+                group = hdf['DataGroup_1']
+                dataset = group['Integer Channel']
+                self.assertEqual(dataset.compression, 'lzf')
+                self.assertTrue(np.array_equal(dataset[()], sig_int.samples))
+                self.assertTrue(np.array_equal(
+                    group[group.attrs['master']][()],
+                    sig_int.timestamps,
+                ))
+                self.assertTrue(np.array_equal(
+                    hdf['DataGroup_2']['Float Channel'][()],
+                    sig_float.samples,
+                ))
+
+        for name in ('tmp_resampled.hdf', 'tmp_groups.hdf'):
+            os.remove(name)
+
+    @unittest.skipIf(h5py is None, 'h5py is not installed')
+    def test_export_hdf5_strings(self):
+
+        cycles = 2000
+        samples = np.array(
+            [b'a'] * (cycles // 2) + [b'b' * 40] * (cycles // 2)
+        )
+        sig_str = Signal(
+            samples,
+            np.arange(cycles, dtype=np.float64),
+            name='String Channel',
+        )
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_str])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        for memory in MEMORY:
+            with MDF(outfile, memory=memory) as mdf:
+                mdf.configure(read_fragment_size=4096)
+                mdf.export(
+                    'hdf5',
+                    filename='tmp_resampled',
+                    single_time_base=True,
+                    chunk_size=100,
+                )
+                mdf.export('hdf5', filename='tmp_groups')
+
+            with h5py.File('tmp_resampled.hdf', 'r') as hdf:
+                dataset = hdf['tmp_resampled.hdf']['String Channel']
+                self.assertEqual(list(dataset[()]), list(samples))
+
+            with h5py.File('tmp_groups.hdf', 'r') as hdf:
+                dataset = hdf['DataGroup_1']['String Channel']
+                self.assertEqual(list(dataset[()]), list(samples))
+
+        for name in ('tmp_resampled.hdf', 'tmp_groups.hdf'):
+            os.remove(name)
+
+    @unittest.skipIf(pq is None, 'pyarrow is not installed')
+    def test_export_parquet(self):
+
+        sig_int = Signal(
+            np.arange(CHANNEL_LEN, dtype=np.int32),
+            np.arange(CHANNEL_LEN, dtype=np.float64),
+            name='Integer Channel',
+            unit='unit1',
+            comment='comment1',
+        )
+        sig_float = Signal(
+            np.arange(CHANNEL_LEN // 2, dtype=np.float64) * 0.5,
+            np.arange(CHANNEL_LEN // 2, dtype=np.float64) * 2 + 0.5,
+            name='Float Channel',
+            unit='unit2',
+        )
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_int])
+            mdf.append([sig_float])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        master = np.union1d(sig_int.timestamps, sig_float.timestamps)
+
+        for memory in MEMORY:
+            with MDF(outfile, memory=memory) as mdf:
+                mdf.export(
+                    'parquet',
+                    filename='tmp_export.parquet',
+                    single_time_base=True,
+                    time_from_zero=False,
+                    chunk_size=1000,
+                )
+                mdf.export(
+                    'parquet',
+                    filename='tmp_export',
+                    time_from_zero=False,
+                )
+
+            parquet_file = pq.ParquetFile('tmp_export.parquet')
+            self.assertEqual(
+                parquet_file.metadata.num_row_groups,
+                (len(master) + 999) // 1000,
+            )
+            table = parquet_file.read()
+            self.assertEqual(
+                table.column_names,
+                ['t', 'Integer Channel', 'Float Channel'],
+            )
+            field = table.schema.field('Integer Channel')
+            self.assertEqual(field.metadata[b'unit'], b'unit1')
+            self.assertEqual(field.metadata[b'comment'], b'comment1')
+            self.assertTrue(np.array_equal(
+                table.column('t').to_numpy(),
+                master,
+            ))
+            self.assertTrue(np.array_equal(
+                table.column('Integer Channel').to_numpy(),
+                sig_int.interp(master).samples,
+            ))
+            self.assertTrue(np.array_equal(
+                table.column('Float Channel').to_numpy(),
+                sig_float.interp(master).samples,
+            ))
+
+            table = pq.read_table('tmp_export_DataGroup_2.parquet')
+            self.assertTrue(np.array_equal(
+                table.column('Float Channel').to_numpy(),
+                sig_float.samples,
+            ))
+            self.assertEqual(
+                table.schema.field('Float Channel').metadata[b'unit'],
+                b'unit2',
+            )
+
+        for name in ('tmp_export.parquet', 'tmp_export_DataGroup_1.parquet',
+                     'tmp_export_DataGroup_2.parquet'):
+            os.remove(name)
+
+    def test_minimum_blocks_cache(self):
+
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Integer Channel',
+            unit='unit1',
+        )
+
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_int])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        with MDF(outfile, memory='minimum') as mdf:
+            for _ in range(2):
+                ret_sig_int = mdf.get(sig_int.name)
+                self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                               sig_int.samples))
+                self.assertEqual(ret_sig_int.unit, sig_int.unit)
+
+            address = mdf.groups[0]['channels'][1]
+            channel = mdf._read_channel(address, mdf._file)
+            self.assertIs(channel, mdf._read_channel(address, mdf._file))
+            self.assertIs(
+                channel,
+                mdf._read_channel(address, mdf._file, load_metadata=False),
+            )
+            self.assertGreater(mdf._blocks_cache.info()['hits'], 0)
+
+            # the texts of the cached blocks count against the budget
+            self.assertGreater(
+                get_cached_size(channel),
+                sys.getsizeof(channel) + len(channel.name),
+            )
+
+    def test_record_layout(self):
+        names = ['a', 'b', 'a', 'a_0', 'a', 'b']
+        used_names = set()
+        expected = []
+        for name in names:
+            name = get_unique_name(used_names, name)
+            used_names.add(name)
+            expected.append(name)
+        self.assertEqual(get_unique_names(names), expected)
+
+        signals = [
+            Signal(
+                np.arange(CHANNEL_LEN).astype(dtype),
+                np.arange(CHANNEL_LEN, dtype=np.float64),
+                name='Channel_{}'.format(i),
+            )
+            for i, dtype in enumerate((np.uint8, np.int16, np.float32))
+        ]
+
+        with MDF(version='4.10') as mdf:
+            mdf.append(signals)
+            mdf.append(signals)
+            outfile = mdf.save('tmp', overwrite=True)
+
+        for memory in MEMORY:
+            with MDF(outfile, memory=memory) as mdf:
+                parents, types = mdf._prepare_record(mdf.groups[0])
+                other_parents, other_types = mdf._prepare_record(mdf.groups[1])
+                self.assertIs(types, other_types)
+                self.assertEqual(parents, other_parents)
+                self.assertIsNot(parents, other_parents)
+
+                for i in range(2):
+                    for signal in signals:
+                        ret = mdf.get(signal.name, i)
+                        self.assertTrue(np.array_equal(ret.samples, signal.samples))
+
+    def test_parallel_decompression(self):
+
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Integer Channel',
+            unit='unit1',
+        )
+
+        for compression in (1, 2):
+            with MDF(version='4.10') as mdf:
+                mdf.configure(write_fragment_size=4096)
+                mdf.append([sig_int])
+                outfile = mdf.save('tmp', overwrite=True, compression=compression)
+
+            for memory in ('low', 'minimum'):
+                with MDF(outfile, memory=memory) as mdf:
+                    mdf.configure(read_fragment_size=4096)
+                    target = list(mdf._load_group_data(mdf.groups[0]))
+                    mdf.configure(decompression_threads=4)
+                    fragments = list(mdf._load_group_data(mdf.groups[0]))
+                    ret_sig_int = mdf.get(sig_int.name)
+
+                self.assertTrue(len(fragments) > 1)
+                self.assertEqual(fragments, target)
+                self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                               sig_int.samples))
+
+    def test_parallel_compression(self):
+
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Integer Channel',
+            unit='unit1',
+        )
+
+        for memory in MEMORY:
+            for compression in (1, 2):
+                outputs = []
+                for threads in (0, 4):
+                    with MDF(version='4.10', memory=memory) as mdf:
+                        mdf.configure(
+                            write_fragment_size=4096,
+                            compression_threads=threads,
+                        )
+                        mdf.append([sig_int])
+                        outfile = mdf.save(
+                            'tmp',
+                            overwrite=True,
+                            compression=compression,
+                        )
+                    with MDF(outfile, memory='minimum') as mdf:
+                        group = mdf.groups[0]
+                        blocks = []
+                        for address, size in zip(group['data_block_addr'],
+                                                 group['data_block_size']):
+                            mdf._file.seek(address)
+                            blocks.append((address, mdf._file.read(size)))
+                        outputs.append(blocks)
+
+                self.assertTrue(len(outputs[0]) > 1)
+
+                self.assertEqual(outputs[0], outputs[1])
+
+    def test_get_time_range(self):
+
+        timestamps = np.arange(CHANNEL_LEN) * 0.01
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            timestamps,
+            name='Integer Channel',
+            unit='unit1',
+        )
+
+        with MDF(version='4.10') as mdf:
+            mdf.configure(write_fragment_size=4096)
+            mdf.append([sig_int])
+            outfile = mdf.save('tmp', overwrite=True, compression=2)
+        index_file = outfile + '.idx'
+
+        start, stop = 12.345, 23.456
+        mask = (timestamps >= start) & (timestamps <= stop)
+
+        try:
+            for memory in MEMORY:
+                with MDF(outfile, memory=memory, use_metadata_cache=True) as mdf:
+                    mdf.configure(read_fragment_size=4096)
+                    ret_sig_int = mdf.get(sig_int.name, start=start, stop=stop)
+                    fragments = list(mdf._load_group_data_range(0, start, stop))
+
+                # only the blocks that overlap the interval are loaded
+                loaded_size = sum(len(data) for data, _ in fragments)
+                self.assertTrue(loaded_size < 8 * 4096)
+                self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                               sig_int.samples[mask]))
+                self.assertTrue(np.array_equal(ret_sig_int.timestamps,
+                                               timestamps[mask]))
+                self.assertEqual(ret_sig_int.unit, sig_int.unit)
+
+            with MDF(outfile, memory='low', use_metadata_cache=True) as mdf:
+                self.assertIsNotNone(mdf.groups[0].get('time_index'))
+        finally:
+            if os.path.isfile(index_file):
+                os.remove(index_file)
+
+        # the master is reset in the middle of the measurement
+        timestamps = np.concatenate([timestamps, timestamps])
+        sig_int = Signal(
+            np.arange(2 * CHANNEL_LEN, dtype=np.int32),
+            timestamps,
+            name='Integer Channel',
+        )
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_int])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        mask = (timestamps >= start) & (timestamps <= stop)
+        for memory in MEMORY:
+            with MDF(outfile, memory=memory) as mdf:
+                ret_sig_int = mdf.get(sig_int.name, start=start, stop=stop)
+
+            self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                           sig_int.samples[mask]))
+            self.assertTrue(np.array_equal(ret_sig_int.timestamps,
+                                           timestamps[mask]))
+
+    def test_streaming_writer(self):
+
+        timestamps = np.arange(CHANNEL_LEN, dtype=np.float64)
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            timestamps,
+            name='Integer Channel',
+            unit='unit1',
+        )
+
+        for compression in (0, 2):
+            with MDF4Writer('tmp.mf4',
+                            compression=compression,
+                            write_fragment_size=4096,
+                            overwrite=True) as writer:
+                index = writer.append([sig_int.cut(stop=9)])
+                for i in range(10, CHANNEL_LEN, 1000):
+                    writer.extend(
+                        index,
+                        [timestamps[i: i+1000], sig_int.samples[i: i+1000]],
+                    )
+                outfile = writer.name
+
+            # the DL blocks must reference exactly their data blocks
+            with MDF(outfile, memory='minimum') as mdf:
+                address = mdf.groups[0]['data_group']['data_block_addr']
+            with open(outfile, 'rb') as stream:
+                stream.seek(address)
+                if stream.read(4) == b'##HL':
+                    stream.seek(address + v4c.COMMON_SIZE)
+                    address = unpack('<Q', stream.read(8))[0]
+                while address:
+                    data_list = DataList(address=address, stream=stream)
+                    self.assertEqual(
+                        data_list['links_nr'],
+                        data_list['data_block_nr'] + 1,
+                    )
+                    self.assertEqual(
+                        data_list['block_len'],
+                        40 + 8 * data_list['links_nr'],
+                    )
+                    address = data_list['next_dl_addr']
+
+            for memory in MEMORY:
+                with MDF(outfile, memory=memory) as mdf:
+                    ret_sig_int = mdf.get(sig_int.name)
+                    self.assertEqual(
+                        mdf.groups[0]['channel_group']['cycles_nr'],
+                        CHANNEL_LEN,
+                    )
+
+                self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                               sig_int.samples))
+                self.assertTrue(np.array_equal(ret_sig_int.timestamps,
+                                               timestamps))
+                self.assertEqual(ret_sig_int.unit, sig_int.unit)
+
+    def test_invalidation_bits(self):
+
+        timestamps = np.arange(CHANNEL_LEN, dtype=np.float64)
+        sig_int = Signal(
+            np.arange(CHANNEL_LEN, dtype='<i4'),
+            timestamps,
+            name='Integer Channel',
+        )
+        sig_uint = Signal(
+            np.arange(CHANNEL_LEN, dtype='<u2'),
+            timestamps,
+            name='Unsigned Channel',
+        )
+
+        with MDF(version='4.10') as mdf:
+            mdf.append([sig_int, sig_uint])
+
+            # add two invalidation bytes to each record
+            group = mdf.groups[0]
+            record_size = group['channel_group']['samples_byte_nr']
+            records = np.frombuffer(
+                group['data_block']['data'],
+                dtype=np.uint8,
+            ).reshape((CHANNEL_LEN, record_size))
+            invalidation = np.random.randint(
+                0, 256,
+                (CHANNEL_LEN, 2),
+            ).astype(np.uint8)
+            group['data_block'] = DataBlock(
+                data=np.hstack([records, invalidation]).tostring(),
+            )
+            group['channel_group']['invalidation_bytes_nr'] = 2
+            for ch_nr, position in ((1, 3), (2, 12)):
+                channel = group['channels'][ch_nr]
+                channel['flags'] |= v4c.FLAG_INVALIDATION_BIT_VALID
+                channel['pos_invalidation_bit'] = position
+            del group['parents'], group['types']
+
+            valid_int = (invalidation[:, 0] & 1 << 3) == 0
+            valid_uint = (invalidation[:, 1] & 1 << 4) == 0
+
+            fragment = group['data_block']['data'], 0
+            group['parents'], group['types'] = mdf._prepare_record(group)
+            masks = mdf.get_valid_masks(0, fragment)
+            self.assertEqual(sorted(masks), [1, 2])
+            self.assertTrue(np.array_equal(masks[1], valid_int))
+            self.assertTrue(np.array_equal(masks[2], valid_uint))
+
+            ret_sig_int = mdf.get(sig_int.name)
+            ret_sig_uint = mdf.get_many(0, [2])[0]
+
+        self.assertTrue(np.array_equal(ret_sig_int.samples,
+                                       sig_int.samples[valid_int]))
+        self.assertTrue(np.array_equal(ret_sig_int.timestamps,
+                                       timestamps[valid_int]))
+        self.assertTrue(np.array_equal(ret_sig_uint.samples,
+                                       sig_uint.samples[valid_uint]))
+        self.assertTrue(np.array_equal(ret_sig_uint.timestamps,
+                                       timestamps[valid_uint]))
+
+    def test_bit_fields(self):
+        record_size = 7
+        cycles = 1000
+        raw = np.random.randint(0, 256, cycles * record_size).astype(np.uint8)
+        data = raw.tostring()
+        raw = raw.reshape((cycles, record_size)).astype(object)
+
+        for byte_offset, bit_offset, bit_count in (
+                (0, 3, 12),
+                (3, 7, 20),
+                (1, 5, 33),
+                (2, 0, 40),
+                (6, 1, 7)):
+            byte_count = (bit_offset + bit_count + 7) // 8
+            fields = raw[:, byte_offset: byte_offset + byte_count]
+
+            for big_endian in (False, True):
+                # most significant byte first
+                if big_endian:
+                    msb_first = fields
+                else:
+                    msb_first = fields[:, ::-1]
+                expected = np.zeros(cycles, dtype=object)
+                for i in range(byte_count):
+                    expected = expected * 256 + msb_first[:, i]
+                expected = (expected >> bit_offset) & ((1 << bit_count) - 1)
+
+                vals = extract_bit_field(
+                    data,
+                    record_size,
+                    byte_offset,
+                    bit_offset,
+                    bit_count,
+                    big_endian=big_endian,
+                )
+                self.assertTrue(np.array_equal(vals, expected))
+
+                sign_bit = 1 << (bit_count - 1)
+                expected = np.where(
+                    expected >= sign_bit,
+                    expected - 2 * sign_bit,
+                    expected,
+                )
+                vals = extract_bit_field(
+                    data,
+                    record_size,
+                    byte_offset,
+                    bit_offset,
+                    bit_count,
+                    big_endian=big_endian,
+                    signed=True,
+                )
+                self.assertTrue(np.array_equal(vals, expected))
+
+    def test_vlsd_values(self):
+        samples = [b'', b'abc', b'\x00\x01', b'longer sample', b'z']
+        offsets = []
+        data = b''
+        for sample in samples:
+            offsets.append(len(data))
+            data += pack('<I', len(sample)) + sample
+        offsets = np.array(offsets[::-1], dtype=np.uint64)
+        samples = samples[::-1]
+
+        value_offsets, values = get_vlsd_values(data, offsets)
+        self.assertEqual(len(value_offsets), len(samples) + 1)
+        for i, sample in enumerate(samples):
+            value = values[value_offsets[i]: value_offsets[i + 1]]
+            self.assertEqual(value.tostring(), sample)
+
+        matrix = pad_vlsd_values(value_offsets, values)
+        self.assertEqual(matrix.shape, (len(samples), 13))
+        for row, sample in zip(matrix, samples):
+            self.assertEqual(row.tostring(), sample.ljust(13, b'\x00'))
+
+        with MDF(version='4.10') as mdf:
+            strings = np.array([b'', b'a', b'bc', b'def'] * 25)
+            mdf.append([Signal(strings, np.arange(100), name='Strings'), ])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        for memory in MEMORY:
+            with MDF(outfile, memory=memory) as mdf:
+                ret_strings = mdf.get('Strings').samples
+            self.assertTrue(np.array_equal(ret_strings, strings))
+
+    def test_conversion_kernel(self):
+        raw = np.arange(120)
+
+        conversion = ChannelConversion(
+            conversion_type=v4c.CONVERSION_TYPE_TAB,
+            val_param_nr=6,
+            raw_0=0, phys_0=1.5,
+            raw_1=10, phys_1=3.0,
+            raw_2=100, phys_2=-2.0,
+        )
+        expected = np.array([1.5, 3.0, -2.0])[
+            np.clip(np.searchsorted([0, 10, 100], raw), 0, 2)
+        ]
+        self.assertTrue(np.array_equal(conversion.convert(raw), expected))
+
+        # the tables are built only once
+        kernel = conversion._kernel
+        self.assertTrue(np.array_equal(conversion.convert(raw), expected))
+        self.assertIs(conversion._kernel, kernel)
+        self.assertFalse(kernel.tables[0].flags.writeable)
+
+        # changing a field drops the compiled kernel
+        conversion['phys_1'] = 4.0
+        self.assertIsNone(conversion._kernel)
+        expected[expected == 3.0] = 4.0
+        self.assertTrue(np.array_equal(conversion.convert(raw), expected))
+
+        conversion = ChannelConversion(
+            conversion_type=v4c.CONVERSION_TYPE_RAT,
+            P1=0, P2=2, P3=1, P4=0, P5=0, P6=4,
+        )
+        for values in (raw, raw.astype(np.uint8), raw * 0.5):
+            self.assertTrue(np.allclose(
+                conversion.convert(values),
+                (2 * values + 1) / 4,
+            ))
+
+        # the compiled kernel is not pickled
+        conversion = pickle.loads(pickle.dumps(conversion))
+        self.assertIsNone(conversion._kernel)
+        self.assertTrue(np.allclose(conversion.convert(raw), (2 * raw + 1) / 4))
+
+    def test_text_table_conversion(self):
+        kwargs = {
+            'conversion_type': v4c.CONVERSION_TYPE_TTAB,
+            'links_nr': 4 + 3,
+            'val_default': -1.0,
+        }
+        texts = [b'zero', b'one', b'zero']
+        for i, text in enumerate(texts):
+            kwargs['val_{}'.format(i)] = i * 10.0
+        conversion = ChannelConversion(**kwargs)
+        for i, text in enumerate(texts):
+            conversion.referenced_blocks['text_{}'.format(i)] = TextBlock(text=text)
+
+        raw = np.array([b'one', b'zero', b'two', b'one', b''] * 100)
+        expected = np.array([10.0, 0.0, -1.0, 10.0, -1.0] * 100)
+        self.assertTrue(np.array_equal(conversion.convert(raw), expected))
+        self.assertEqual(len(conversion.convert(raw[:0])), 0)
+
+    def test_range_table_conversion(self):
+        kwargs = {
+            'conversion_type': v4c.CONVERSION_TYPE_RTABX,
+            'ref_param_nr': 3,
+            'default': b'x = "{X} * 2"',
+        }
+        for i, (lower, upper, text) in enumerate(
+                [(0, 10, b'low'), (20, 30, b'high')]):
+            kwargs['lower_{}'.format(i)] = lower
+            kwargs['upper_{}'.format(i)] = upper
+            kwargs['text_{}'.format(i)] = text
+        conversion = ChannelConversion(**kwargs)
+
+        # the float values are inside a range if lower <= value < upper and
+        # the values outside the ranges use the nested default conversion
+        raw = np.array([-1.5, 0, 5, 10, 15, 20, 30, 35])
+        values = conversion.convert(raw)
+        expected = np.array([-3, np.nan, np.nan, 20, 30, np.nan, 60, 70])
+        self.assertTrue(np.allclose(values, expected, equal_nan=True))
+        self.assertEqual(conversion.convert(raw[:0]).dtype, np.float64)
+
+        # the integer values keep the original lookup
+        conversion = ChannelConversion(
+            conversion_type=v4c.CONVERSION_TYPE_RTAB,
+            val_param_nr=7,
+            lower_0=0, upper_0=10, phys_0=1.0,
+            lower_1=20, upper_1=30, phys_1=2.0,
+            default=-1.0,
+        )
+        raw = np.array([-1, 0, 5, 10, 15, 20, 30, 35])
+        expected = np.array([2, -1, -1, 1, 1, -1, 2, 2])
+        self.assertTrue(np.array_equal(conversion.convert(raw), expected))
+
+    def test_get_many(self):
+
+        sig_int = Signal(
+            np.random.randint(-2**31, 2**31, CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Integer Channel',
+            unit='unit1',
+        )
+
+        sig_float = Signal(
+            np.random.random(CHANNEL_LEN),
+            np.arange(CHANNEL_LEN),
+            name='Float Channel',
+            unit='unit2',
+        )
+
+        for memory in MEMORY:
+            with MDF(version='4.10', memory=memory) as mdf:
+                mdf.append([sig_int, sig_float])
+                outfile = mdf.save('tmp', overwrite=True)
+
+            with MDF(outfile, memory=memory) as mdf:
+                signals = mdf.get_many(0, [2, 1])
+                expected = [mdf.get(group=0, index=2), mdf.get(group=0, index=1)]
+
+            for signal, target in zip(signals, expected):
+                self.assertEqual(signal.name, target.name)
+                self.assertEqual(signal.unit, target.unit)
+                self.assertTrue(np.array_equal(signal.samples, target.samples))
+                self.assertTrue(np.array_equal(signal.timestamps,
+                                               target.timestamps))
+            self.assertTrue(np.array_equal(signals[0].samples,
+                                           sig_float.samples))
+
+    def test_cache_budget(self):
+        cache = LRUCache(max_bytes=2000)
+        cache['a'] = np.zeros(100)
+        cache['b'] = np.zeros(100)
+        self.assertIs(cache.get('a'), cache['a'])
+        cache['c'] = np.zeros(100)
+        self.assertNotIn('b', cache)
+        self.assertIn('a', cache)
+        cache['d'] = np.zeros(1000)
+        self.assertNotIn('d', cache)
+        self.assertEqual(cache.info()['evictions'], 2)
+        self.assertLessEqual(cache.size, 2000)
+
+        signals = [
+            Signal(
+                np.arange(CHANNEL_LEN, dtype=np.int32) + i,
+                np.arange(CHANNEL_LEN, dtype=np.float64),
+                name='Channel_{}'.format(i),
+            )
+            for i in range(3)
+        ]
+        with MDF(version='4.10') as mdf:
+            for signal in signals:
+                mdf.append([signal, ])
+            outfile = mdf.save('tmp', overwrite=True)
+
+        budget = 2 * CHANNEL_LEN * 8
+        for memory in MEMORY:
+            with MDF(outfile, memory=memory) as mdf:
+                mdf.configure(cache_bytes=budget)
+                for _ in range(2):
+                    for signal in signals:
+                        ret = mdf.get(signal.name)
+                        self.assertTrue(np.array_equal(ret.samples, signal.samples))
+                        self.assertTrue(np.array_equal(ret.timestamps, signal.timestamps))
+
+                info = mdf.cache_info()
+                self.assertEqual(info['max_bytes'], budget)
+                self.assertLessEqual(info['size'], budget)
+                self.assertGreater(info['evictions'], 0)
+
+                mdf.configure(cache_bytes=0)
+                self.assertIsNone(mdf.cache_info()['max_bytes'])
+
+    def test_unsorted_records(self):
+
+        record_sizes = {1: 3, 2: 5, 3: 0}
+        records = {1: [], 2: [], 3: []}
+        data = []
+        for i in range(100):
+            rec_id = i % 3 + 1
+            if rec_id == 3:
+                record = pack('<I', i % 7) + b'v' * (i % 7)
+            else:
+                record = bytes(bytearray([i % 256])) * record_sizes[rec_id]
+            records[rec_id].append(record)
+            data.append(pack('<H', rec_id) + record)
+        data = b''.join(data)
+
+        offsets = get_record_offsets(data, 2, record_sizes)
+        for rec_id, size in record_sizes.items():
+            self.assertEqual(
+                get_records(data, offsets[rec_id], size),
+                b''.join(records[rec_id]),
+            )
+
 
 if __name__ == '__main__':
     unittest.main()